@@ -0,0 +1,41 @@
+import json
+
+from fastapi import APIRouter, HTTPException, Request
+from fastapi.responses import FileResponse
+
+from app.core.profiling import RequestProfiler, is_admin
+
+router = APIRouter(prefix="/admin")
+
+
+def _profiler(request: Request) -> RequestProfiler:
+    profiler = getattr(request.app.state, "profiler", None)
+    if profiler is None or not is_admin(request.headers, profiler.admin_token):
+        # Same answer whether the token is wrong or admin access is disabled.
+        raise HTTPException(status_code=403, detail="Admin token required")
+    return profiler
+
+
+@router.get("/profiles")
+async def list_profiles(request: Request) -> dict:
+    """List stored request profiles, newest first."""
+    return {"profiles": _profiler(request).list_profiles()}
+
+
+@router.get("/profiles/{profile_id}")
+async def get_profile(profile_id: str, request: Request) -> dict:
+    """Return the summary report for one profile: timings, peak memory, top functions and allocations."""
+    path = _profiler(request).profile_path(profile_id, ".json")
+    if path is None:
+        raise HTTPException(status_code=404, detail="Profile not found")
+    with open(path, "r", encoding="utf-8") as handle:
+        return json.load(handle)
+
+
+@router.get("/profiles/{profile_id}/pstats")
+async def download_profile(profile_id: str, request: Request) -> FileResponse:
+    """Download the raw cProfile dump, for `python -m pstats` or snakeviz."""
+    path = _profiler(request).profile_path(profile_id, ".prof")
+    if path is None:
+        raise HTTPException(status_code=404, detail="Profile not found")
+    return FileResponse(path, media_type="application/octet-stream", filename=f"{profile_id}.prof")
@@ -0,0 +1,69 @@
+import asyncio
+from contextlib import asynccontextmanager
+from typing import AsyncIterator
+
+from fastapi import APIRouter, HTTPException, Request
+
+from app.storage.collections import Collection, CollectionNotFound, validate_collection_name
+
+router = APIRouter()
+
+
+def _registry(request: Request):
+    registry = getattr(request.app.state, "collections", None)
+    if registry is None:
+        raise HTTPException(status_code=500, detail="Storage is not initialized")
+    return registry
+
+
+def valid_collection_name(name: str) -> str:
+    """
+    Raises:
+        HTTPException 400: If `name` is not a valid collection name
+    """
+    try:
+        return validate_collection_name(name)
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=str(exc))
+
+
+@asynccontextmanager
+async def checked_out(request: Request, name: str, create: bool = False) -> AsyncIterator[Collection]:
+    """
+    Pin collection `name` (loading it if needed) for the duration of the block.
+
+    Loading, and closing whatever is evicted to make room, run in a worker
+    thread so they do not stall the event loop.
+
+    Raises:
+        HTTPException 400: If `name` is not a valid collection name
+        HTTPException 404: If the collection does not exist and `create` is False
+    """
+    registry = _registry(request)
+    try:
+        collection = await asyncio.to_thread(registry.acquire, valid_collection_name(name), create)
+    except CollectionNotFound:
+        raise HTTPException(status_code=404, detail="Collection not found")
+    try:
+        yield collection
+    finally:
+        await asyncio.to_thread(registry.release, collection)
+
+
+@router.get("/collections")
+async def list_collections(request: Request) -> dict:
+    """
+    List every collection on disk, with the estimated memory of those currently loaded.
+
+    Collections are created by their first ingest and loaded on first use; idle
+    ones are evicted least recently used to stay within `COLLECTIONS_MEMORY_BUDGET_MB`.
+    """
+    registry = _registry(request)
+    loaded = registry.loaded
+    return {
+        "collections": [
+            {"name": name, "loaded": name in loaded, "memory_bytes": loaded.get(name, 0)} for name in registry.names()
+        ],
+        "memory_bytes": sum(loaded.values()),
+        "memory_budget_bytes": registry.memory_budget,
+    }
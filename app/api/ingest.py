@@ -1,11 +1,24 @@
 import logging
+from contextlib import asynccontextmanager, nullcontext
 from datetime import datetime, timezone
+from typing import Awaitable, Callable, List, Optional, Tuple
 from uuid import uuid4
 
-from fastapi import APIRouter, UploadFile, File, HTTPException, Request
+from fastapi import APIRouter, UploadFile, File, HTTPException, Request, Response
 
+from app.api.collections import checked_out, valid_collection_name
+from app.core.admission import AdmissionRejected
 from app.core.document_loader import load_pdf, load_txt
-from app.core.chunker import chunk_text
+from app.core.chunker import ChunkSpans, chunk_spans, content_defined_spans, match_unchanged_chunks
+from app.core.metrics import (
+    INGEST_BYTES,
+    INGEST_CHUNKS,
+    INGEST_IN_PROGRESS,
+    INGEST_NEAR_DUPLICATES,
+    INGEST_REQUESTS,
+    INGEST_VECTORS,
+    StageTimer,
+)
 
 logger = logging.getLogger(__name__)
 
@@ -14,14 +27,29 @@ router = APIRouter()
 # Supported MIME types
 SUPPORTED_CONTENT_TYPES = {"application/pdf", "text/plain"}
 
+# Request header that opts in to a Server-Timing breakdown of the pipeline stages.
+DEBUG_TIMINGS_HEADER = "X-Debug-Timings"
+
+# Response header naming the stored profile when the request was profiled.
+PROFILE_ID_HEADER = "X-Profile-Id"
+
 
 @router.post("/ingest")
-async def ingest_file(request: Request, file: UploadFile = File(...)) -> dict:
+async def ingest_file(request: Request, response: Response, file: UploadFile = File(...)) -> dict:
     """
     Upload and process a document file.
 
     Supported formats: PDF, TXT
 
+    Each pipeline stage is timed into the `ingest_stage_seconds` histogram. Send
+    `X-Debug-Timings: 1` to also receive the breakdown in a `Server-Timing` header.
+
+    Requests are profiled (cProfile + tracemalloc) when sampled by
+    `PROFILING_SAMPLE_RATE` or when an admin sends `X-Profile: 1`; the stored
+    profile id is returned in `X-Profile-Id` and served under `/admin/profiles`.
+    Profiled requests run on their own event loop in a worker thread, so the
+    function profile covers that request only; memory figures are process-wide.
+
     Args:
         file: The file to ingest
 
@@ -31,6 +59,127 @@ async def ingest_file(request: Request, file: UploadFile = File(...)) -> dict:
     Raises:
         HTTPException 400: If content type is not supported
     """
+    return await _instrumented(request, response, file, "ingest", _ingest)
+
+
+@router.post("/collections/{name}/ingest")
+async def ingest_into_collection(name: str, request: Request, response: Response, file: UploadFile = File(...)) -> dict:
+    """
+    Upload a document into collection `name`, creating the collection on first use.
+
+    Each collection has its own vector index and metadata database, so its
+    documents are only returned by `/collections/{name}/search`. Otherwise the
+    same as `/ingest`.
+
+    Raises:
+        HTTPException 400: If `name` is not a valid collection name or the content type is not supported
+    """
+    valid_collection_name(name)
+
+    async def pipeline(request: Request, file: UploadFile, timer: StageTimer) -> dict:
+        return await _ingest(request, file, timer, collection=name)
+
+    return await _instrumented(request, response, file, "ingest", pipeline)
+
+
+@router.put("/documents/{document_id}")
+async def update_document(document_id: str, request: Request, response: Response, file: UploadFile = File(...)) -> dict:
+    """
+    Upload a new version of an existing document, embedding only what changed.
+
+    The new text is chunked with the strategy the document was first ingested
+    with. Chunks identical to one of the previous version keep their vectors and
+    rows (renumbered); superseded vectors are retired from search and only new
+    chunks are embedded. This only pays off for documents ingested with
+    `CHUNKING_STRATEGY=content_defined`, where an edit changes just the chunks
+    around it; fixed-size chunks after an insertion or deletion all shift and
+    are re-embedded.
+
+    Args:
+        document_id: Document returned by an earlier ingest
+        file: The new version (PDF or TXT)
+
+    Returns:
+        Document id, new version number and chunk counts
+
+    Raises:
+        HTTPException 404: If the document does not exist
+    """
+
+    async def pipeline(request: Request, file: UploadFile, timer: StageTimer) -> dict:
+        return await _reingest(request, document_id, file, timer)
+
+    return await _instrumented(request, response, file, "reingest", pipeline)
+
+
+async def _instrumented(
+    request: Request,
+    response: Response,
+    file: UploadFile,
+    label: str,
+    pipeline: Callable[[Request, UploadFile, StageTimer], Awaitable[dict]],
+) -> dict:
+    """
+    Run an ingest pipeline under admission control, with request metrics,
+    optional profiling and timing headers.
+
+    Raises:
+        HTTPException 429/503: If admission control sheds the request (with `Retry-After`)
+    """
+    timer = StageTimer()
+    profile_id = None
+    try:
+        async with _admitted(request, file):
+            # Admitted requests only; those still waiting are in ingest_queued.
+            INGEST_IN_PROGRESS.inc()
+            try:
+                profiler = getattr(request.app.state, "profiler", None)
+                if profiler is not None and profiler.should_profile(request.headers):
+                    result, profile_id = await profiler.profile_async(
+                        label,
+                        {"filename": file.filename, "content_type": file.content_type},
+                        lambda: pipeline(request, file, timer),
+                    )
+                else:
+                    result = await pipeline(request, file, timer)
+            finally:
+                INGEST_IN_PROGRESS.dec()
+    except AdmissionRejected as exc:
+        INGEST_REQUESTS.inc(status="rejected")
+        raise HTTPException(
+            status_code=exc.status_code, detail=exc.detail, headers={"Retry-After": str(exc.retry_after)}
+        )
+    except HTTPException as exc:
+        INGEST_REQUESTS.inc(status="client_error" if exc.status_code < 500 else "error")
+        raise
+    except Exception:
+        INGEST_REQUESTS.inc(status="error")
+        raise
+
+    INGEST_REQUESTS.inc(status="ok")
+    if request.headers.get(DEBUG_TIMINGS_HEADER) == "1":
+        response.headers["Server-Timing"] = timer.server_timing()
+    if profile_id is not None:
+        response.headers[PROFILE_ID_HEADER] = profile_id
+    return result
+
+
+def _admitted(request: Request, file: UploadFile):
+    admission = getattr(request.app.state, "admission_controller", None)
+    if admission is None:
+        return nullcontext()
+    content_length = request.headers.get("content-length")
+    size = int(content_length) if content_length and content_length.isdigit() else file.size
+    return admission.admit(admission.estimate_cost(size, file.content_type))
+
+
+def _chunk(text: str, strategy: str) -> ChunkSpans:
+    if strategy == "content_defined":
+        return content_defined_spans(text)
+    return chunk_spans(text)
+
+
+async def _read_text(file: UploadFile, timer: StageTimer) -> str:
     # Validate content type
     if file.content_type not in SUPPORTED_CONTENT_TYPES:
         raise HTTPException(
@@ -39,57 +188,109 @@ async def ingest_file(request: Request, file: UploadFile = File(...)) -> dict:
         )
 
     # Read file bytes to parse
-    file_bytes = await file.read()
+    with timer.stage("read"):
+        file_bytes = await file.read()
+    INGEST_BYTES.inc(len(file_bytes))
 
     # Parse based on content type
     try:
-        if file.content_type == "application/pdf":
-            text = load_pdf(file_bytes)
-        else:
-            text = load_txt(file_bytes)
+        with timer.stage("parse"):
+            if file.content_type == "application/pdf":
+                return load_pdf(file_bytes)
+            return load_txt(file_bytes)
     except ValueError as exc:
         raise HTTPException(status_code=400, detail=str(exc))
 
-    # Chunk the text (fixed-size, overlapping)
-    chunks = chunk_text(text)
-    num_chunks = len(chunks)
 
-    # Embed chunks if embedding model is available
+def _embed(request: Request, texts: List[str], timer: StageTimer) -> Tuple[List[List[float]], str, int]:
+    """
+    Embed `texts` with the app's model, reusing near-duplicate vectors when enabled.
+
+    Returns:
+        Embeddings (empty without a model), the model name and the near-duplicate count
+    """
     embedding_model = getattr(request.app.state, "embedding_model", None)
-    if embedding_model is not None and num_chunks > 0:
-        texts = [c["text"] for c in chunks]
-        embeddings = embedding_model.embed_texts(texts)
-        embedding_model_name = getattr(embedding_model, "model_name", "unknown")
-    else:
-        embeddings = []
-        embedding_model_name = getattr(embedding_model, "model_name", "unknown") if embedding_model is not None else ""
+    if embedding_model is None:
+        return [], "", 0
 
-    if len(embeddings) != num_chunks:
-        raise HTTPException(status_code=500, detail="Embedding count mismatch")
+    embedding_model_name = getattr(embedding_model, "model_name", "unknown")
+    if not texts:
+        return [], embedding_model_name, 0
 
-    document_id = str(uuid4())
+    near_duplicate_index = getattr(request.app.state, "near_duplicate_index", None)
+    with timer.stage("embed"):
+        if near_duplicate_index is None:
+            return embedding_model.embed_texts(texts), embedding_model_name, 0
+        # Imported here so numpy only loads once near-duplicate detection is in use.
+        from app.core.near_duplicates import embed_skipping_near_duplicates
+
+        try:
+            embeddings, near_duplicates = embed_skipping_near_duplicates(
+                texts, embedding_model.embed_texts, near_duplicate_index
+            )
+        except ValueError as exc:
+            raise HTTPException(status_code=500, detail=str(exc))
+    INGEST_NEAR_DUPLICATES.inc(near_duplicates)
+    return embeddings, embedding_model_name, near_duplicates
 
+
+def _stores(request: Request):
     vector_store = getattr(request.app.state, "vector_store", None)
     metadata_store = getattr(request.app.state, "metadata_store", None)
     if vector_store is None or metadata_store is None:
         raise HTTPException(status_code=500, detail="Storage is not initialized")
+    return vector_store, metadata_store
+
+
+@asynccontextmanager
+async def _target_stores(request: Request, collection: Optional[str]):
+    """Yield the stores of `collection` (pinned, created on first use), or the default stores."""
+    if collection is None:
+        yield _stores(request)
+        return
+    async with checked_out(request, collection, create=True) as target:
+        yield target.vector_store, target.metadata_store
+
+
+async def _ingest(request: Request, file: UploadFile, timer: StageTimer, collection: Optional[str] = None) -> dict:
+    text = await _read_text(file, timer)
+
+    # Chunk the text (fixed-size or content-defined, overlapping)
+    chunking = getattr(request.app.state, "chunking_strategy", "fixed")
+    with timer.stage("chunk"):
+        chunks = _chunk(text, chunking)
+    num_chunks = len(chunks)
+    INGEST_CHUNKS.inc(num_chunks)
+
+    # Embed chunks if embedding model is available; chunk strings exist only for this call.
+    embeddings, embedding_model_name, near_duplicates = _embed(request, chunks.texts() if num_chunks else [], timer)
+
+    if len(embeddings) != num_chunks:
+        raise HTTPException(status_code=500, detail="Embedding count mismatch")
+
+    document_id = str(uuid4())
 
     vector_metadata = [
-        {"document_id": document_id, "chunk_id": chunk["chunk_id"]}
-        for chunk in chunks
+        {"document_id": document_id, "chunk_id": chunk_id}
+        for chunk_id, _, _ in chunks
     ]
 
-    if embeddings:
-        vector_store.add_embeddings(embeddings, vector_metadata)
+    async with _target_stores(request, collection) as (vector_store, metadata_store):
+        if embeddings:
+            with timer.stage("vector_store"):
+                vector_store.add_embeddings(embeddings, vector_metadata)
+            INGEST_VECTORS.inc(len(embeddings))
 
-    metadata_store.save_document(
-        document_id=document_id,
-        filename=file.filename or "unknown",
-        upload_timestamp=datetime.now(timezone.utc).isoformat(),
-        num_chunks=num_chunks,
-        embedding_model=embedding_model_name,
-    )
-    metadata_store.save_chunks(document_id=document_id, chunks=chunks)
+        with timer.stage("metadata_store"):
+            metadata_store.save_document(
+                document_id=document_id,
+                filename=file.filename or "unknown",
+                upload_timestamp=datetime.now(timezone.utc).isoformat(),
+                num_chunks=num_chunks,
+                embedding_model=embedding_model_name,
+                chunking=chunking,
+            )
+            metadata_store.save_chunks(document_id=document_id, chunks=chunks)
 
     logger.info(
         f"File uploaded: {file.filename}",
@@ -97,12 +298,85 @@ async def ingest_file(request: Request, file: UploadFile = File(...)) -> dict:
             "uploaded_filename": file.filename,
             "uploaded_content_type": file.content_type,
             "document_id": document_id,
+            "collection": collection,
+            "num_chunks": num_chunks,
+            "near_duplicate_chunks": near_duplicates,
+            "stage_seconds": timer.durations,
+        },
+    )
+
+    return {
+        "document_id": document_id,
+        "num_chunks": num_chunks,
+        "embedding_model": embedding_model_name,
+    }
+
+
+async def _reingest(request: Request, document_id: str, file: UploadFile, timer: StageTimer) -> dict:
+    vector_store, metadata_store = _stores(request)
+    document = metadata_store.get_document(document_id)
+    if document is None:
+        raise HTTPException(status_code=404, detail="Document not found")
+
+    text = await _read_text(file, timer)
+
+    # Cut the new version the way the stored one was cut, or no boundaries would line up.
+    with timer.stage("chunk"):
+        chunks = _chunk(text, document["chunking"])
+    num_chunks = len(chunks)
+    INGEST_CHUNKS.inc(num_chunks)
+
+    with timer.stage("diff"):
+        kept = match_unchanged_chunks(metadata_store.get_document_chunks(document_id), chunks.texts())
+        reused = set(kept.values())
+        changed = [chunk_id for chunk_id, _, _ in chunks if chunk_id not in reused]
+
+    embeddings, embedding_model_name, near_duplicates = _embed(
+        request, [chunks.text_at(chunk_id - 1) for chunk_id in changed], timer
+    )
+    if len(embeddings) != len(changed):
+        raise HTTPException(status_code=500, detail="Embedding count mismatch")
+
+    # Vectors and metadata switch versions under one write-lock hold, the lock
+    # snapshots take, so a snapshot never sees one store ahead of the other.
+    with vector_store.exclusive():
+        with timer.stage("vector_store"):
+            retired = vector_store.replace_document_chunks(
+                document_id, kept, embeddings, [{"document_id": document_id, "chunk_id": chunk_id} for chunk_id in changed]
+            )
+        INGEST_VECTORS.inc(len(embeddings))
+
+        with timer.stage("metadata_store"):
+            version = metadata_store.update_document(
+                document_id=document_id,
+                filename=file.filename or "unknown",
+                upload_timestamp=datetime.now(timezone.utc).isoformat(),
+                embedding_model=embedding_model_name,
+                chunks=chunks,
+                kept=kept,
+            )
+
+    logger.info(
+        f"Document updated: {file.filename}",
+        extra={
+            "uploaded_filename": file.filename,
+            "document_id": document_id,
+            "version": version,
             "num_chunks": num_chunks,
+            "embedded_chunks": len(embeddings),
+            "reused_chunks": len(kept),
+            "retired_vectors": retired,
+            "near_duplicate_chunks": near_duplicates,
+            "stage_seconds": timer.durations,
         },
     )
 
     return {
         "document_id": document_id,
+        "version": version,
         "num_chunks": num_chunks,
+        "embedded_chunks": len(embeddings),
+        "reused_chunks": len(kept),
+        "retired_chunks": retired,
         "embedding_model": embedding_model_name,
     }
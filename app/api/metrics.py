@@ -0,0 +1,57 @@
+from fastapi import APIRouter, Request
+from fastapi.responses import PlainTextResponse
+
+from app.core.metrics import (
+    COLLECTIONS_LOADED,
+    COLLECTIONS_MEMORY,
+    COLLECTIONS_MEMORY_BUDGET,
+    EMBEDDING_MODEL_LOADED,
+    INGEST_IN_FLIGHT_COST,
+    INGEST_MEMORY_BUDGET,
+    INGEST_QUEUED,
+    REGISTRY,
+    SEARCH_CACHE_BYTES,
+    SEARCH_CACHE_ENTRIES,
+    SEARCH_CACHE_HIT_RATIO,
+    VECTOR_INDEX_RETIRED,
+    VECTOR_INDEX_SIZE,
+)
+
+router = APIRouter()
+
+PROMETHEUS_CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+@router.get("/metrics", response_class=PlainTextResponse)
+async def metrics(request: Request) -> PlainTextResponse:
+    """Expose service metrics in the Prometheus text format."""
+    # Point-in-time gauges are sampled at scrape time rather than on the ingest path.
+    vector_store = getattr(request.app.state, "vector_store", None)
+    retired = getattr(vector_store, "retired_count", 0) or 0
+    VECTOR_INDEX_SIZE.set((getattr(vector_store, "ntotal", 0) or 0) - retired)
+    VECTOR_INDEX_RETIRED.set(retired)
+
+    embedding_model = getattr(request.app.state, "embedding_model", None)
+    EMBEDDING_MODEL_LOADED.set(1 if getattr(embedding_model, "_model", None) is not None else 0)
+
+    admission = getattr(request.app.state, "admission_controller", None)
+    if admission is not None:
+        INGEST_QUEUED.set(admission.queued)
+        INGEST_IN_FLIGHT_COST.set(admission.in_flight_cost)
+        INGEST_MEMORY_BUDGET.set(admission.memory_budget)
+
+    collections = getattr(request.app.state, "collections", None)
+    if collections is not None:
+        loaded = collections.loaded
+        COLLECTIONS_LOADED.set(len(loaded))
+        COLLECTIONS_MEMORY.set(sum(loaded.values()))
+        COLLECTIONS_MEMORY_BUDGET.set(collections.memory_budget)
+
+    for name, attribute in (("query_embedding", "query_embedding_cache"), ("search_results", "search_result_cache")):
+        cache = getattr(request.app.state, attribute, None)
+        if cache is not None:
+            SEARCH_CACHE_HIT_RATIO.set(cache.hit_ratio(), cache=name)
+            SEARCH_CACHE_ENTRIES.set(len(cache), cache=name)
+            SEARCH_CACHE_BYTES.set(cache.size_bytes, cache=name)
+
+    return PlainTextResponse(REGISTRY.render(), media_type=PROMETHEUS_CONTENT_TYPE)
@@ -0,0 +1,193 @@
+import asyncio
+import logging
+import sys
+import time
+from typing import Dict, List, Optional
+
+from fastapi import APIRouter, HTTPException, Request
+
+from app.api.collections import checked_out
+from app.core.fusion import reciprocal_rank_fusion
+from app.core.metrics import SEARCH_CACHE_REQUESTS
+from app.core.search_cache import hits_size, query_vector, vector_key
+from app.models.search import SearchRequest
+
+logger = logging.getLogger(__name__)
+
+router = APIRouter()
+
+# Each hybrid leg retrieves this many times `k` candidates before fusion.
+HYBRID_CANDIDATE_FACTOR = 4
+
+
+def _timed(leg, *args):
+    started = time.perf_counter()
+    hits = leg(*args)
+    return hits, (time.perf_counter() - started) * 1000
+
+
+def _cache_lookup(cache, name: str, key, generation: int = 0):
+    value = cache.get(key, generation)
+    SEARCH_CACHE_REQUESTS.inc(cache=name, result="miss" if value is None else "hit")
+    return value
+
+
+def _query_embedding(state, embedding_model, query: str):
+    cache = getattr(state, "query_embedding_cache", None)
+    if cache is None:
+        return embedding_model.embed_texts([query])[0]
+
+    key = (getattr(embedding_model, "model_name", "unknown"), query)
+    vector = _cache_lookup(cache, "query_embedding", key)
+    if vector is None:
+        vector = query_vector(embedding_model.embed_texts([query])[0])
+        cache.put(key, vector, sys.getsizeof(vector) + sys.getsizeof(query))
+    return vector
+
+
+def _dense_leg(
+    state, embedding_model, vector_store, cache, query: str, k: int, document_ids: Optional[List[str]]
+) -> List[Dict]:
+    query_embedding = _query_embedding(state, embedding_model, query)
+    if cache is None:
+        return vector_store.search(query_embedding, k=k, document_ids=document_ids)
+
+    # Read the generation before searching: a write that lands in between only
+    # makes the cached hits newer than their key, never staler.
+    generation = vector_store.search_generation()
+    vector = query_vector(query_embedding)
+    key = (vector_key(vector), k, tuple(sorted(document_ids)) if document_ids is not None else None)
+    hits = _cache_lookup(cache, "search_results", key, generation)
+    if hits is None:
+        hits = vector_store.search(vector, k=k, document_ids=document_ids)
+        cache.put(key, hits, hits_size(hits), generation)
+    return hits
+
+
+@router.post("/search")
+async def search(request: Request, body: SearchRequest) -> dict:
+    """
+    Return the chunks most relevant to `query`, optionally restricted by document filters.
+
+    Modes:
+        dense: embedding k-NN over the vector store (L2 `distance`)
+        lexical: BM25 over the chunk full-text index (`bm25`)
+        hybrid: both legs run concurrently and are fused by reciprocal rank (`score`)
+
+    Filters are resolved to document ids in the metadata store first and applied
+    inside each leg. Per-leg latency is reported in `timings_ms`.
+
+    Raises:
+        HTTPException 500: If the embedding model or storage is not initialized
+    """
+    embedding_model = _embedding_model(request, body)
+    vector_store = getattr(request.app.state, "vector_store", None)
+    metadata_store = getattr(request.app.state, "metadata_store", None)
+    if vector_store is None or metadata_store is None:
+        raise HTTPException(status_code=500, detail="Storage is not initialized")
+
+    result_cache = getattr(request.app.state, "search_result_cache", None)
+    return await _search(request.app.state, body, embedding_model, vector_store, metadata_store, result_cache)
+
+
+@router.post("/collections/{name}/search")
+async def search_collection(name: str, request: Request, body: SearchRequest) -> dict:
+    """
+    Search collection `name`, loading it on first use; otherwise the same as `/search`.
+
+    Raises:
+        HTTPException 400: If `name` is not a valid collection name
+        HTTPException 404: If nothing was ever ingested into the collection
+        HTTPException 500: If the embedding model or storage is not initialized
+    """
+    embedding_model = _embedding_model(request, body)
+    async with checked_out(request, name) as collection:
+        return await _search(
+            request.app.state,
+            body,
+            embedding_model,
+            collection.vector_store,
+            collection.metadata_store,
+            collection.result_cache,
+            collection=name,
+        )
+
+
+def _embedding_model(request: Request, body: SearchRequest):
+    embedding_model = getattr(request.app.state, "embedding_model", None)
+    if embedding_model is None and body.mode != "lexical":
+        raise HTTPException(status_code=500, detail="Embedding model is not initialized")
+    return embedding_model
+
+
+async def _search(
+    state,
+    body: SearchRequest,
+    embedding_model,
+    vector_store,
+    metadata_store,
+    result_cache,
+    collection: Optional[str] = None,
+) -> dict:
+    document_ids = None
+    if body.filters is not None and not body.filters.is_empty():
+        document_ids = metadata_store.find_document_ids(**body.filters.model_dump())
+        if not document_ids:
+            return {"results": [], "timings_ms": {}}
+
+    timings: Dict[str, float] = {}
+    if body.mode == "dense":
+        hits, timings["dense"] = _timed(
+            _dense_leg, state, embedding_model, vector_store, result_cache, body.query, body.k, document_ids
+        )
+    elif body.mode == "lexical":
+        hits, timings["lexical"] = _timed(metadata_store.search_lexical, body.query, body.k, document_ids)
+    else:
+        candidates = body.k * HYBRID_CANDIDATE_FACTOR
+        (dense_hits, timings["dense"]), (lexical_hits, timings["lexical"]) = await asyncio.gather(
+            asyncio.to_thread(
+                _timed,
+                _dense_leg,
+                state,
+                embedding_model,
+                vector_store,
+                result_cache,
+                body.query,
+                candidates,
+                document_ids,
+            ),
+            asyncio.to_thread(_timed, metadata_store.search_lexical, body.query, candidates, document_ids),
+        )
+        by_key = {}
+        for hit in lexical_hits + dense_hits:
+            by_key.setdefault((hit["document_id"], hit["chunk_id"]), {}).update(hit)
+        fused = reciprocal_rank_fusion(
+            [
+                [(hit["document_id"], hit["chunk_id"]) for hit in dense_hits],
+                [(hit["document_id"], hit["chunk_id"]) for hit in lexical_hits],
+            ]
+        )
+        hits = [{**by_key[key], "score": score} for key, score in fused[: body.k]]
+
+    texts = metadata_store.get_chunk_texts((hit["document_id"], hit["chunk_id"]) for hit in hits)
+    results = []
+    for hit in hits:
+        result = {"document_id": hit["document_id"], "chunk_id": hit["chunk_id"]}
+        for field in ("score", "distance", "bm25"):
+            if field in hit:
+                result[field] = hit[field]
+        result["text"] = texts.get((hit["document_id"], hit["chunk_id"]))
+        results.append(result)
+
+    logger.info(
+        "Search served",
+        extra={
+            "collection": collection,
+            "mode": body.mode,
+            "k": body.k,
+            "num_results": len(results),
+            "filtered": document_ids is not None,
+            "timings_ms": timings,
+        },
+    )
+    return {"results": results, "timings_ms": {leg: round(ms, 3) for leg, ms in timings.items()}}
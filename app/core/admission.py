@@ -0,0 +1,137 @@
+import asyncio
+import math
+import time
+from collections import deque
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Deque, Dict, Mapping, Optional
+
+# Peak traced memory per uploaded byte, measured over parse + chunk + embed
+# (384-d embeddings as Python lists dominate): ~40x for text, ~24x for PDF on
+# top of a fixed ~8 MB for pypdf's page objects.
+DEFAULT_COST_FACTORS = {"application/pdf": 24.0, "text/plain": 40.0}
+DEFAULT_BASE_COST = 8 * 2**20
+
+
+class AdmissionRejected(Exception):
+    """Raised when a request is shed; maps to an HTTP status with `Retry-After`."""
+
+    def __init__(self, status_code: int, detail: str, retry_after: int) -> None:
+        super().__init__(detail)
+        self.status_code = status_code
+        self.detail = detail
+        self.retry_after = retry_after
+
+
+class AdmissionController:
+    """
+    Concurrency and memory budget for expensive requests, with a short FIFO queue.
+
+    Each request declares an estimated cost in bytes (`estimate_cost`). It runs
+    once fewer than `max_concurrent` requests are in flight and the in-flight
+    cost plus its own fits in `memory_budget`; a request costing more than the
+    whole budget is admitted only when nothing else is running. Requests wait
+    in arrival order, so large uploads are not starved by small ones. A request
+    is rejected with 429 when `max_queued` are already waiting and with 503 when
+    it waits longer than `queue_timeout` seconds.
+    """
+
+    def __init__(
+        self,
+        max_concurrent: int,
+        memory_budget: int,
+        queue_timeout: float = 10.0,
+        max_queued: int = 32,
+        cost_factors: Optional[Mapping[str, float]] = None,
+        base_cost: int = DEFAULT_BASE_COST,
+    ) -> None:
+        if max_concurrent < 1:
+            raise ValueError("max_concurrent must be >= 1")
+        if memory_budget < 1:
+            raise ValueError("memory_budget must be >= 1")
+        self.max_concurrent = max_concurrent
+        self.memory_budget = memory_budget
+        self.queue_timeout = queue_timeout
+        self.max_queued = max_queued
+        self.cost_factors: Dict[str, float] = dict(DEFAULT_COST_FACTORS if cost_factors is None else cost_factors)
+        self.base_cost = base_cost
+        self.in_flight = 0
+        self.in_flight_cost = 0
+        self._waiters: Deque[asyncio.Future] = deque()
+        # Smoothed time a request holds its slot, for Retry-After hints.
+        self._hold_seconds = 1.0
+
+    @property
+    def queued(self) -> int:
+        return len(self._waiters)
+
+    def estimate_cost(self, content_length: Optional[int], content_type: Optional[str]) -> int:
+        """Estimate peak bytes for a request from its size and type (unknown types use the largest factor)."""
+        factor = self.cost_factors.get(content_type or "", max(self.cost_factors.values(), default=1.0))
+        return self.base_cost + int(max(content_length or 0, 0) * factor)
+
+    def _fits(self, cost: int) -> bool:
+        if self.in_flight == 0:
+            return True
+        return self.in_flight < self.max_concurrent and self.in_flight_cost + cost <= self.memory_budget
+
+    def retry_after(self) -> int:
+        """Seconds until a retry is likely to be admitted, from the queue length and hold time."""
+        rounds = (self.queued + self.in_flight) / self.max_concurrent
+        return max(1, math.ceil(rounds * self._hold_seconds))
+
+    def _wake_next(self) -> None:
+        # Only the head of the queue may proceed, so admission stays FIFO.
+        if self._waiters and not self._waiters[0].done():
+            self._waiters[0].set_result(None)
+
+    @asynccontextmanager
+    async def admit(self, cost: int) -> AsyncIterator[None]:
+        """
+        Hold budget for `cost` bytes while the block runs.
+
+        Raises:
+            AdmissionRejected: 429 if the queue is full, 503 if the wait timed out
+        """
+        if self._waiters or not self._fits(cost):
+            if len(self._waiters) >= self.max_queued:
+                raise AdmissionRejected(429, "Too many uploads queued", self.retry_after())
+            await self._wait_turn(cost)
+
+        self.in_flight += 1
+        self.in_flight_cost += cost
+        started = time.monotonic()
+        try:
+            yield
+        finally:
+            self.in_flight -= 1
+            self.in_flight_cost -= cost
+            self._hold_seconds = 0.8 * self._hold_seconds + 0.2 * (time.monotonic() - started)
+            self._wake_next()
+
+    async def _wait_turn(self, cost: int) -> None:
+        waiter = asyncio.get_running_loop().create_future()
+        self._waiters.append(waiter)
+        deadline = time.monotonic() + self.queue_timeout
+        try:
+            while True:
+                if self._waiters[0] is waiter and self._fits(cost):
+                    return
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    raise AdmissionRejected(503, "Server is busy, upload not admitted in time", self.retry_after())
+                try:
+                    await asyncio.wait_for(asyncio.shield(waiter), remaining)
+                except asyncio.TimeoutError:
+                    continue
+                # Woken: re-arm for the next release in case the budget still does not fit.
+                waiter = self._rearm(waiter)
+        finally:
+            self._waiters.remove(waiter)
+            # The new head may fit now that this request left the queue.
+            self._wake_next()
+
+    def _rearm(self, waiter: asyncio.Future) -> asyncio.Future:
+        position = self._waiters.index(waiter)
+        fresh = asyncio.get_running_loop().create_future()
+        self._waiters[position] = fresh
+        return fresh
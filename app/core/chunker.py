@@ -1,18 +1,68 @@
-from typing import List, Dict
+import re
+import zlib
+from array import array
+from collections import defaultdict, deque
+from typing import Deque, Dict, Iterator, List, Sequence, Tuple
 
+_NON_SPACE = re.compile(r"\S")
+_SPACE_RUN = re.compile(r"\s+")
 
-def chunk_text(text: str, chunk_size: int = 500, overlap: int = 100) -> List[Dict]:
+# Content-defined boundaries: a whitespace run is a cut point when the crc32 of the
+# characters just before it has its low bits clear (about 1 run in 32).
+_CDC_WINDOW = 16
+_CDC_MASK = (1 << 5) - 1
+
+
+class ChunkSpans:
     """
-    Split `text` into fixed-size character chunks with overlap.
+    Chunks of one document as (start, end) character offsets into its text.
 
-    - `chunk_size`: maximum number of characters per chunk
-    - `overlap`: number of characters that overlap between consecutive chunks
+    Overlapping chunks share the document string instead of each holding a copy,
+    so a chunked document costs the text once plus 16 bytes per chunk. Chunk ids
+    are 1-based positions. Text is only sliced out on request (`text_at`,
+    `texts`), e.g. for embedding input or API responses.
+    """
 
-    Returns a list of dicts with keys `chunk_id` (1-based int) and `text`.
-    Empty chunks are omitted. Order is preserved and deterministic.
+    __slots__ = ("text", "starts", "ends")
+
+    def __init__(self, text: str, starts: array, ends: array) -> None:
+        self.text = text
+        self.starts = starts
+        self.ends = ends
+
+    def __len__(self) -> int:
+        return len(self.starts)
+
+    def __iter__(self) -> Iterator[Tuple[int, int, int]]:
+        """Yield `(chunk_id, start, end)` for each chunk."""
+        return zip(range(1, len(self.starts) + 1), self.starts, self.ends)
+
+    def text_at(self, index: int) -> str:
+        return self.text[self.starts[index] : self.ends[index]]
+
+    def iter_texts(self) -> Iterator[str]:
+        text = self.text
+        return (text[start:end] for start, end in zip(self.starts, self.ends))
+
+    def texts(self) -> List[str]:
+        return list(self.iter_texts())
+
+    def to_dicts(self) -> List[Dict]:
+        """Legacy representation: `[{"chunk_id": 1, "text": ...}, ...]`."""
+        return [{"chunk_id": chunk_id, "text": self.text[start:end]} for chunk_id, start, end in self]
+
+
+def chunk_spans(text: str, chunk_size: int = 500, overlap: int = 100) -> ChunkSpans:
     """
+    Split `text` into fixed-size character chunks with overlap, as offsets.
+
+    Same boundaries as `chunk_text`: whitespace-only windows are skipped and
+    chunking stops at the first chunk that reaches the end of the text.
+    """
+    starts = array("q")
+    ends = array("q")
     if not text:
-        return []
+        return ChunkSpans(text, starts, ends)
 
     if chunk_size <= 0:
         raise ValueError("chunk_size must be > 0")
@@ -22,17 +72,14 @@ def chunk_text(text: str, chunk_size: int = 500, overlap: int = 100) -> List[Dic
     if step <= 0:
         step = 1
 
-    chunks: List[Dict] = []
     text_len = len(text)
     start = 0
-    chunk_id = 1
-
     while start < text_len:
         end = min(start + chunk_size, text_len)
-        piece = text[start:end]
-        if piece and piece.strip():
-            chunks.append({"chunk_id": chunk_id, "text": piece})
-            chunk_id += 1
+        # Look for a non-space character in place rather than slicing the window.
+        if _NON_SPACE.search(text, start, end):
+            starts.append(start)
+            ends.append(end)
 
             # If we've reached the end of the text with this chunk, stop
             if end >= text_len:
@@ -40,4 +87,93 @@ def chunk_text(text: str, chunk_size: int = 500, overlap: int = 100) -> List[Dic
 
         start += step
 
-    return chunks
+    return ChunkSpans(text, starts, ends)
+
+
+def chunk_text(text: str, chunk_size: int = 500, overlap: int = 100) -> List[Dict]:
+    """
+    Split `text` into fixed-size character chunks with overlap.
+
+    - `chunk_size`: maximum number of characters per chunk
+    - `overlap`: number of characters that overlap between consecutive chunks
+
+    Returns a list of dicts with keys `chunk_id` (1-based int) and `text`.
+    Empty chunks are omitted. Order is preserved and deterministic.
+
+    This copies every chunk's text; `chunk_spans` returns the same chunks as
+    offsets without the copies.
+    """
+    return chunk_spans(text, chunk_size, overlap).to_dicts()
+
+
+def _content_boundary(text: str, start: int, min_size: int, max_size: int) -> int:
+    limit = start + max_size
+    if limit >= len(text):
+        return len(text)
+    fallback, lowest = limit, None
+    for match in _SPACE_RUN.finditer(text, start + min_size, limit):
+        window = text[max(match.start() - _CDC_WINDOW, start) : match.start()]
+        digest = zlib.crc32(window.encode("utf-8"))
+        if digest & _CDC_MASK == 0:
+            return match.end()
+        if lowest is None or digest < lowest:
+            fallback, lowest = match.end(), digest
+    # No anchor in range: cut at the lowest-hashing whitespace, which also depends
+    # on content rather than on where this chunk started; else cut mid-word.
+    return fallback
+
+
+def content_defined_spans(text: str, chunk_size: int = 500, overlap: int = 100) -> ChunkSpans:
+    """
+    Split `text` at content-defined boundaries, as offsets.
+
+    Cut points follow whitespace and are chosen by hashing the preceding
+    characters, so an edit only moves the boundaries near it: chunks before and
+    after the edit keep their exact text. Each chunk is a core of half to all of
+    (chunk_size - overlap) characters, extended by `overlap` characters into the
+    next one, so no chunk exceeds `chunk_size`.
+    """
+    starts = array("q")
+    ends = array("q")
+    if not text:
+        return ChunkSpans(text, starts, ends)
+
+    if chunk_size <= 0:
+        raise ValueError("chunk_size must be > 0")
+
+    step = max(chunk_size - overlap, 1)
+    # Shorter cores resync sooner after an edit, at ~35% more chunks than fixed-size.
+    min_size = max(step // 2, 1)
+    text_len = len(text)
+    start = 0
+    while start < text_len:
+        boundary = _content_boundary(text, start, min_size, step)
+        end = min(boundary + max(overlap, 0), text_len)
+        if _NON_SPACE.search(text, start, end):
+            starts.append(start)
+            ends.append(end)
+        if end >= text_len:
+            break
+        start = boundary
+
+    return ChunkSpans(text, starts, ends)
+
+
+def match_unchanged_chunks(previous: Dict[int, str], texts: Sequence[str]) -> Dict[int, int]:
+    """
+    Pair chunks of a new document version with identical chunks of the previous one.
+
+    Returns `{previous_chunk_id: new_chunk_id}` (new ids are 1-based positions in
+    `texts`). Repeated texts are paired in order; unpaired previous chunks are
+    superseded and unpaired new chunks need embedding.
+    """
+    available: Dict[str, Deque[int]] = defaultdict(deque)
+    for chunk_id in sorted(previous):
+        available[previous[chunk_id]].append(chunk_id)
+
+    matches: Dict[int, int] = {}
+    for position, text in enumerate(texts, start=1):
+        candidates = available.get(text)
+        if candidates:
+            matches[candidates.popleft()] = position
+    return matches
@@ -1,4 +1,6 @@
 import logging
+from typing import Dict, Optional
+
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
 
@@ -17,6 +19,34 @@ class Settings(BaseSettings):
     DATA_DIR: str = "./data"
     FAISS_INDEX_PATH: str = "./data/faiss.index"
     SQLITE_DB_PATH: str = "./data/metadata.db"
+    VECTOR_STORE_SHARDS: int = 1
+    FAISS_MMAP: bool = False
+    FAISS_INDEX_TYPE: str = "flat"
+    FAISS_RERANK_FACTOR: int = 0
+    FAISS_TRAIN_SIZE: int = 10000
+    FAISS_COMPACT_RATIO: float = 0.25
+    METADATA_STORAGE_MODE: str = "inline"
+    METADATA_TEXT_COMPRESSION: str = "none"
+    # "content_defined" keeps chunk boundaries stable across edits, so PUT /documents
+    # re-embeds only what changed; documents keep the strategy they were ingested with.
+    CHUNKING_STRATEGY: str = "fixed"
+    PDF_BACKEND: str = "auto"
+    NEAR_DUP_THRESHOLD: float = 0.0
+    NEAR_DUP_CACHE_SIZE: int = 10000
+    INGEST_MAX_CONCURRENT: int = 4
+    INGEST_MEMORY_BUDGET_MB: int = 1024
+    INGEST_QUEUE_TIMEOUT: float = 10.0
+    INGEST_MAX_QUEUED: int = 32
+    # Peak bytes per uploaded byte by content type; unset uses the measured defaults in app.core.admission.
+    INGEST_COST_FACTORS: Optional[Dict[str, float]] = None
+    QUERY_CACHE_SIZE: int = 1024
+    SEARCH_RESULT_CACHE_SIZE: int = 1024
+    COLLECTIONS_MEMORY_BUDGET_MB: int = 512
+    COLLECTIONS_MAX_LOADED: int = 128
+    COLLECTION_RESULT_CACHE_SIZE: int = 64
+    PROFILING_SAMPLE_RATE: float = 0.0
+    PROFILING_MAX_STORED: int = 50
+    ADMIN_TOKEN: str = ""
     HF_HOME: str = "/tmp/models"
 
 
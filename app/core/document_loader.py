@@ -1,19 +1,113 @@
+import importlib.util
 import io
 import re
-from typing import Optional
+from typing import Callable, Dict, List, Optional, Tuple
 
-from pypdf import PdfReader
+from app.core.metrics import INGEST_PAGES
 
+# pypdf is imported on first use; it accounts for a large share of import time.
+PdfReader = None
 
-def load_pdf(file_bytes: bytes) -> str:
+# name -> (modules that provide it, extractor returning one text per page).
+# "auto" picks the first installed backend in registration order, fastest first.
+PDF_BACKENDS: Dict[str, Tuple[Tuple[str, ...], Callable[[bytes], List[str]]]] = {}
+
+# Backend used when `load_pdf` is not given one; set from PDF_BACKEND at startup.
+_pdf_backend = "auto"
+
+
+def pdf_backend(name: str, *modules: str):
+    """Register a PDF text extractor available when any of `modules` is installed."""
+
+    def register(extract: Callable[[bytes], List[str]]) -> Callable[[bytes], List[str]]:
+        PDF_BACKENDS[name] = (modules, extract)
+        return extract
+
+    return register
+
+
+@pdf_backend("pypdfium2", "pypdfium2")
+def _extract_pdfium(file_bytes: bytes) -> List[str]:
+    import pypdfium2
+
+    document = pypdfium2.PdfDocument(file_bytes)
+    try:
+        pages = []
+        for page in document:
+            text_page = page.get_textpage()
+            pages.append(text_page.get_text_range())
+            text_page.close()
+            page.close()
+        return pages
+    finally:
+        document.close()
+
+
+# PyMuPDF is AGPL-licensed; it is only used when installed alongside the service.
+@pdf_backend("pymupdf", "pymupdf", "fitz")
+def _extract_pymupdf(file_bytes: bytes) -> List[str]:
+    try:
+        import pymupdf
+    except ImportError:
+        import fitz as pymupdf
+
+    with pymupdf.open(stream=file_bytes, filetype="pdf") as document:
+        return [page.get_text() for page in document]
+
+
+@pdf_backend("pypdf", "pypdf")
+def _extract_pypdf(file_bytes: bytes) -> List[str]:
+    reader = _get_pdf_reader_cls()(io.BytesIO(file_bytes))
+    return [page.extract_text() for page in reader.pages]
+
+
+def available_pdf_backends() -> List[str]:
+    """Registered backends whose library is installed, in "auto" preference order."""
+    # find_spec locates a module without importing it.
+    return [
+        name
+        for name, (modules, _) in PDF_BACKENDS.items()
+        if any(importlib.util.find_spec(module) is not None for module in modules)
+    ]
+
+
+def resolve_pdf_backend(name: str = "auto") -> str:
+    """
+    Return the backend `name` refers to ("auto": fastest installed one).
+
+    Raises:
+        ValueError: If `name` is not a registered backend or is not installed
+    """
+    if name != "auto" and name not in PDF_BACKENDS:
+        raise ValueError(f"Unknown PDF backend {name!r}; choose auto or one of {', '.join(PDF_BACKENDS)}")
+    available = available_pdf_backends()
+    if name == "auto":
+        if not available:
+            raise ValueError("No PDF backend is installed")
+        return available[0]
+    if name not in available:
+        raise ValueError(f"PDF backend {name!r} is not installed")
+    return name
+
+
+def configure_pdf_backend(name: str) -> str:
+    """Set the default backend for `load_pdf`; returns the resolved name."""
+    global _pdf_backend
+    _pdf_backend = resolve_pdf_backend(name)
+    return _pdf_backend
+
+
+def load_pdf(file_bytes: bytes, backend: Optional[str] = None) -> str:
     """
     Extract text from PDF file.
 
     Extracts text page-by-page, skips empty pages, and preserves
-    paragraph separation.
+    paragraph separation. Every backend's output goes through the same
+    normalization.
 
     Args:
         file_bytes: Raw PDF file content as bytes
+        backend: Extractor to use (default: the configured one, see `configure_pdf_backend`)
 
     Returns:
         Extracted and normalized text content
@@ -21,19 +115,21 @@ def load_pdf(file_bytes: bytes) -> str:
     Raises:
         ValueError: If PDF is invalid or cannot be read
     """
+    name = backend or _pdf_backend
+    if name == "auto":
+        name = configure_pdf_backend("auto")
+    elif backend is not None:
+        name = resolve_pdf_backend(backend)
+    extract = PDF_BACKENDS[name][1]
     try:
-        pdf_file = io.BytesIO(file_bytes)
-        reader = PdfReader(pdf_file)
+        pages = extract(file_bytes)
 
-        if not reader.pages:
+        if not pages:
             return ""
 
-        text_parts = []
+        INGEST_PAGES.inc(len(pages))
 
-        for page in reader.pages:
-            page_text = page.extract_text()
-            if page_text and page_text.strip():
-                text_parts.append(page_text)
+        text_parts = [page_text for page_text in pages if page_text and page_text.strip()]
 
         full_text = "\n\n".join(text_parts)
         return _normalize_text(full_text)
@@ -99,3 +195,14 @@ def _normalize_text(text: str) -> str:
     text = text.strip()
 
     return text
+
+
+def _get_pdf_reader_cls():
+    global PdfReader
+    if PdfReader is not None:
+        return PdfReader
+
+    from pypdf import PdfReader as _PdfReader
+
+    PdfReader = _PdfReader
+    return PdfReader
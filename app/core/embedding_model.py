@@ -2,8 +2,6 @@ import os
 from threading import Lock
 from typing import List
 
-import numpy as np
-
 SentenceTransformer = None
 
 _model_instance = None
@@ -38,6 +36,8 @@ class EmbeddingModel:
         if not texts:
             return []
 
+        import numpy as np
+
         model = self.get_model()
 
         # Call encode with a minimal set of kwargs to support test doubles
@@ -0,0 +1,21 @@
+from typing import Dict, Hashable, List, Sequence, Tuple
+
+
+def reciprocal_rank_fusion(
+    rankings: Sequence[Sequence[Hashable]],
+    k: int = 60,
+) -> List[Tuple[Hashable, float]]:
+    """
+    Fuse several ranked lists with reciprocal-rank fusion.
+
+    Each item scores ``sum(1 / (k + rank))`` over the lists it appears in (ranks
+    are 1-based). Only ranks are used, so legs with incomparable scores such as
+    L2 distance and BM25 combine without calibration.
+
+    Returns (item, score) pairs, best first. Ties keep first-seen order.
+    """
+    scores: Dict[Hashable, float] = {}
+    for ranking in rankings:
+        for rank, item in enumerate(ranking, start=1):
+            scores[item] = scores.get(item, 0.0) + 1.0 / (k + rank)
+    return sorted(scores.items(), key=lambda pair: pair[1], reverse=True)
@@ -0,0 +1,233 @@
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from threading import Lock
+from typing import Dict, Iterator, List, Sequence, Tuple
+
+# Stage latencies range from sub-millisecond chunking to multi-minute embedding runs.
+DEFAULT_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0)
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if not float(value).is_integer() else str(int(value))
+
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> None:
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = Lock()
+
+    def _key(self, labels: Dict[str, str]) -> Tuple[str, ...]:
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+        lines.extend(self._samples())
+        return lines
+
+    def _samples(self) -> List[str]:
+        raise NotImplementedError
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> None:
+        super().__init__(name, documentation, labelnames)
+        self._values: Dict[Tuple[str, ...], float] = {}
+
+    def inc(self, amount: float = 1.0, **labels: str) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def value(self, **labels: str) -> float:
+        return self._values.get(self._key(labels), 0.0)
+
+    def _samples(self) -> List[str]:
+        with self._lock:
+            items = list(self._values.items())
+        return [f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(v)}" for key, v in items]
+
+
+class Gauge(_Metric):
+    kind = "gauge"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> None:
+        super().__init__(name, documentation, labelnames)
+        self._values: Dict[Tuple[str, ...], float] = {}
+
+    def set(self, value: float, **labels: str) -> None:
+        with self._lock:
+            self._values[self._key(labels)] = float(value)
+
+    def inc(self, amount: float = 1.0, **labels: str) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def dec(self, amount: float = 1.0, **labels: str) -> None:
+        self.inc(-amount, **labels)
+
+    def value(self, **labels: str) -> float:
+        return self._values.get(self._key(labels), 0.0)
+
+    def _samples(self) -> List[str]:
+        with self._lock:
+            items = list(self._values.items())
+        return [f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(v)}" for key, v in items]
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = DEFAULT_BUCKETS,
+    ) -> None:
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # Per label set: [per-bucket counts..., +Inf count], sum
+        self._values: Dict[Tuple[str, ...], Tuple[List[int], List[float]]] = {}
+
+    def observe(self, value: float, **labels: str) -> None:
+        key = self._key(labels)
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            counts, total = self._values.setdefault(key, ([0] * (len(self.buckets) + 1), [0.0]))
+            counts[index] += 1
+            total[0] += value
+
+    def count(self, **labels: str) -> int:
+        entry = self._values.get(self._key(labels))
+        return sum(entry[0]) if entry else 0
+
+    def _samples(self) -> List[str]:
+        with self._lock:
+            items = [(key, list(counts), total[0]) for key, (counts, total) in self._values.items()]
+
+        lines = []
+        for key, counts, total in items:
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += count
+                labels = _format_labels(self.labelnames, key, f'le="{_format_value(bound)}"')
+                lines.append(f"{self.name}_bucket{labels} {cumulative}")
+            labels = _format_labels(self.labelnames, key)
+            lines.append(f"{self.name}_sum{labels} {_format_value(total)}")
+            lines.append(f"{self.name}_count{labels} {cumulative}")
+        return lines
+
+
+class MetricsRegistry:
+    def __init__(self) -> None:
+        self._metrics: Dict[str, _Metric] = {}
+
+    def register(self, metric: _Metric) -> _Metric:
+        self._metrics[metric.name] = metric
+        return metric
+
+    def render(self) -> str:
+        """Return every metric in the Prometheus text exposition format (0.0.4)."""
+        lines: List[str] = []
+        for metric in self._metrics.values():
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = MetricsRegistry()
+
+INGEST_STAGE_SECONDS = REGISTRY.register(
+    Histogram("ingest_stage_seconds", "Time spent in each ingestion pipeline stage.", ["stage"])
+)
+INGEST_REQUESTS = REGISTRY.register(Counter("ingest_requests_total", "Ingest requests by outcome.", ["status"]))
+INGEST_BYTES = REGISTRY.register(Counter("ingest_bytes_total", "Uploaded bytes accepted for ingestion."))
+INGEST_PAGES = REGISTRY.register(Counter("ingest_pages_total", "PDF pages parsed."))
+INGEST_CHUNKS = REGISTRY.register(Counter("ingest_chunks_total", "Chunks produced by the chunker."))
+INGEST_VECTORS = REGISTRY.register(Counter("ingest_vectors_total", "Vectors added to the vector store."))
+INGEST_NEAR_DUPLICATES = REGISTRY.register(
+    Counter("ingest_near_duplicate_chunks_total", "Chunks that reused a near-duplicate's vector instead of embedding.")
+)
+INGEST_IN_PROGRESS = REGISTRY.register(Gauge("ingest_in_progress", "Admitted ingest requests currently being processed."))
+INGEST_QUEUED = REGISTRY.register(Gauge("ingest_queued", "Ingest requests waiting for admission."))
+INGEST_IN_FLIGHT_COST = REGISTRY.register(
+    Gauge("ingest_in_flight_cost_bytes", "Estimated peak memory of admitted ingest requests.")
+)
+INGEST_MEMORY_BUDGET = REGISTRY.register(
+    Gauge("ingest_memory_budget_bytes", "Memory budget admission control allows in flight.")
+)
+VECTOR_INDEX_SIZE = REGISTRY.register(Gauge("vector_index_size", "Live vectors searchable in the vector store."))
+VECTOR_INDEX_RETIRED = REGISTRY.register(
+    Gauge("vector_index_retired", "Superseded vectors still held by the vector store until compaction.")
+)
+COLLECTIONS_LOADED = REGISTRY.register(Gauge("collections_loaded", "Collections currently loaded in memory."))
+COLLECTIONS_MEMORY = REGISTRY.register(
+    Gauge("collections_memory_bytes", "Estimated memory held by loaded collections.")
+)
+COLLECTIONS_MEMORY_BUDGET = REGISTRY.register(
+    Gauge("collections_memory_budget_bytes", "Memory loaded collections are evicted to stay within.")
+)
+COLLECTION_LOADS = REGISTRY.register(Counter("collection_loads_total", "Collections opened from disk."))
+COLLECTION_EVICTIONS = REGISTRY.register(
+    Counter("collection_evictions_total", "Collections closed to stay within the memory budget or count limit.")
+)
+EMBEDDING_MODEL_LOADED = REGISTRY.register(
+    Gauge("embedding_model_loaded", "1 once the embedding model weights are loaded, else 0.")
+)
+SEARCH_CACHE_REQUESTS = REGISTRY.register(
+    Counter("search_cache_requests_total", "Search cache lookups by cache and result.", ["cache", "result"])
+)
+SEARCH_CACHE_HIT_RATIO = REGISTRY.register(
+    Gauge("search_cache_hit_ratio", "Fraction of lookups served from each search cache since start.", ["cache"])
+)
+SEARCH_CACHE_ENTRIES = REGISTRY.register(Gauge("search_cache_entries", "Entries held by each search cache.", ["cache"]))
+SEARCH_CACHE_BYTES = REGISTRY.register(
+    Gauge("search_cache_bytes", "Approximate memory held by each search cache.", ["cache"])
+)
+
+
+class StageTimer:
+    """
+    Time named pipeline stages into INGEST_STAGE_SECONDS.
+
+    Durations are also kept on the instance so a request can report its own
+    breakdown (see `server_timing`).
+    """
+
+    def __init__(self, histogram: Histogram = INGEST_STAGE_SECONDS) -> None:
+        self.histogram = histogram
+        self.durations: Dict[str, float] = {}
+
+    @contextmanager
+    def stage(self, name: str) -> Iterator[None]:
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - started
+            self.durations[name] = self.durations.get(name, 0.0) + elapsed
+            self.histogram.observe(elapsed, stage=name)
+
+    def server_timing(self) -> str:
+        """Format durations as a `Server-Timing` header value (milliseconds)."""
+        return ", ".join(f"{name};dur={seconds * 1000:.3f}" for name, seconds in self.durations.items())
@@ -0,0 +1,199 @@
+import re
+from collections import OrderedDict
+from hashlib import blake2b
+from threading import Lock
+from typing import Callable, Dict, List, Optional, Sequence, Set, Tuple
+
+import numpy as np
+
+SIGNATURE_BITS = 64
+SHINGLE_WORDS = 3
+
+_WORD = re.compile(r"\w+")
+
+
+def _token_hash(token: str) -> int:
+    # Stable across processes, unlike hash().
+    return int.from_bytes(blake2b(token.encode("utf-8"), digest_size=8).digest(), "little")
+
+
+def _mix(values: np.ndarray) -> np.ndarray:
+    """splitmix64 finalizer, applied elementwise (uint64 arithmetic wraps)."""
+    values = (values ^ (values >> np.uint64(30))) * np.uint64(0xBF58476D1CE4E5B9)
+    values = (values ^ (values >> np.uint64(27))) * np.uint64(0x94D049BB133111EB)
+    return values ^ (values >> np.uint64(31))
+
+
+def _shingle_hashes(texts: Sequence[str]) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Hash the word 3-shingles of every text in one pass.
+
+    Returns the concatenated shingle hashes and each text's start offset into them.
+    Texts with fewer than three words use their words (or the raw text) instead.
+    """
+    per_text = [_WORD.findall(text.lower()) or [text] for text in texts]
+    words = [word for text_words in per_text for word in text_words]
+    vocabulary: Dict[str, int] = {word: _token_hash(word) for word in set(words)}
+
+    lengths = np.array([len(text_words) for text_words in per_text])
+    tokens = np.fromiter(map(vocabulary.__getitem__, words), dtype=np.uint64, count=len(words))
+    token_starts = np.concatenate(([0], np.cumsum(lengths)[:-1]))
+
+    # A shingle starting at token i of a text is valid while i + 3 <= text length.
+    shingles = _mix(tokens[:-2] * np.uint64(3) ^ _mix(tokens[1:-1]) * np.uint64(5) ^ _mix(tokens[2:] ^ np.uint64(7)))
+    position = np.arange(len(tokens) - 2) - np.repeat(token_starts, lengths)[:-2]
+    valid = position + SHINGLE_WORDS <= np.repeat(lengths, lengths)[:-2]
+    counts = np.maximum(lengths - SHINGLE_WORDS + 1, 0)
+
+    short = lengths < SHINGLE_WORDS
+    if short.any():
+        # Short texts contribute their token hashes as the features.
+        parts, offsets, total = [], [], 0
+        selected = np.split(shingles[valid], np.cumsum(counts)[:-1])
+        for index, hashes in enumerate(selected):
+            if short[index]:
+                hashes = tokens[token_starts[index] : token_starts[index] + lengths[index]]
+            parts.append(hashes)
+            offsets.append(total)
+            total += len(hashes)
+        return np.concatenate(parts), np.array(offsets)
+
+    return shingles[valid], np.concatenate(([0], np.cumsum(counts)[:-1]))
+
+
+def simhash_signatures(texts: Sequence[str]) -> List[int]:
+    """
+    Return a 64-bit SimHash of each text over lower-cased word 3-shingles.
+
+    Texts that differ in a few tokens (a date, a page number) get signatures a
+    few bits apart. Words are hashed once per batch; shingle hashing and bit
+    voting are vectorized over the whole batch.
+    """
+    if not texts:
+        return []
+    hashes, offsets = _shingle_hashes(texts)
+    counts = np.diff(np.append(offsets, len(hashes)))
+
+    # Bit b of the signature is set when most features have bit b set.
+    bits = np.unpackbits(hashes.astype("<u8").view(np.uint8).reshape(-1, 8), axis=1, bitorder="little")
+    ones = np.add.reduceat(bits, offsets, axis=0, dtype=np.int32)
+    majority = ones * 2 > counts[:, None]
+    packed = np.packbits(majority, axis=1, bitorder="little").view("<u8").ravel()
+    return [int(signature) for signature in packed]
+
+
+class NearDuplicateIndex:
+    """
+    Bounded LSH index from SimHash signatures to values (e.g. chunk embeddings).
+
+    `threshold` is the minimum similarity, as the fraction of equal signature
+    bits, for two texts to count as near-duplicates. The signature is split into
+    one band more than the allowed Hamming distance, so any match within that
+    distance shares at least one band exactly and lookups only compare a bucket
+    of candidates. The least recently matched entries are evicted beyond
+    `capacity`.
+    """
+
+    def __init__(self, threshold: float, capacity: int = 10000) -> None:
+        if not 0.0 < threshold <= 1.0:
+            raise ValueError("threshold must be in (0, 1]")
+        self.threshold = threshold
+        self.capacity = capacity
+        self.max_distance = int((1.0 - threshold) * SIGNATURE_BITS)
+
+        bands = min(self.max_distance + 1, SIGNATURE_BITS)
+        width, extra = divmod(SIGNATURE_BITS, bands)
+        self._bands: List[Tuple[int, int]] = []
+        shift = 0
+        for band in range(bands):
+            bits = width + (1 if band < extra else 0)
+            self._bands.append((shift, (1 << bits) - 1))
+            shift += bits
+
+        self._entries: "OrderedDict[int, Tuple[int, object]]" = OrderedDict()
+        self._buckets: List[Dict[int, Set[int]]] = [{} for _ in self._bands]
+        self._next_key = 0
+        self._lock = Lock()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def _band_keys(self, signature: int) -> List[int]:
+        return [(signature >> shift) & mask for shift, mask in self._bands]
+
+    def lookup(self, signature: int) -> Optional[object]:
+        """Return the value of the closest entry within the threshold, or None."""
+        with self._lock:
+            best_key, best_distance = None, self.max_distance + 1
+            for buckets, band_key in zip(self._buckets, self._band_keys(signature)):
+                for key in buckets.get(band_key, ()):
+                    distance = (self._entries[key][0] ^ signature).bit_count()
+                    if distance < best_distance:
+                        best_key, best_distance = key, distance
+            if best_key is None:
+                return None
+            self._entries.move_to_end(best_key)
+            return self._entries[best_key][1]
+
+    def add(self, signature: int, value: object) -> None:
+        with self._lock:
+            key = self._next_key
+            self._next_key += 1
+            self._entries[key] = (signature, value)
+            for buckets, band_key in zip(self._buckets, self._band_keys(signature)):
+                buckets.setdefault(band_key, set()).add(key)
+            while len(self._entries) > self.capacity:
+                self._evict()
+
+    def _evict(self) -> None:
+        key, (signature, _) = self._entries.popitem(last=False)
+        for buckets, band_key in zip(self._buckets, self._band_keys(signature)):
+            bucket = buckets[band_key]
+            bucket.discard(key)
+            if not bucket:
+                del buckets[band_key]
+
+
+def embed_skipping_near_duplicates(
+    texts: Sequence[str],
+    embed: Callable[[List[str]], List[List[float]]],
+    index: NearDuplicateIndex,
+) -> Tuple[List[List[float]], int]:
+    """
+    Embed `texts`, reusing the vector of an earlier near-duplicate where one exists.
+
+    Earlier means either already in `index` or earlier in this batch. Newly
+    embedded texts are added to `index`.
+
+    Returns:
+        One embedding per text, and the number of texts that were not embedded
+    """
+    signatures = simhash_signatures(texts)
+    embeddings: List[Optional[List[float]]] = [None] * len(texts)
+    batch = NearDuplicateIndex(index.threshold, capacity=max(len(texts), 1))
+    aliases: List[Tuple[int, int]] = []
+    to_embed: List[int] = []
+
+    for position, signature in enumerate(signatures):
+        reused = index.lookup(signature)
+        if reused is not None:
+            embeddings[position] = reused
+            continue
+        original = batch.lookup(signature)
+        if original is not None:
+            aliases.append((position, original))
+            continue
+        batch.add(signature, position)
+        to_embed.append(position)
+
+    if to_embed:
+        vectors = embed([texts[p] for p in to_embed])
+        if len(vectors) != len(to_embed):
+            raise ValueError("Embedding count mismatch")
+        for position, vector in zip(to_embed, vectors):
+            embeddings[position] = vector
+            index.add(signatures[position], vector)
+    for position, original in aliases:
+        embeddings[position] = embeddings[original]
+
+    return embeddings, len(texts) - len(to_embed)
@@ -0,0 +1,188 @@
+import asyncio
+import cProfile
+import hmac
+import io
+import json
+import logging
+import os
+import pstats
+import random
+import re
+import time
+import tracemalloc
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from threading import Lock
+from typing import Awaitable, Callable, Dict, Iterator, List, Mapping, Optional, Tuple, TypeVar
+from uuid import uuid4
+
+logger = logging.getLogger(__name__)
+
+PROFILE_HEADER = "X-Profile"
+ADMIN_TOKEN_HEADER = "X-Admin-Token"
+
+_PROFILE_ID = re.compile(r"^[0-9a-f]{32}$")
+
+T = TypeVar("T")
+
+
+def is_admin(headers: Mapping[str, str], admin_token: str) -> bool:
+    """True when `headers` carry the configured admin token; always False if none is configured."""
+    supplied = headers.get(ADMIN_TOKEN_HEADER, "")
+    return bool(admin_token) and hmac.compare_digest(supplied.encode(), admin_token.encode())
+
+
+class RequestProfiler:
+    """
+    Opt-in cProfile + tracemalloc capture of individual requests.
+
+    A request is profiled when an admin sends `X-Profile: 1`, or at random with
+    probability `sample_rate`. Only one request is profiled at a time per process:
+    others arriving meanwhile run unprofiled, which bounds the overhead even at
+    high traffic. Each capture stores `<id>.prof` (pstats) and `<id>.json` (timings,
+    memory, top functions and allocation sites) under `profile_dir`; only the
+    newest `max_profiles` are kept.
+
+    cProfile only sees the thread it runs on, so `profile_async` runs a request
+    on its own event loop in a worker thread: the function profile holds that
+    request alone. tracemalloc cannot be scoped that way; memory figures are
+    process-wide over the capture and include whatever else ran meanwhile.
+    """
+
+    def __init__(
+        self,
+        profile_dir: str,
+        sample_rate: float = 0.0,
+        admin_token: str = "",
+        max_profiles: int = 50,
+        top_n: int = 25,
+    ) -> None:
+        self.profile_dir = profile_dir
+        self.sample_rate = sample_rate
+        self.admin_token = admin_token
+        self.max_profiles = max_profiles
+        self.top_n = top_n
+        self._active = Lock()
+
+    def should_profile(self, headers: Mapping[str, str]) -> bool:
+        if headers.get(PROFILE_HEADER) == "1" and is_admin(headers, self.admin_token):
+            return True
+        return self.sample_rate > 0 and random.random() < self.sample_rate
+
+    @contextmanager
+    def profile(self, label: str, metadata: Optional[Dict[str, object]] = None) -> Iterator[Optional[str]]:
+        """
+        Profile the enclosed block on the calling thread; yields the profile id,
+        or None if another capture is running.
+        """
+        if not self._active.acquire(blocking=False):
+            yield None
+            return
+
+        profile_id = uuid4().hex
+        profiler = cProfile.Profile()
+        tracing = not tracemalloc.is_tracing()
+        try:
+            if tracing:
+                tracemalloc.start(10)
+            before = tracemalloc.take_snapshot()
+            baseline, _ = tracemalloc.get_traced_memory()
+            tracemalloc.reset_peak()
+            started = time.perf_counter()
+            profiler.enable()
+            try:
+                yield profile_id
+            finally:
+                profiler.disable()
+                elapsed = time.perf_counter() - started
+                current, peak = tracemalloc.get_traced_memory()
+                after = tracemalloc.take_snapshot()
+                if tracing:
+                    tracemalloc.stop()
+                memory = {"peak_memory_bytes": peak - baseline, "retained_memory_bytes": current - baseline}
+                try:
+                    self._save(profile_id, label, metadata or {}, profiler, elapsed, memory, after.compare_to(before, "lineno"))
+                except Exception:
+                    logger.exception("Failed to save request profile", extra={"profile_id": profile_id})
+        finally:
+            self._active.release()
+
+    async def profile_async(
+        self, label: str, metadata: Optional[Dict[str, object]], function: Callable[[], Awaitable[T]]
+    ) -> Tuple[T, Optional[str]]:
+        """
+        Await `function()` on a fresh event loop in a worker thread, profiled.
+
+        Returns:
+            Its result and the profile id (None if another capture was running;
+            the call still runs, unprofiled)
+        """
+
+        def run() -> Tuple[T, Optional[str]]:
+            with self.profile(label, metadata) as profile_id:
+                return asyncio.run(function()), profile_id
+
+        return await asyncio.to_thread(run)
+
+    def _save(self, profile_id, label, metadata, profiler, elapsed, memory, allocation_diff) -> None:
+        os.makedirs(self.profile_dir, exist_ok=True)
+        profiler.dump_stats(os.path.join(self.profile_dir, f"{profile_id}.prof"))
+
+        stats_text = io.StringIO()
+        pstats.Stats(profiler, stream=stats_text).sort_stats("cumulative").print_stats(self.top_n)
+
+        allocations = [
+            {"location": str(stat.traceback[0]), "size_bytes": stat.size_diff, "count": stat.count_diff}
+            for stat in allocation_diff[: self.top_n]
+        ]
+
+        report = {
+            "profile_id": profile_id,
+            "label": label,
+            "created_at": datetime.now(timezone.utc).isoformat(),
+            "wall_seconds": elapsed,
+            **memory,
+            "metadata": metadata,
+            "top_functions": stats_text.getvalue(),
+            "top_allocations": allocations,
+        }
+        with open(os.path.join(self.profile_dir, f"{profile_id}.json"), "w", encoding="utf-8") as handle:
+            json.dump(report, handle, indent=2, default=str)
+
+        logger.info(
+            "Request profile stored",
+            extra={"profile_id": profile_id, "label": label, **memory, "wall_seconds": elapsed},
+        )
+        self._prune()
+
+    def _prune(self) -> None:
+        reports = sorted(
+            (entry for entry in os.scandir(self.profile_dir) if entry.name.endswith(".json")),
+            key=lambda entry: entry.stat().st_mtime,
+        )
+        for entry in reports[: max(len(reports) - self.max_profiles, 0)]:
+            profile_id = entry.name[: -len(".json")]
+            for path in (entry.path, os.path.join(self.profile_dir, f"{profile_id}.prof")):
+                if os.path.exists(path):
+                    os.remove(path)
+
+    def list_profiles(self) -> List[Dict[str, object]]:
+        if not os.path.isdir(self.profile_dir):
+            return []
+        summaries = []
+        for entry in os.scandir(self.profile_dir):
+            if not entry.name.endswith(".json"):
+                continue
+            with open(entry.path, "r", encoding="utf-8") as handle:
+                report = json.load(handle)
+            summaries.append(
+                {key: report.get(key) for key in ("profile_id", "label", "created_at", "wall_seconds", "peak_memory_bytes")}
+            )
+        return sorted(summaries, key=lambda summary: summary["created_at"], reverse=True)
+
+    def profile_path(self, profile_id: str, suffix: str) -> Optional[str]:
+        """Return the stored file for `profile_id`, or None for unknown or malformed ids."""
+        if not _PROFILE_ID.match(profile_id):
+            return None
+        path = os.path.join(self.profile_dir, f"{profile_id}{suffix}")
+        return path if os.path.exists(path) else None
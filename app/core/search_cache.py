@@ -0,0 +1,83 @@
+import sys
+from array import array
+from collections import OrderedDict
+from hashlib import blake2b
+from threading import Lock
+from typing import Dict, Hashable, List, Optional, Sequence, Tuple
+
+
+class LRUCache:
+    """
+    Thread-safe LRU map bounded by entry count, with hit/miss and memory accounting.
+
+    Entries can be tied to a `generation` (e.g. `search_generation()` of the
+    vector store): a lookup or store under a newer generation drops every entry
+    at once, so invalidation costs one comparison instead of a scan. Sizes are
+    supplied by the caller and only approximate the memory held.
+    """
+
+    def __init__(self, capacity: int) -> None:
+        if capacity < 1:
+            raise ValueError("capacity must be >= 1")
+        self.capacity = capacity
+        self.hits = 0
+        self.misses = 0
+        self.size_bytes = 0
+        self._generation = 0
+        self._entries: "OrderedDict[Hashable, Tuple[object, int]]" = OrderedDict()
+        self._lock = Lock()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def _advance(self, generation: int) -> None:
+        if generation != self._generation:
+            self._entries.clear()
+            self.size_bytes = 0
+            self._generation = generation
+
+    def get(self, key: Hashable, generation: int = 0) -> Optional[object]:
+        with self._lock:
+            self._advance(generation)
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+
+    def put(self, key: Hashable, value: object, size: int, generation: int = 0) -> None:
+        with self._lock:
+            # Results computed before a newer generation was seen must not replace it.
+            if generation < self._generation:
+                return
+            self._advance(generation)
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self.size_bytes -= previous[1]
+            self._entries[key] = (value, size)
+            self.size_bytes += size
+            while len(self._entries) > self.capacity:
+                _, (_, evicted_size) = self._entries.popitem(last=False)
+                self.size_bytes -= evicted_size
+
+    def hit_ratio(self) -> float:
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+
+def query_vector(values: Sequence[float]) -> array:
+    """Store a query embedding compactly (float32, as the vector store searches it)."""
+    return array("f", values)
+
+
+def vector_key(vector: array) -> bytes:
+    return blake2b(vector.tobytes(), digest_size=16).digest()
+
+
+def hits_size(hits: List[Dict]) -> int:
+    """Approximate bytes held by a list of search hits."""
+    return sys.getsizeof(hits) + sum(
+        sys.getsizeof(hit) + sum(sys.getsizeof(value) for value in hit.values()) for hit in hits
+    )
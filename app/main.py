@@ -1,15 +1,25 @@
+import asyncio
 import logging
 from contextlib import asynccontextmanager
+from functools import partial
 from pathlib import Path
 import os
+from typing import Optional
 
 from fastapi import FastAPI
 
+from app.core.admission import AdmissionController
 from app.core.config import get_settings, configure_logging
+from app.core.profiling import RequestProfiler
+from app.core.search_cache import LRUCache
+from app.api.admin import router as admin_router
+from app.api.collections import router as collections_router
 from app.api.ingest import router as ingest_router
+from app.api.metrics import router as metrics_router
+from app.api.search import router as search_router
+from app.core.document_loader import configure_pdf_backend
 from app.core.embedding_model import load_embedding_model
-from app.storage.vector_store import FaissVectorStore
-from app.storage.metadata_store import SQLiteMetadataStore
+from app.storage.collections import CollectionRegistry
 from dotenv import load_dotenv
 load_dotenv()
 
@@ -21,6 +31,57 @@ configure_logging(settings.LOG_LEVEL)
 logger = logging.getLogger(__name__)
 
 
+def _open_vector_store(index_path: str, runtime_settings, num_shards: Optional[int] = None):
+    # Imported on first use: faiss and numpy dominate import time otherwise.
+    from app.storage.sharded_vector_store import open_vector_store
+
+    return open_vector_store(
+        index_path=index_path,
+        num_shards=runtime_settings.VECTOR_STORE_SHARDS if num_shards is None else num_shards,
+        mmap=runtime_settings.FAISS_MMAP,
+        index_type=runtime_settings.FAISS_INDEX_TYPE,
+        rerank_factor=runtime_settings.FAISS_RERANK_FACTOR,
+        train_size=runtime_settings.FAISS_TRAIN_SIZE,
+        compact_ratio=runtime_settings.FAISS_COMPACT_RATIO,
+    )
+
+
+def _open_metadata_store(db_path: str, runtime_settings):
+    from app.storage.metadata_store import SQLiteMetadataStore
+
+    return SQLiteMetadataStore(
+        db_path=db_path,
+        storage_mode=runtime_settings.METADATA_STORAGE_MODE,
+        text_compression=runtime_settings.METADATA_TEXT_COMPRESSION,
+    )
+
+
+def _open_collection_stores(directory: str, runtime_settings):
+    # Collections are small and many: one shard each, so no per-collection thread pools.
+    vector_store = _open_vector_store(os.path.join(directory, "faiss.index"), runtime_settings, num_shards=1)
+    try:
+        return vector_store, _open_metadata_store(os.path.join(directory, "metadata.db"), runtime_settings)
+    except Exception:
+        vector_store.close()
+        raise
+
+
+async def _open_stores(faiss_index_path: str, sqlite_db_path: str, runtime_settings):
+    """Open the vector and metadata stores concurrently, off the event loop."""
+    stores = await asyncio.gather(
+        asyncio.to_thread(_open_vector_store, faiss_index_path, runtime_settings),
+        asyncio.to_thread(_open_metadata_store, sqlite_db_path, runtime_settings),
+        return_exceptions=True,
+    )
+    failures = [store for store in stores if isinstance(store, BaseException)]
+    if failures:
+        for store in stores:
+            if not isinstance(store, BaseException):
+                store.close()
+        raise failures[0]
+    return stores
+
+
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     """Manage application lifecycle."""
@@ -40,32 +101,94 @@ async def lifespan(app: FastAPI):
     else:
         app.state.embedding_model = None
 
+    data_dir = Path(os.environ.get("DATA_DIR", "data"))
+    runtime_settings = get_settings()
+    # Profiles are only written when a request is sampled or an admin asks for one.
+    app.state.profiler = RequestProfiler(
+        profile_dir=str(data_dir / "profiles"),
+        sample_rate=runtime_settings.PROFILING_SAMPLE_RATE,
+        admin_token=runtime_settings.ADMIN_TOKEN,
+        max_profiles=runtime_settings.PROFILING_MAX_STORED,
+    )
+
+    # "auto" extracts PDFs with the fastest installed library (pypdfium2, PyMuPDF, then pypdf).
+    pdf_backend = configure_pdf_backend(runtime_settings.PDF_BACKEND)
+    logger.info("PDF backend selected", extra={"pdf_backend": pdf_backend})
+
+    # "content_defined" keeps chunk boundaries stable across document versions. The
+    # strategy is recorded per document; PUT re-chunks with the one stored.
+    app.state.chunking_strategy = runtime_settings.CHUNKING_STRATEGY
+    # Near-duplicate chunks reuse a recent chunk's vector instead of being embedded (0 disables).
+    app.state.near_duplicate_index = None
+    if runtime_settings.NEAR_DUP_THRESHOLD > 0:
+        from app.core.near_duplicates import NearDuplicateIndex
+
+        app.state.near_duplicate_index = NearDuplicateIndex(
+            runtime_settings.NEAR_DUP_THRESHOLD, capacity=runtime_settings.NEAR_DUP_CACHE_SIZE
+        )
+
+    # Uploads are admitted against a concurrency limit and an estimated memory budget (0 disables).
+    app.state.admission_controller = (
+        AdmissionController(
+            max_concurrent=runtime_settings.INGEST_MAX_CONCURRENT,
+            memory_budget=runtime_settings.INGEST_MEMORY_BUDGET_MB * 2**20,
+            queue_timeout=runtime_settings.INGEST_QUEUE_TIMEOUT,
+            max_queued=runtime_settings.INGEST_MAX_QUEUED,
+            cost_factors=runtime_settings.INGEST_COST_FACTORS,
+        )
+        if runtime_settings.INGEST_MAX_CONCURRENT > 0
+        else None
+    )
+
+    # Repeated queries skip encoding and, until the vector store changes, the index scan (0 disables).
+    app.state.query_embedding_cache = (
+        LRUCache(runtime_settings.QUERY_CACHE_SIZE) if runtime_settings.QUERY_CACHE_SIZE > 0 else None
+    )
+    app.state.search_result_cache = (
+        LRUCache(runtime_settings.SEARCH_RESULT_CACHE_SIZE) if runtime_settings.SEARCH_RESULT_CACHE_SIZE > 0 else None
+    )
+
     if os.environ.get("DISABLE_STORAGE") != "1":
-        data_dir = Path(os.environ.get("DATA_DIR", "data"))
         data_dir.mkdir(parents=True, exist_ok=True)
         faiss_index_path = os.environ.get("FAISS_INDEX_PATH", str(data_dir / "faiss.index"))
         sqlite_db_path = os.environ.get("SQLITE_DB_PATH", str(data_dir / "metadata.db"))
 
         try:
-            app.state.vector_store = FaissVectorStore(index_path=faiss_index_path)
-            app.state.metadata_store = SQLiteMetadataStore(db_path=sqlite_db_path)
+            app.state.vector_store, app.state.metadata_store = await _open_stores(
+                faiss_index_path, sqlite_db_path, runtime_settings
+            )
         except Exception:
             logger.warning("Storage initialization skipped", exc_info=True)
             app.state.vector_store = None
             app.state.metadata_store = None
+
+        # Named collections live in their own directories, loaded on first use and
+        # evicted least recently used to stay within the memory budget.
+        app.state.collections = CollectionRegistry(
+            root_dir=str(data_dir / "collections"),
+            open_stores=partial(_open_collection_stores, runtime_settings=runtime_settings),
+            memory_budget=runtime_settings.COLLECTIONS_MEMORY_BUDGET_MB * 2**20,
+            max_loaded=runtime_settings.COLLECTIONS_MAX_LOADED,
+            result_cache_size=runtime_settings.COLLECTION_RESULT_CACHE_SIZE,
+        )
     else:
         app.state.vector_store = None
         app.state.metadata_store = None
+        app.state.collections = None
 
     yield
 
     # Persist/close stores on shutdown
     try:
-        if getattr(app.state, "vector_store", None) is not None:
-            app.state.vector_store.close()
+        if getattr(app.state, "collections", None) is not None:
+            app.state.collections.close()
     finally:
-        if getattr(app.state, "metadata_store", None) is not None:
-            app.state.metadata_store.close()
+        try:
+            if getattr(app.state, "vector_store", None) is not None:
+                app.state.vector_store.close()
+        finally:
+            if getattr(app.state, "metadata_store", None) is not None:
+                app.state.metadata_store.close()
 
     # Shutdown
     logger.info(f"Shutting down {settings.SERVICE_NAME}")
@@ -81,6 +204,10 @@ app = FastAPI(
 
 # Register API routers
 app.include_router(ingest_router)
+app.include_router(search_router)
+app.include_router(collections_router)
+app.include_router(metrics_router)
+app.include_router(admin_router)
 
 
 @app.get("/health")
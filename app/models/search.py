@@ -0,0 +1,22 @@
+from typing import List, Literal, Optional
+
+from pydantic import BaseModel, Field
+
+
+class SearchFilters(BaseModel):
+    """Document-level restrictions applied inside the vector search."""
+
+    filename: Optional[str] = Field(default=None, description="GLOB pattern, e.g. 'report-*.pdf'")
+    uploaded_after: Optional[str] = Field(default=None, description="Inclusive ISO-8601 lower bound")
+    uploaded_before: Optional[str] = Field(default=None, description="Exclusive ISO-8601 upper bound")
+    document_ids: Optional[List[str]] = None
+
+    def is_empty(self) -> bool:
+        return all(value is None for value in self.model_dump().values())
+
+
+class SearchRequest(BaseModel):
+    query: str = Field(min_length=1)
+    k: int = Field(default=5, ge=1, le=100)
+    mode: Literal["dense", "lexical", "hybrid"] = "dense"
+    filters: Optional[SearchFilters] = None
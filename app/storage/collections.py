@@ -0,0 +1,247 @@
+import logging
+import os
+import re
+import shutil
+import time
+from collections import OrderedDict
+from concurrent.futures import Future
+from threading import Lock
+from typing import Callable, Dict, List, Optional, Tuple
+
+from app.core.metrics import COLLECTION_EVICTIONS, COLLECTION_LOADS
+from app.core.search_cache import LRUCache
+
+logger = logging.getLogger(__name__)
+
+# Collection names become directory names: no separators, dots or leading dashes.
+COLLECTION_NAME_PATTERN = re.compile(r"^[A-Za-z0-9][A-Za-z0-9_-]{0,63}$")
+
+# SQLite's default page cache per connection (cache_size = -2000 KiB).
+METADATA_STORE_BYTES = 2 * 2**20
+
+
+def validate_collection_name(name: str) -> str:
+    """
+    Raises:
+        ValueError: If `name` cannot be used as a collection (directory) name
+    """
+    if not COLLECTION_NAME_PATTERN.match(name):
+        raise ValueError("Collection names are 1-64 letters, digits, '-' or '_' and start with a letter or digit")
+    return name
+
+
+class CollectionNotFound(KeyError):
+    """Raised when a collection is used before anything was ingested into it."""
+
+
+class Collection:
+    """The stores (and search result cache) of one loaded collection."""
+
+    def __init__(self, name: str, vector_store, metadata_store, result_cache: Optional[LRUCache] = None) -> None:
+        self.name = name
+        self.vector_store = vector_store
+        self.metadata_store = metadata_store
+        self.result_cache = result_cache
+        self.users = 0
+        self.memory_bytes = 0
+
+    def estimate_memory(self) -> int:
+        """Approximate private memory held: vector codes and mapping, SQLite cache, cached results."""
+        cache_bytes = self.result_cache.size_bytes if self.result_cache is not None else 0
+        return self.vector_store.memory_bytes() + METADATA_STORE_BYTES + cache_bytes
+
+    def close(self) -> None:
+        try:
+            self.vector_store.close()
+        finally:
+            self.metadata_store.close()
+
+
+class CollectionRegistry:
+    """
+    Named collections, each with its own vector index and metadata database
+    under `root_dir/<name>/`, loaded on first use and evicted least recently used.
+
+    Loaded collections are kept within `memory_budget` bytes (by
+    `Collection.estimate_memory`, refreshed whenever a user releases one) and
+    `max_loaded` entries. Collections in use are never evicted, so the budget can
+    be exceeded while more of them are busy than fit; the excess is evicted as
+    they are released. Evicting closes (and so persists) the stores; the next use
+    reopens them from disk.
+
+    `open_stores(directory)` returns a `(vector_store, metadata_store)` pair.
+    Opening and closing stores happen outside the registry lock, so a slow load
+    only holds up users of that collection. A collection being loaded or closed
+    has a pending future that other users of the name wait on, so it is never
+    open twice in this process. Both calls block; async code should run them in
+    a worker thread.
+    """
+
+    def __init__(
+        self,
+        root_dir: str,
+        open_stores: Callable[[str], Tuple[object, object]],
+        memory_budget: int,
+        max_loaded: int = 128,
+        result_cache_size: int = 0,
+    ) -> None:
+        if memory_budget < 1:
+            raise ValueError("memory_budget must be >= 1")
+        if max_loaded < 1:
+            raise ValueError("max_loaded must be >= 1")
+        self.root_dir = root_dir
+        self.memory_budget = memory_budget
+        self.max_loaded = max_loaded
+        self.result_cache_size = result_cache_size
+        self.loads = 0
+        self.evictions = 0
+        self._open_stores = open_stores
+        self._loaded: "OrderedDict[str, Collection]" = OrderedDict()
+        # Names being loaded or closed; resolved once the transition is over.
+        self._pending: Dict[str, Future] = {}
+        self._lock = Lock()
+
+    def directory(self, name: str) -> str:
+        return os.path.join(self.root_dir, validate_collection_name(name))
+
+    def exists(self, name: str) -> bool:
+        return os.path.isdir(self.directory(name))
+
+    def names(self) -> List[str]:
+        if not os.path.isdir(self.root_dir):
+            return []
+        return sorted(
+            entry.name
+            for entry in os.scandir(self.root_dir)
+            if entry.is_dir() and COLLECTION_NAME_PATTERN.match(entry.name)
+        )
+
+    @property
+    def loaded(self) -> Dict[str, int]:
+        """Estimated memory of each loaded collection, least recently used first."""
+        with self._lock:
+            return {name: collection.memory_bytes for name, collection in self._loaded.items()}
+
+    @property
+    def memory_bytes(self) -> int:
+        with self._lock:
+            return sum(collection.memory_bytes for collection in self._loaded.values())
+
+    def acquire(self, name: str, create: bool = False) -> Collection:
+        """
+        Return the loaded collection `name`, opening it if needed, and pin it
+        until `release`.
+
+        Raises:
+            ValueError: If `name` is not a valid collection name
+            CollectionNotFound: If the collection does not exist and `create` is False
+        """
+        directory = self.directory(name)
+        while True:
+            with self._lock:
+                collection = self._loaded.get(name)
+                if collection is not None:
+                    self._loaded.move_to_end(name)
+                    collection.users += 1
+                    evicted = self._evict_locked()
+                    break
+                pending = self._pending.get(name)
+                if pending is None:
+                    created = not os.path.isdir(directory)
+                    if created and not create:
+                        raise CollectionNotFound(name)
+                    loading = self._pending[name] = Future()
+            if pending is not None:
+                # Loaded or closed by another thread: wait, then look again.
+                pending.result()
+                continue
+
+            try:
+                if created:
+                    os.makedirs(directory, exist_ok=True)
+                collection = self._load(name, directory)
+            except BaseException as exc:
+                if created:
+                    # An empty directory would pass for an existing collection.
+                    shutil.rmtree(directory, ignore_errors=True)
+                with self._lock:
+                    del self._pending[name]
+                loading.set_exception(exc)
+                raise
+            with self._lock:
+                del self._pending[name]
+                self._loaded[name] = collection
+                collection.users += 1
+                evicted = self._evict_locked()
+            loading.set_result(None)
+            break
+
+        self._close(evicted)
+        return collection
+
+    def release(self, collection: Collection) -> None:
+        """Unpin a collection from `acquire`, re-estimate its memory and evict over budget."""
+        memory_bytes = collection.estimate_memory()
+        with self._lock:
+            collection.users -= 1
+            collection.memory_bytes = memory_bytes
+            evicted = self._evict_locked()
+        self._close(evicted)
+
+    def _load(self, name: str, directory: str) -> Collection:
+        started = time.perf_counter()
+        vector_store, metadata_store = self._open_stores(directory)
+        result_cache = LRUCache(self.result_cache_size) if self.result_cache_size > 0 else None
+        collection = Collection(name, vector_store, metadata_store, result_cache)
+        collection.memory_bytes = collection.estimate_memory()
+        with self._lock:
+            self.loads += 1
+        COLLECTION_LOADS.inc()
+        logger.info(
+            "Collection loaded",
+            extra={
+                "collection": name,
+                "memory_bytes": collection.memory_bytes,
+                "load_ms": round((time.perf_counter() - started) * 1000, 3),
+            },
+        )
+        return collection
+
+    def _evict_locked(self) -> List[Tuple[Collection, Future]]:
+        """Unlist idle collections until within budget; returns them for `_close`."""
+        evicted = []
+        total = sum(collection.memory_bytes for collection in self._loaded.values())
+        for name in list(self._loaded):
+            if total <= self.memory_budget and len(self._loaded) <= self.max_loaded:
+                break
+            collection = self._loaded[name]
+            if collection.users > 0:
+                continue
+            del self._loaded[name]
+            total -= collection.memory_bytes
+            self.evictions += 1
+            COLLECTION_EVICTIONS.inc()
+            closing = self._pending[name] = Future()
+            evicted.append((collection, closing))
+        return evicted
+
+    def _close(self, evicted: List[Tuple[Collection, Future]]) -> None:
+        for collection, closing in evicted:
+            try:
+                collection.close()
+            except Exception:
+                logger.exception("Failed to close evicted collection", extra={"collection": collection.name})
+            finally:
+                with self._lock:
+                    del self._pending[collection.name]
+                closing.set_result(None)
+            logger.info(
+                "Collection evicted", extra={"collection": collection.name, "memory_bytes": collection.memory_bytes}
+            )
+
+    def close(self) -> None:
+        with self._lock:
+            collections = list(self._loaded.values())
+            self._loaded.clear()
+        for collection in collections:
+            collection.close()
@@ -0,0 +1,86 @@
+import os
+from threading import RLock, get_ident
+from typing import Callable
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - non-POSIX platforms
+    fcntl = None
+
+
+class FileLock:
+    """
+    Advisory inter-process lock backed by flock(2) on a sidecar lock file.
+
+    Re-entrant within a process: nested acquisitions from the owning thread only
+    take the OS lock once. On platforms without fcntl it degrades to a thread lock.
+
+    flock treats every open file as a separate holder, so a shared lock taken
+    while the same process holds the exclusive one on another fd would wait on
+    itself. Pass that exclusive lock as `within`: while the calling thread holds
+    it, acquiring this lock takes no OS lock at all.
+    """
+
+    def __init__(self, path: str, shared: bool = False, within: "FileLock | None" = None) -> None:
+        self.path = path
+        self.shared = shared
+        self.within = within
+        self._thread_lock = RLock()
+        self._depth = 0
+        self._owner: int | None = None
+        self._fd: int | None = None
+
+    def held_by_current_thread(self) -> bool:
+        return self._depth > 0 and self._owner == get_ident()
+
+    def acquire(self) -> None:
+        self._thread_lock.acquire()
+        covered = self.within is not None and self.within.held_by_current_thread()
+        if self._depth == 0 and fcntl is not None and not covered:
+            fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o644)
+            try:
+                fcntl.flock(fd, fcntl.LOCK_SH if self.shared else fcntl.LOCK_EX)
+            except Exception:
+                os.close(fd)
+                self._thread_lock.release()
+                raise
+            self._fd = fd
+        self._depth += 1
+        self._owner = get_ident()
+
+    def release(self) -> None:
+        self._depth -= 1
+        if self._depth == 0:
+            self._owner = None
+        if self._depth == 0 and self._fd is not None:
+            try:
+                fcntl.flock(self._fd, fcntl.LOCK_UN)
+            finally:
+                os.close(self._fd)
+                self._fd = None
+        self._thread_lock.release()
+
+    def __enter__(self) -> "FileLock":
+        self.acquire()
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.release()
+
+
+def atomic_write(path: str, write: Callable[[str], None]) -> None:
+    """
+    Write `path` via a temporary sibling file and rename it into place.
+
+    `write` receives the temporary path and must fully write it. Readers see either
+    the old or the new file, never a partially written one.
+    """
+    tmp_path = f"{path}.tmp-{os.getpid()}-{get_ident()}"
+    try:
+        write(tmp_path)
+        with open(tmp_path, "rb") as handle:
+            os.fsync(handle.fileno())
+        os.replace(tmp_path, path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
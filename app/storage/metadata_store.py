@@ -1,15 +1,128 @@
+import argparse
 import os
+import re
 import sqlite3
-from typing import Dict, List
+import zlib
+from collections import OrderedDict
+from contextlib import contextmanager
+from threading import RLock
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple, Union
+
+from app.core.chunker import ChunkSpans, chunk_spans
+
+# "inline": every chunk row carries its own text (overlap stored twice).
+# "offsets": each document's text is stored once; chunk rows hold (start, end).
+STORAGE_MODES = ("inline", "offsets")
+TEXT_CODECS = ("none", "zlib", "zstd")
+
+# Decompressed document texts kept for offset lookups, in documents.
+TEXT_CACHE_SIZE = 16
+
+# Tables and columns copied by `export_rows`/`import_rows` (snapshots). The lexical
+# index is derived data and is rebuilt after an import instead.
+SNAPSHOT_TABLES = {
+    "documents": (
+        "document_id",
+        "filename",
+        "upload_timestamp",
+        "num_chunks",
+        "embedding_model",
+        "version",
+        "chunking",
+    ),
+    "chunks": ("document_id", "chunk_id", "chunk_text", "start_offset", "end_offset"),
+    "document_texts": ("document_id", "codec", "text"),
+}
+
+
+def _fts_query(text: str) -> str:
+    """
+    Turn free text into an FTS5 query that cannot raise a syntax error.
+
+    Each whitespace-separated term becomes a quoted phrase, so codes such as
+    ``ERR-4021`` match as adjacent tokens, and terms are OR-ed for BM25 ranking.
+    """
+    terms = [term.replace('"', '""') for term in text.split() if re.search(r"\w", term)]
+    return " OR ".join(f'"{term}"' for term in terms)
+
+
+def _zstd():
+    try:
+        import zstandard
+    except ImportError as exc:
+        raise RuntimeError("zstd text compression requires the 'zstandard' package") from exc
+    return zstandard
+
+
+def _encode_text(text: str, codec: str) -> Union[str, bytes]:
+    if codec == "none":
+        return text
+    data = text.encode("utf-8")
+    if codec == "zlib":
+        return zlib.compress(data, 6)
+    return _zstd().ZstdCompressor(level=3).compress(data)
+
+
+def _decode_text(stored: Union[str, bytes], codec: str) -> str:
+    if codec == "none":
+        return stored
+    if codec == "zlib":
+        return zlib.decompress(stored).decode("utf-8")
+    return _zstd().ZstdDecompressor().decompress(stored).decode("utf-8")
+
+
+def _reassemble_text(texts: List[str], chunk_size: int, overlap: int) -> Optional[str]:
+    """
+    Rebuild a document from its inline chunks, assuming `chunk_spans` boundaries.
+
+    Returns None when the chunks do not tile the text at the expected step (e.g.
+    a whitespace-only window was skipped); callers verify the result by re-chunking.
+    """
+    if not texts:
+        return None
+    step = max(chunk_size - overlap, 1)
+    text = texts[0]
+    start = 0
+    for piece in texts[1:]:
+        start += step
+        shared = len(text) - start
+        if shared < 0 or piece[:shared] != text[start:]:
+            return None
+        text += piece[shared:]
+    return text
 
 
 class SQLiteMetadataStore:
-    """SQLite-backed metadata persistence for documents and chunks."""
+    """
+    SQLite-backed metadata persistence for documents and chunks.
+
+    Chunk text is also indexed in a contentless FTS5 table (`chunks_fts`, keyed by
+    the chunks rowid) for BM25 keyword search.
+
+    In "offsets" storage mode, chunks saved as `ChunkSpans` keep only their offsets
+    (with an empty `chunk_text`) and the document's text is stored once in
+    `document_texts`, optionally compressed. Both kinds of rows can coexist, so
+    switching modes needs no rewrite; `migrate_to_offsets` converts old rows.
+    """
 
-    def __init__(self, db_path: str) -> None:
+    def __init__(self, db_path: str, storage_mode: str = "inline", text_compression: str = "none") -> None:
+        if storage_mode not in STORAGE_MODES:
+            raise ValueError(f"Unknown storage_mode {storage_mode!r}; expected one of {STORAGE_MODES}")
+        if text_compression not in TEXT_CODECS:
+            raise ValueError(f"Unknown text_compression {text_compression!r}; expected one of {TEXT_CODECS}")
+        if text_compression == "zstd":
+            _zstd()
         self.db_path = db_path
+        self.storage_mode = storage_mode
+        self.text_compression = text_compression
+        self._text_cache: "OrderedDict[Tuple[str, Optional[int]], str]" = OrderedDict()
         os.makedirs(os.path.dirname(db_path), exist_ok=True)
-        self.conn = sqlite3.connect(self.db_path, check_same_thread=False)
+        # Several worker processes share this file: wait on their write locks instead of
+        # failing immediately, and use WAL so readers never block the writer.
+        self.conn = sqlite3.connect(self.db_path, check_same_thread=False, timeout=30.0)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        # One connection is shared by request handlers and hybrid-search worker threads.
+        self._lock = RLock()
         self._create_tables()
 
     def _create_tables(self) -> None:
@@ -21,23 +134,60 @@ class SQLiteMetadataStore:
                 filename TEXT NOT NULL,
                 upload_timestamp TEXT NOT NULL,
                 num_chunks INTEGER NOT NULL,
-                embedding_model TEXT NOT NULL
+                embedding_model TEXT NOT NULL,
+                version INTEGER NOT NULL DEFAULT 1,
+                chunking TEXT NOT NULL DEFAULT 'fixed'
             )
             """
         )
+        columns = {row[1] for row in cursor.execute("PRAGMA table_info(documents)")}
+        if "version" not in columns:
+            cursor.execute("ALTER TABLE documents ADD COLUMN version INTEGER NOT NULL DEFAULT 1")
+        if "chunking" not in columns:
+            # Documents stored before the strategy was recorded were all chunked fixed-size.
+            cursor.execute("ALTER TABLE documents ADD COLUMN chunking TEXT NOT NULL DEFAULT 'fixed'")
         cursor.execute(
             """
             CREATE TABLE IF NOT EXISTS chunks (
                 document_id TEXT NOT NULL,
                 chunk_id INTEGER NOT NULL,
                 chunk_text TEXT NOT NULL,
+                start_offset INTEGER,
+                end_offset INTEGER,
                 PRIMARY KEY (document_id, chunk_id),
                 FOREIGN KEY (document_id) REFERENCES documents(document_id)
             )
             """
         )
+        columns = {row[1] for row in cursor.execute("PRAGMA table_info(chunks)")}
+        if "start_offset" not in columns:
+            # Databases created before offsets storage; existing rows stay inline.
+            cursor.execute("ALTER TABLE chunks ADD COLUMN start_offset INTEGER")
+            cursor.execute("ALTER TABLE chunks ADD COLUMN end_offset INTEGER")
+        cursor.execute(
+            """
+            CREATE TABLE IF NOT EXISTS document_texts (
+                document_id TEXT PRIMARY KEY,
+                codec TEXT NOT NULL,
+                text NOT NULL,
+                FOREIGN KEY (document_id) REFERENCES documents(document_id)
+            )
+            """
+        )
+        # Back the document filters used to scope vector search.
+        cursor.execute("CREATE INDEX IF NOT EXISTS idx_documents_filename ON documents(filename)")
+        cursor.execute("CREATE INDEX IF NOT EXISTS idx_documents_upload_timestamp ON documents(upload_timestamp)")
+
+        fts_exists = cursor.execute(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'chunks_fts'"
+        ).fetchone()
+        cursor.execute("CREATE VIRTUAL TABLE IF NOT EXISTS chunks_fts USING fts5(chunk_text, content='')")
         self.conn.commit()
 
+        if not fts_exists:
+            # Databases created before the lexical index existed get a one-off backfill.
+            self.rebuild_lexical_index()
+
     def save_document(
         self,
         document_id: str,
@@ -45,31 +195,478 @@ class SQLiteMetadataStore:
         upload_timestamp: str,
         num_chunks: int,
         embedding_model: str,
+        chunking: str = "fixed",
     ) -> None:
-        cursor = self.conn.cursor()
-        cursor.execute(
-            """
-            INSERT INTO documents (document_id, filename, upload_timestamp, num_chunks, embedding_model)
-            VALUES (?, ?, ?, ?, ?)
-            """,
-            (document_id, filename, upload_timestamp, num_chunks, embedding_model),
-        )
-        self.conn.commit()
+        """`chunking` names the strategy the chunks were cut with; new versions reuse it."""
+        with self._lock:
+            cursor = self.conn.cursor()
+            cursor.execute(
+                """
+                INSERT INTO documents (document_id, filename, upload_timestamp, num_chunks, embedding_model, chunking)
+                VALUES (?, ?, ?, ?, ?, ?)
+                """,
+                (document_id, filename, upload_timestamp, num_chunks, embedding_model, chunking),
+            )
+            self.conn.commit()
+
+    def get_document(self, document_id: str) -> Optional[Dict[str, int | str]]:
+        with self._lock:
+            row = self.conn.execute(
+                """
+                SELECT document_id, filename, upload_timestamp, num_chunks, embedding_model, version, chunking
+                FROM documents WHERE document_id = ?
+                """,
+                (document_id,),
+            ).fetchone()
+        if row is None:
+            return None
+        return dict(zip(SNAPSHOT_TABLES["documents"], row))
+
+    def get_document_chunks(self, document_id: str) -> Dict[int, str]:
+        """Return `{chunk_id: text}` for every chunk of a document."""
+        with self._lock:
+            rows = self.conn.execute(
+                "SELECT chunk_id, chunk_text, start_offset, end_offset FROM chunks WHERE document_id = ? ORDER BY chunk_id",
+                (document_id,),
+            ).fetchall()
+            text = self._document_text(document_id) if any(row[2] is not None for row in rows) else None
+        return {
+            chunk_id: chunk_text if start is None else text[start:end]
+            for chunk_id, chunk_text, start, end in rows
+        }
+
+    def update_document(
+        self,
+        document_id: str,
+        filename: str,
+        upload_timestamp: str,
+        embedding_model: str,
+        chunks: Union[ChunkSpans, List[Dict[str, int | str]]],
+        kept: Dict[int, int],
+    ) -> int:
+        """
+        Replace a document's chunks with a new version in one transaction.
+
+        `chunks` is the full new version (chunk ids are 1-based positions) and
+        `kept` maps previous chunk ids to the new ids of identical chunks. Kept rows
+        are renumbered in place, so their FTS entries stay valid; other previous
+        rows are deleted from both tables and only new chunks are inserted.
+
+        Returns:
+            The new version number
+        """
+        spans = chunks if isinstance(chunks, ChunkSpans) and self.storage_mode == "offsets" else None
+
+        def text_at(chunk_id: int) -> str:
+            if isinstance(chunks, ChunkSpans):
+                return chunks.text_at(chunk_id - 1)
+            return str(chunks[chunk_id - 1]["text"])
+
+        def stored_row(chunk_id: int) -> Tuple[str, Optional[int], Optional[int]]:
+            if spans is not None:
+                return "", spans.starts[chunk_id - 1], spans.ends[chunk_id - 1]
+            return text_at(chunk_id), None, None
+
+        with self._lock:
+            cursor = self.conn.cursor()
+            previous = cursor.execute(
+                "SELECT rowid, chunk_id, chunk_text, start_offset, end_offset FROM chunks WHERE document_id = ?",
+                (document_id,),
+            ).fetchall()
+            previous_text = self._document_text(document_id) if any(row[3] is not None for row in previous) else None
+
+            for rowid, chunk_id, chunk_text, start, end in previous:
+                new_chunk_id = kept.get(chunk_id)
+                if new_chunk_id is None:
+                    # Contentless FTS rows are removed by re-supplying their text.
+                    text = chunk_text if start is None else previous_text[start:end]
+                    cursor.execute(
+                        "INSERT INTO chunks_fts (chunks_fts, rowid, chunk_text) VALUES ('delete', ?, ?)", (rowid, text)
+                    )
+                    cursor.execute("DELETE FROM chunks WHERE rowid = ?", (rowid,))
+                else:
+                    # Negative ids avoid primary-key clashes while renumbering.
+                    cursor.execute(
+                        "UPDATE chunks SET chunk_id = ?, chunk_text = ?, start_offset = ?, end_offset = ? WHERE rowid = ?",
+                        (-new_chunk_id, *stored_row(new_chunk_id), rowid),
+                    )
+            cursor.execute("UPDATE chunks SET chunk_id = -chunk_id WHERE document_id = ? AND chunk_id < 0", (document_id,))
+
+            reused = set(kept.values())
+            for chunk_id in range(1, len(chunks) + 1):
+                if chunk_id in reused:
+                    continue
+                cursor.execute(
+                    """
+                    INSERT INTO chunks (document_id, chunk_id, chunk_text, start_offset, end_offset)
+                    VALUES (?, ?, ?, ?, ?)
+                    """,
+                    (document_id, chunk_id, *stored_row(chunk_id)),
+                )
+                cursor.execute(
+                    "INSERT INTO chunks_fts (rowid, chunk_text) VALUES (?, ?)", (cursor.lastrowid, text_at(chunk_id))
+                )
 
-    def save_chunks(self, document_id: str, chunks: List[Dict[str, int | str]]) -> None:
+            if spans is not None:
+                cursor.execute(
+                    "INSERT OR REPLACE INTO document_texts (document_id, codec, text) VALUES (?, ?, ?)",
+                    (document_id, self.text_compression, _encode_text(spans.text, self.text_compression)),
+                )
+            else:
+                cursor.execute("DELETE FROM document_texts WHERE document_id = ?", (document_id,))
+
+            cursor.execute(
+                """
+                UPDATE documents
+                SET filename = ?, upload_timestamp = ?, num_chunks = ?, embedding_model = ?, version = version + 1
+                WHERE document_id = ?
+                """,
+                (filename, upload_timestamp, len(chunks), embedding_model, document_id),
+            )
+            version = cursor.execute("SELECT version FROM documents WHERE document_id = ?", (document_id,)).fetchone()
+            self.conn.commit()
+        return int(version[0]) if version else 0
+
+    def save_chunks(self, document_id: str, chunks: Union[ChunkSpans, List[Dict[str, int | str]]]) -> None:
         if not chunks:
             return
 
-        rows = [(document_id, int(c["chunk_id"]), str(c["text"])) for c in chunks]
-        cursor = self.conn.cursor()
-        cursor.executemany(
-            """
-            INSERT INTO chunks (document_id, chunk_id, chunk_text)
-            VALUES (?, ?, ?)
-            """,
-            rows,
-        )
-        self.conn.commit()
+        if isinstance(chunks, ChunkSpans) and self.storage_mode == "offsets":
+            self._save_chunk_spans(document_id, chunks)
+            return
+
+        if isinstance(chunks, ChunkSpans):
+            # Slice each chunk only as its row is written.
+            rows = ((document_id, chunk_id, chunks.text[start:end]) for chunk_id, start, end in chunks)
+        else:
+            rows = [(document_id, int(c["chunk_id"]), str(c["text"])) for c in chunks]
+        with self._lock:
+            cursor = self.conn.cursor()
+            cursor.executemany(
+                """
+                INSERT INTO chunks (document_id, chunk_id, chunk_text)
+                VALUES (?, ?, ?)
+                """,
+                rows,
+            )
+            # Same transaction, so the lexical index never lags the chunks table.
+            cursor.execute(
+                """
+                INSERT INTO chunks_fts (rowid, chunk_text)
+                SELECT rowid, chunk_text FROM chunks WHERE document_id = ?
+                """,
+                (document_id,),
+            )
+            self.conn.commit()
+
+    def _save_chunk_spans(self, document_id: str, spans: ChunkSpans) -> None:
+        stored = _encode_text(spans.text, self.text_compression)
+        with self._lock:
+            cursor = self.conn.cursor()
+            cursor.execute(
+                "INSERT INTO document_texts (document_id, codec, text) VALUES (?, ?, ?)",
+                (document_id, self.text_compression, stored),
+            )
+            cursor.executemany(
+                """
+                INSERT INTO chunks (document_id, chunk_id, chunk_text, start_offset, end_offset)
+                VALUES (?, ?, '', ?, ?)
+                """,
+                ((document_id, chunk_id, start, end) for chunk_id, start, end in spans),
+            )
+            rowids = [
+                row[0]
+                for row in cursor.execute(
+                    "SELECT rowid FROM chunks WHERE document_id = ? ORDER BY chunk_id", (document_id,)
+                ).fetchall()
+            ]
+            # The chunks table holds no text to select from, so feed the index directly.
+            cursor.executemany(
+                "INSERT INTO chunks_fts (rowid, chunk_text) VALUES (?, ?)",
+                zip(rowids, spans.iter_texts()),
+            )
+            self.conn.commit()
+
+    def _document_text(self, document_id: str) -> Optional[str]:
+        """Return a document's stored text, decompressing through a small LRU cache."""
+        # Keyed by version, so texts replaced by any process are never served stale.
+        version = self.conn.execute("SELECT version FROM documents WHERE document_id = ?", (document_id,)).fetchone()
+        key = (document_id, version[0] if version else None)
+        text = self._text_cache.get(key)
+        if text is not None:
+            self._text_cache.move_to_end(key)
+            return text
+        row = self.conn.execute(
+            "SELECT codec, text FROM document_texts WHERE document_id = ?", (document_id,)
+        ).fetchone()
+        if row is None:
+            return None
+        text = _decode_text(row[1], row[0])
+        self._text_cache[key] = text
+        if len(self._text_cache) > TEXT_CACHE_SIZE:
+            self._text_cache.popitem(last=False)
+        return text
+
+    def migrate_to_offsets(self, chunk_size: int = 500, overlap: int = 100) -> Dict[str, int]:
+        """
+        Convert inline chunk rows to offsets into a once-stored document text.
+
+        The text is reassembled from each document's chunks and accepted only if
+        re-chunking it with `chunk_size`/`overlap` reproduces every chunk exactly;
+        other documents stay inline. Each document converts in its own transaction,
+        and the FTS index is untouched because rowids and text do not change.
+
+        Returns:
+            Counts of `migrated` and `skipped` documents
+        """
+        with self._lock:
+            document_ids = [
+                row[0]
+                for row in self.conn.execute(
+                    "SELECT DISTINCT document_id FROM chunks WHERE start_offset IS NULL"
+                ).fetchall()
+            ]
+
+        counts = {"migrated": 0, "skipped": 0}
+        for document_id in document_ids:
+            with self._lock:
+                rows = self.conn.execute(
+                    "SELECT chunk_id, chunk_text FROM chunks WHERE document_id = ? ORDER BY chunk_id",
+                    (document_id,),
+                ).fetchall()
+                texts = [row[1] for row in rows]
+                text = _reassemble_text(texts, chunk_size, overlap)
+                spans = chunk_spans(text, chunk_size, overlap) if text is not None else None
+                if (
+                    spans is None
+                    or [row[0] for row in rows] != list(range(1, len(rows) + 1))
+                    or spans.texts() != texts
+                ):
+                    counts["skipped"] += 1
+                    continue
+
+                cursor = self.conn.cursor()
+                cursor.execute(
+                    "INSERT OR REPLACE INTO document_texts (document_id, codec, text) VALUES (?, ?, ?)",
+                    (document_id, self.text_compression, _encode_text(text, self.text_compression)),
+                )
+                cursor.executemany(
+                    """
+                    UPDATE chunks SET chunk_text = '', start_offset = ?, end_offset = ?
+                    WHERE document_id = ? AND chunk_id = ?
+                    """,
+                    ((start, end, document_id, chunk_id) for chunk_id, start, end in spans),
+                )
+                self.conn.commit()
+                counts["migrated"] += 1
+        return counts
+
+    def rebuild_lexical_index(self) -> int:
+        """
+        Bulk (re)load `chunks_fts` from the chunks table in one transaction.
+
+        Returns:
+            Number of chunks indexed
+        """
+        with self._lock:
+            cursor = self.conn.cursor()
+            cursor.execute("INSERT INTO chunks_fts (chunks_fts) VALUES ('delete-all')")
+            cursor.execute(
+                "INSERT INTO chunks_fts (rowid, chunk_text) SELECT rowid, chunk_text FROM chunks WHERE start_offset IS NULL"
+            )
+            indexed = cursor.rowcount
+            for document_id, codec, stored in self.conn.execute(
+                "SELECT document_id, codec, text FROM document_texts"
+            ).fetchall():
+                text = _decode_text(stored, codec)
+                spans = self.conn.execute(
+                    "SELECT rowid, start_offset, end_offset FROM chunks WHERE document_id = ? AND start_offset IS NOT NULL",
+                    (document_id,),
+                ).fetchall()
+                cursor.executemany(
+                    "INSERT INTO chunks_fts (rowid, chunk_text) VALUES (?, ?)",
+                    ((rowid, text[start:end]) for rowid, start, end in spans),
+                )
+                indexed += len(spans)
+            cursor.execute("INSERT INTO chunks_fts (chunks_fts) VALUES ('optimize')")
+            self.conn.commit()
+        return indexed
+
+    def search_lexical(
+        self,
+        query: str,
+        k: int = 5,
+        document_ids: Optional[Iterable[str]] = None,
+    ) -> List[Dict[str, int | str | float]]:
+        """
+        Return up to `k` chunks ranked by BM25 against `query`.
+
+        `bm25` follows SQLite's convention: more negative is a better match.
+        """
+        match = _fts_query(query)
+        if not match or k <= 0:
+            return []
+
+        sql = """
+            SELECT c.document_id, c.chunk_id, bm25(chunks_fts) AS score
+            FROM chunks_fts JOIN chunks c ON c.rowid = chunks_fts.rowid
+            WHERE chunks_fts MATCH ?
+        """
+        params: List[str | int] = [match]
+        if document_ids is not None:
+            document_ids = list(document_ids)
+            if not document_ids:
+                return []
+            sql += f" AND c.document_id IN ({', '.join('?' * len(document_ids))})"
+            params.extend(document_ids)
+        sql += " ORDER BY score LIMIT ?"
+        params.append(k)
+
+        with self._lock:
+            rows = self.conn.execute(sql, params).fetchall()
+        return [
+            {"document_id": document_id, "chunk_id": chunk_id, "bm25": score}
+            for document_id, chunk_id, score in rows
+        ]
+
+    def find_document_ids(
+        self,
+        filename: Optional[str] = None,
+        uploaded_after: Optional[str] = None,
+        uploaded_before: Optional[str] = None,
+        document_ids: Optional[Iterable[str]] = None,
+    ) -> List[str]:
+        """
+        Resolve document filters to matching document ids.
+
+        `filename` is a GLOB pattern (``report-*.pdf``); a literal prefix lets SQLite
+        use the filename index. Timestamps are ISO-8601 strings compared
+        lexicographically, matching how `upload_timestamp` is stored.
+        """
+        clauses: List[str] = []
+        params: List[str] = []
+        if filename is not None:
+            clauses.append("filename GLOB ?")
+            params.append(filename)
+        if uploaded_after is not None:
+            clauses.append("upload_timestamp >= ?")
+            params.append(uploaded_after)
+        if uploaded_before is not None:
+            clauses.append("upload_timestamp < ?")
+            params.append(uploaded_before)
+        if document_ids is not None:
+            document_ids = list(document_ids)
+            if not document_ids:
+                return []
+            clauses.append(f"document_id IN ({', '.join('?' * len(document_ids))})")
+            params.extend(document_ids)
+
+        query = "SELECT document_id FROM documents"
+        if clauses:
+            query += " WHERE " + " AND ".join(clauses)
+        with self._lock:
+            return [row[0] for row in self.conn.execute(query, params)]
+
+    def get_chunk_texts(self, keys: Iterable[Tuple[str, int]]) -> Dict[Tuple[str, int], str]:
+        """Return chunk text for each (document_id, chunk_id) key that exists."""
+        texts: Dict[Tuple[str, int], str] = {}
+        with self._lock:
+            for document_id, chunk_id in keys:
+                row = self.conn.execute(
+                    "SELECT chunk_text, start_offset, end_offset FROM chunks WHERE document_id = ? AND chunk_id = ?",
+                    (document_id, int(chunk_id)),
+                ).fetchone()
+                if row is None:
+                    continue
+                text, start, end = row
+                if start is not None:
+                    text = self._document_text(document_id)[start:end]
+                texts[(document_id, int(chunk_id))] = text
+        return texts
+
+    @contextmanager
+    def read_transaction(self) -> Iterator["SQLiteMetadataStore"]:
+        """
+        Hold one read transaction, so every read inside sees the same point in time.
+
+        WAL mode lets other processes keep writing meanwhile; their commits are just
+        not visible until the block exits.
+        """
+        with self._lock:
+            self.conn.execute("BEGIN")
+            try:
+                yield self
+            finally:
+                self.conn.rollback()
+
+    def count_rows(self, table: str) -> int:
+        with self._lock:
+            return int(self.conn.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0])
+
+    def export_rows(self, table: str, batch_size: int = 10000) -> Iterator[List[tuple]]:
+        """Yield every row of a snapshot table (columns as in SNAPSHOT_TABLES), in batches."""
+        columns = ", ".join(SNAPSHOT_TABLES[table])
+        with self._lock:
+            cursor = self.conn.execute(f"SELECT {columns} FROM {table} ORDER BY rowid")
+            while True:
+                rows = cursor.fetchmany(batch_size)
+                if not rows:
+                    return
+                yield rows
+
+    def import_rows(self, table: str, batches: Iterable[List[tuple]]) -> int:
+        """
+        Bulk-insert rows produced by `export_rows` in one transaction.
+
+        The lexical index is not updated; call `rebuild_lexical_index` once all
+        tables are loaded.
+
+        Returns:
+            Number of rows inserted
+        """
+        columns = SNAPSHOT_TABLES[table]
+        sql = f"INSERT INTO {table} ({', '.join(columns)}) VALUES ({', '.join('?' * len(columns))})"
+        inserted = 0
+        with self._lock:
+            cursor = self.conn.cursor()
+            try:
+                for rows in batches:
+                    cursor.executemany(sql, rows)
+                    inserted += len(rows)
+            except Exception:
+                self.conn.rollback()
+                raise
+            self.conn.commit()
+        self._text_cache.clear()
+        return inserted
 
     def close(self) -> None:
-        self.conn.close()
+        with self._lock:
+            self.conn.close()
+
+
+def main() -> None:
+    from app.core.config import get_settings
+
+    settings = get_settings()
+    parser = argparse.ArgumentParser(description="Migrate inline chunk text to offsets into stored document text.")
+    parser.add_argument("--db-path", default=os.environ.get("SQLITE_DB_PATH", settings.SQLITE_DB_PATH))
+    parser.add_argument("--compression", choices=TEXT_CODECS, default=settings.METADATA_TEXT_COMPRESSION)
+    parser.add_argument("--chunk-size", type=int, default=500, help="Chunk size the documents were ingested with")
+    parser.add_argument("--overlap", type=int, default=100, help="Overlap the documents were ingested with")
+    parser.add_argument("--vacuum", action="store_true", help="Reclaim the freed pages afterwards")
+    args = parser.parse_args()
+
+    store = SQLiteMetadataStore(args.db_path, storage_mode="offsets", text_compression=args.compression)
+    try:
+        counts = store.migrate_to_offsets(chunk_size=args.chunk_size, overlap=args.overlap)
+        if args.vacuum:
+            with store._lock:
+                store.conn.execute("VACUUM")
+    finally:
+        store.close()
+    print(f"Migrated {counts['migrated']} document(s); {counts['skipped']} left inline at {args.db_path}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,342 @@
+import argparse
+import heapq
+import json
+import os
+import zlib
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import ExitStack, contextmanager
+from typing import Dict, Iterable, Iterator, List, Optional
+
+from app.core.config import get_settings
+from app.storage.locking import atomic_write
+from app.storage.vector_store import FaissVectorStore
+
+
+def shard_index_path(index_path: str, shard: int, num_shards: int) -> str:
+    """Return the index file backing `shard`; a single shard uses `index_path` itself."""
+    if num_shards == 1:
+        return index_path
+    return f"{index_path}.shard-{shard:03d}-of-{num_shards:03d}"
+
+
+def shard_for_document(document_id: str, num_shards: int) -> int:
+    # crc32 is stable across processes, unlike the salted built-in hash().
+    return zlib.crc32(document_id.encode("utf-8")) % num_shards
+
+
+def _store_files(index_path: str) -> List[str]:
+    return [
+        index_path,
+        f"{index_path}.mapping.json",
+        f"{index_path}.generation",
+        f"{index_path}.vectors.f32",
+    ]
+
+
+def _remove_store(index_path: str) -> None:
+    # The lock file goes too, but is never part of a swap: replacing a lock file
+    # would split its holders across two inodes.
+    for path in _store_files(index_path) + [f"{index_path}.lock"]:
+        if os.path.exists(path):
+            os.remove(path)
+
+
+def read_shard_count(index_path: str) -> int:
+    """Return the shard count recorded next to `index_path` (1 when unsharded)."""
+    manifest_path = f"{index_path}.shards.json"
+    if not os.path.exists(manifest_path):
+        return 1
+    with open(manifest_path, "r", encoding="utf-8") as handle:
+        return int(json.load(handle)["num_shards"])
+
+
+def _write_shard_count(index_path: str, num_shards: int) -> None:
+    manifest_path = f"{index_path}.shards.json"
+    if num_shards == 1:
+        if os.path.exists(manifest_path):
+            os.remove(manifest_path)
+        return
+
+    def write_manifest(path: str) -> None:
+        with open(path, "w", encoding="utf-8") as handle:
+            json.dump({"num_shards": num_shards}, handle)
+
+    atomic_write(manifest_path, write_manifest)
+
+
+class ShardedFaissVectorStore:
+    """Partition vectors across `num_shards` FaissVectorStore files by document_id hash.
+
+    Each shard is an independent FaissVectorStore with its own lock, index file and
+    mapping. Ids returned to callers are global: ``local_id * num_shards + shard``.
+    """
+
+    def __init__(self, index_path: str, num_shards: int, **store_options) -> None:
+        if num_shards < 1:
+            raise ValueError("num_shards must be >= 1")
+
+        self.index_path = index_path
+        self.num_shards = num_shards
+
+        os.makedirs(os.path.dirname(index_path), exist_ok=True)
+        self._check_shard_count()
+        self.shards = [
+            FaissVectorStore(index_path=shard_index_path(index_path, shard, num_shards), **store_options)
+            for shard in range(num_shards)
+        ]
+        self._executor = ThreadPoolExecutor(max_workers=num_shards, thread_name_prefix="faiss-shard")
+
+    def _check_shard_count(self) -> None:
+        existing = read_shard_count(self.index_path)
+        has_data = os.path.exists(shard_index_path(self.index_path, 0, existing))
+        if has_data and existing != self.num_shards:
+            raise ValueError(
+                f"Index at {self.index_path} has {existing} shard(s) but {self.num_shards} were requested; "
+                "run `python -m app.storage.sharded_vector_store` to rebalance first"
+            )
+        _write_shard_count(self.index_path, self.num_shards)
+
+    @property
+    def ntotal(self) -> int:
+        return sum(store.ntotal for store in self.shards)
+
+    @property
+    def retired_count(self) -> int:
+        return sum(store.retired_count for store in self.shards)
+
+    def _to_global(self, shard: int, local_id: int) -> int:
+        return local_id * self.num_shards + shard
+
+    def add_embeddings(
+        self,
+        embeddings: List[List[float]],
+        metadata_items: List[Dict[str, int | str]],
+        persist: bool = True,
+    ) -> List[int]:
+        if len(embeddings) == 0:
+            return []
+
+        if len(embeddings) != len(metadata_items):
+            raise ValueError("embeddings and metadata_items must have the same length")
+
+        positions_by_shard: Dict[int, List[int]] = {}
+        for position, item in enumerate(metadata_items):
+            shard = shard_for_document(str(item["document_id"]), self.num_shards)
+            positions_by_shard.setdefault(shard, []).append(position)
+
+        stored_ids: List[int] = [0] * len(embeddings)
+        for shard, positions in positions_by_shard.items():
+            local_ids = self.shards[shard].add_embeddings(
+                [embeddings[p] for p in positions],
+                [metadata_items[p] for p in positions],
+                persist=persist,
+            )
+            for position, local_id in zip(positions, local_ids):
+                stored_ids[position] = self._to_global(shard, local_id)
+
+        return stored_ids
+
+    def remap_document_chunks(self, document_id: str, chunk_ids: Dict[int, int], persist: bool = True) -> int:
+        """Renumber/retire a document's vectors in the shard that owns it (see FaissVectorStore)."""
+        shard = shard_for_document(document_id, self.num_shards)
+        return self.shards[shard].remap_document_chunks(document_id, chunk_ids, persist=persist)
+
+    def replace_document_chunks(
+        self,
+        document_id: str,
+        chunk_ids: Dict[int, int],
+        embeddings: List[List[float]],
+        metadata_items: List[Dict[str, int | str]],
+    ) -> int:
+        """Remap and extend a document in the shard that owns it (see FaissVectorStore)."""
+        shard = shard_for_document(document_id, self.num_shards)
+        return self.shards[shard].replace_document_chunks(document_id, chunk_ids, embeddings, metadata_items)
+
+    def compact(self) -> int:
+        """Drop retired vectors from every shard (see FaissVectorStore.compact)."""
+        return sum(store.compact() for store in self.shards)
+
+    @contextmanager
+    def exclusive(self) -> Iterator["ShardedFaissVectorStore"]:
+        """Hold every shard's write lock (in shard order) for a consistent read."""
+        with ExitStack() as stack:
+            for store in self.shards:
+                stack.enter_context(store.exclusive())
+            yield self
+
+    def search_generation(self) -> int:
+        """Sum of the shards' counters, so a change in any shard changes it."""
+        return sum(store.search_generation() for store in self.shards)
+
+    def memory_bytes(self) -> int:
+        return sum(store.memory_bytes() for store in self.shards)
+
+    def search(
+        self,
+        query_embedding: List[float],
+        k: int = 5,
+        document_ids: Optional[Iterable[str]] = None,
+    ) -> List[Dict[str, int | str | float]]:
+        """
+        Fan the query out to every shard and merge the per-shard top-k by distance.
+
+        With `document_ids`, only the shards owning those documents are queried.
+        """
+        if k <= 0:
+            return []
+
+        if document_ids is None:
+            targets = {shard: None for shard in range(self.num_shards)}
+        else:
+            targets = {}
+            for document_id in document_ids:
+                targets.setdefault(shard_for_document(document_id, self.num_shards), []).append(document_id)
+
+        futures = {
+            shard: self._executor.submit(self.shards[shard].search, query_embedding, k, shard_documents)
+            for shard, shard_documents in targets.items()
+        }
+
+        candidates: List[Dict[str, int | str | float]] = []
+        for shard, future in futures.items():
+            for result in future.result():
+                result["faiss_id"] = self._to_global(shard, int(result["faiss_id"]))
+                candidates.append(result)
+
+        return heapq.nsmallest(k, candidates, key=lambda r: r["distance"])
+
+    def persist(self) -> None:
+        for store in self.shards:
+            store.persist()
+
+    def close(self) -> None:
+        try:
+            for store in self.shards:
+                store.close()
+        finally:
+            self._executor.shutdown(wait=True)
+
+
+def open_vector_store(index_path: str, num_shards: int = 1, **store_options):
+    """
+    Return a plain FaissVectorStore for one shard, otherwise a sharded store.
+
+    `store_options` are passed to every FaissVectorStore (mmap, index_type, ...).
+    """
+    if num_shards == 1 and read_shard_count(index_path) == 1:
+        return FaissVectorStore(index_path=index_path, **store_options)
+    return ShardedFaissVectorStore(index_path=index_path, num_shards=num_shards, **store_options)
+
+
+def rebalance_shards(index_path: str, num_shards: int, batch_size: int = 65536, **store_options) -> int:
+    """
+    Redistribute every stored vector from the current shard layout into `num_shards`.
+
+    The service must be stopped while rebalancing. New shards are built and persisted
+    next to the old ones, then moved into place, and the shard count is recorded
+    last; old files are deleted only after that. A run interrupted before the swap
+    leaves the old layout intact. Rebalancing to the same shard count overwrites
+    the files in place, so an interruption during the swap itself can leave a
+    shard half-replaced; keep a snapshot for that case.
+
+    Returns:
+        Number of vectors moved
+    """
+    if num_shards < 1:
+        raise ValueError("num_shards must be >= 1")
+
+    current = read_shard_count(index_path)
+    staging_path = f"{index_path}.rebalance"
+    for shard in range(num_shards):
+        _remove_store(shard_index_path(staging_path, shard, num_shards))
+
+    staged = [
+        FaissVectorStore(index_path=shard_index_path(staging_path, shard, num_shards), **store_options)
+        for shard in range(num_shards)
+    ]
+
+    moved = 0
+    for shard in range(current):
+        source = FaissVectorStore(index_path=shard_index_path(index_path, shard, current))
+        try:
+            total = source.index.ntotal if source.index is not None else 0
+            for start in range(0, total, batch_size):
+                count = min(batch_size, total - start)
+                vectors = source.reconstruct_vectors(start, count)
+                buckets: Dict[int, tuple] = {}
+                for offset in range(count):
+                    item = source.id_mapping.get(str(start + offset))
+                    if item is None:
+                        continue
+                    target = shard_for_document(str(item["document_id"]), num_shards)
+                    bucket = buckets.setdefault(target, ([], []))
+                    bucket[0].append(vectors[offset])
+                    bucket[1].append(item)
+                for target, (target_vectors, items) in buckets.items():
+                    staged[target].add_embeddings(target_vectors, items, persist=False)
+                    moved += len(items)
+        finally:
+            source.close()
+
+    # Everything staged is on disk before any live file is touched: until the
+    # swap below starts, an interrupted run leaves the old layout intact.
+    for store in staged:
+        store.close()
+
+    final_paths = [shard_index_path(index_path, shard, num_shards) for shard in range(num_shards)]
+    for store, final_path in zip(staged, final_paths):
+        for staged_file, final_file in zip(_store_files(store.index_path), _store_files(final_path)):
+            if os.path.exists(staged_file):
+                os.replace(staged_file, final_file)
+            elif os.path.exists(final_file):
+                # e.g. an exact-vector side file the new shard does not have.
+                os.remove(final_file)
+        _remove_store(store.index_path)
+
+    _write_shard_count(index_path, num_shards)
+
+    # The new layout is live; only now drop files of the old one it did not overwrite.
+    for shard in range(current):
+        old_path = shard_index_path(index_path, shard, current)
+        if old_path in final_paths:
+            continue
+        _remove_store(old_path)
+    return moved
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Rebalance the FAISS vector store into a new shard count, or compact it.")
+    parser.add_argument("--index-path", default=os.environ.get("FAISS_INDEX_PATH", "./data/faiss.index"))
+    target = parser.add_mutually_exclusive_group(required=True)
+    target.add_argument("--shards", type=int, help="Target number of shards")
+    target.add_argument(
+        "--compact", action="store_true", help="Drop retired vectors from the current layout instead (safe while serving)"
+    )
+    args = parser.parse_args()
+
+    settings = get_settings()
+    if args.compact:
+        store = open_vector_store(
+            args.index_path,
+            num_shards=read_shard_count(args.index_path),
+            index_type=settings.FAISS_INDEX_TYPE,
+            train_size=settings.FAISS_TRAIN_SIZE,
+        )
+        try:
+            dropped = store.compact()
+        finally:
+            store.close()
+        print(f"Dropped {dropped} retired vectors from {args.index_path}")
+        return
+
+    moved = rebalance_shards(
+        args.index_path,
+        args.shards,
+        index_type=settings.FAISS_INDEX_TYPE,
+        train_size=settings.FAISS_TRAIN_SIZE,
+    )
+    print(f"Rebalanced {moved} vectors into {args.shards} shard(s) at {args.index_path}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,383 @@
+import argparse
+import hashlib
+import json
+import os
+from datetime import datetime, timezone
+from typing import BinaryIO, Dict, Iterator, List, Sequence, Set
+
+import numpy as np
+from numpy.lib.format import open_memmap
+
+from app.core.config import get_settings
+from app.storage.locking import atomic_write
+from app.storage.metadata_store import SNAPSHOT_TABLES, SQLiteMetadataStore
+from app.storage.sharded_vector_store import open_vector_store, read_shard_count, shard_index_path
+
+SNAPSHOT_FORMAT = 1
+MANIFEST_NAME = "manifest.json"
+
+# Rows per batch when streaming columns; document texts are whole documents, so fewer.
+BATCH_SIZE = 65536
+TEXT_BATCH_SIZE = 256
+
+# Per-vector columns, next to the float32 matrix in vectors.npy.
+VECTOR_COLUMNS = ("document_id", "chunk_id")
+
+# Integer columns are int64 .npy files (-1 for NULL). `text` may hold compressed
+# bytes, so it is kept as raw bytes; every other column is UTF-8 text. Text and
+# bytes columns use an Arrow-style layout: int64 end offsets plus one data file.
+_INT_COLUMNS = {"num_chunks", "version", "chunk_id", "start_offset", "end_offset"}
+_BYTES_COLUMNS = {"text"}
+
+
+def _kind(column: str) -> str:
+    if column in _INT_COLUMNS:
+        return "int"
+    return "bytes" if column in _BYTES_COLUMNS else "str"
+
+
+class _ColumnWriter:
+    """Write `rows` rows of a table, column by column, in appended batches."""
+
+    def __init__(self, directory: str, table: str, columns: Sequence[str], rows: int) -> None:
+        self.table = table
+        self.columns = columns
+        self.rows = rows
+        self.position = 0
+        self.files: List[str] = []
+        self._ints: Dict[str, np.ndarray] = {}
+        self._offsets: Dict[str, np.ndarray] = {}
+        self._data: Dict[str, BinaryIO] = {}
+        self._sizes: Dict[str, int] = {}
+        for column in columns:
+            base = os.path.join(directory, f"{table}.{column}")
+            if _kind(column) == "int":
+                self._ints[column] = open_memmap(f"{base}.npy", mode="w+", dtype="<i8", shape=(rows,))
+                self.files.append(f"{base}.npy")
+            else:
+                self._offsets[column] = open_memmap(f"{base}.offsets.npy", mode="w+", dtype="<i8", shape=(rows + 1,))
+                self._offsets[column][0] = 0
+                self._data[column] = open(f"{base}.data", "wb")
+                self._sizes[column] = 0
+                self.files.extend([f"{base}.offsets.npy", f"{base}.data"])
+
+    def write(self, rows: Sequence[tuple]) -> None:
+        start, stop = self.position, self.position + len(rows)
+        if stop > self.rows:
+            raise RuntimeError(f"{self.table} gained rows while it was being exported")
+        for index, column in enumerate(self.columns):
+            values = [row[index] for row in rows]
+            if column in self._ints:
+                self._ints[column][start:stop] = [-1 if value is None else value for value in values]
+                continue
+            encoded = [value.encode("utf-8") if isinstance(value, str) else bytes(value) for value in values]
+            ends = self._sizes[column] + np.cumsum([len(blob) for blob in encoded], dtype=np.int64)
+            self._offsets[column][start + 1 : stop + 1] = ends
+            self._data[column].write(b"".join(encoded))
+            if len(ends):
+                self._sizes[column] = int(ends[-1])
+        self.position = stop
+
+    def close(self) -> None:
+        for array in (*self._ints.values(), *self._offsets.values()):
+            array.flush()
+        for handle in self._data.values():
+            handle.close()
+        if self.position != self.rows:
+            raise RuntimeError(f"{self.table}: wrote {self.position} of {self.rows} rows")
+
+
+class _ColumnReader:
+    """Read a table written by `_ColumnWriter` back in batches from memory-mapped files."""
+
+    def __init__(self, directory: str, table: str, columns: Sequence[str], rows: int) -> None:
+        self.columns = columns
+        self.rows = rows
+        self._directory = directory
+        self._table = table
+
+    def batches(self, batch_size: int) -> Iterator[List[tuple]]:
+        arrays: Dict[str, np.ndarray] = {}
+        handles: Dict[str, BinaryIO] = {}
+        try:
+            for column in self.columns:
+                base = os.path.join(self._directory, f"{self._table}.{column}")
+                if _kind(column) == "int":
+                    arrays[column] = np.load(f"{base}.npy", mmap_mode="r")
+                else:
+                    arrays[column] = np.load(f"{base}.offsets.npy", mmap_mode="r")
+                    handles[column] = open(f"{base}.data", "rb")
+
+            for start in range(0, self.rows, batch_size):
+                stop = min(start + batch_size, self.rows)
+                values = []
+                for column in self.columns:
+                    if column not in handles:
+                        values.append([None if v < 0 else v for v in arrays[column][start:stop].tolist()])
+                        continue
+                    offsets = arrays[column][start : stop + 1].tolist()
+                    handle = handles[column]
+                    handle.seek(offsets[0])
+                    blob = handle.read(offsets[-1] - offsets[0])
+                    pieces = [blob[a - offsets[0] : b - offsets[0]] for a, b in zip(offsets, offsets[1:])]
+                    values.append([p.decode("utf-8") for p in pieces] if _kind(column) == "str" else pieces)
+                yield list(zip(*values))
+        finally:
+            for handle in handles.values():
+                handle.close()
+
+
+def _sha256(path: str, block: int = 1 << 20) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as handle:
+        for chunk in iter(lambda: handle.read(block), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _export_vectors(vector_store, document_ids: Set[str], out_dir: str, batch_size: int) -> Dict:
+    stores = getattr(vector_store, "shards", [vector_store])
+    # Live ids only: retired vectors and vectors of documents not in the snapshot are left out.
+    live = [
+        np.asarray(
+            sorted(int(i) for i, item in store.id_mapping.items() if str(item["document_id"]) in document_ids),
+            dtype=np.int64,
+        )
+        for store in stores
+    ]
+    total = int(sum(len(ids) for ids in live))
+    dim = next((store.index.d for store in stores if store.index is not None), 0)
+
+    vectors_path = os.path.join(out_dir, "vectors.npy")
+    vectors = open_memmap(vectors_path, mode="w+", dtype="<f4", shape=(total, dim))
+    writer = _ColumnWriter(out_dir, "vectors", VECTOR_COLUMNS, total)
+    position = 0
+    for store, ids in zip(stores, live):
+        # Walk the index in fixed id windows so memory does not depend on retirements.
+        for window in range(0, store.ntotal, batch_size):
+            count = min(batch_size, store.ntotal - window)
+            lo, hi = np.searchsorted(ids, [window, window + count])
+            if lo == hi:
+                continue
+            selected = ids[lo:hi]
+            block = store.reconstruct_vectors(window, count)
+            vectors[position : position + len(selected)] = block[selected - window]
+            writer.write(
+                [
+                    (str(item["document_id"]), int(item["chunk_id"]))
+                    for item in (store.id_mapping[str(i)] for i in selected.tolist())
+                ]
+            )
+            position += len(selected)
+    vectors.flush()
+    del vectors
+    writer.close()
+    return {"rows": total, "dim": dim, "files": [vectors_path, *writer.files]}
+
+
+def create_snapshot(index_path: str, db_path: str, out_dir: str, batch_size: int = BATCH_SIZE) -> Dict:
+    """
+    Write a point-in-time bundle of the vector and metadata stores to `out_dir`.
+
+    Safe against a running service. Every shard's write lock is held for the
+    duration (writers in all processes wait), and the metadata tables are read in
+    one SQLite read transaction. Ingestion persists vectors before it commits
+    metadata, so every document in the bundle has its vectors; vectors of
+    documents not yet committed, and retired vectors, are left out. A document
+    update (PUT) holds the same write locks across both stores, so the bundle
+    has either its old version or its new one throughout.
+
+    Vectors go to `vectors.npy` (float32, memory-mappable). Tables are stored
+    column by column, and `manifest.json` is written last with row counts and
+    a sha256 per file, so an interrupted snapshot has no manifest.
+
+    Returns:
+        The manifest
+    """
+    os.makedirs(out_dir, exist_ok=True)
+    if os.listdir(out_dir):
+        raise FileExistsError(f"Snapshot directory {out_dir} is not empty")
+
+    vector_store = open_vector_store(index_path, num_shards=read_shard_count(index_path), mmap=True)
+    metadata_store = SQLiteMetadataStore(db_path)
+    tables: Dict[str, Dict] = {}
+    files: List[str] = []
+    try:
+        with vector_store.exclusive():
+            with metadata_store.read_transaction():
+                for table, columns in SNAPSHOT_TABLES.items():
+                    writer = _ColumnWriter(out_dir, table, columns, metadata_store.count_rows(table))
+                    table_batch = TEXT_BATCH_SIZE if table == "document_texts" else batch_size
+                    for rows in metadata_store.export_rows(table, table_batch):
+                        writer.write(rows)
+                    writer.close()
+                    tables[table] = {"rows": writer.rows, "columns": list(columns)}
+                    files.extend(writer.files)
+                document_ids = {row[0] for rows in metadata_store.export_rows("documents", batch_size) for row in rows}
+            # The metadata read is done; vectors stay locked until they are exported too.
+            exported = _export_vectors(vector_store, document_ids, out_dir, batch_size)
+    finally:
+        metadata_store.close()
+        vector_store.close()
+
+    tables["vectors"] = {"rows": exported["rows"], "columns": list(VECTOR_COLUMNS), "dim": exported["dim"]}
+    files.extend(exported["files"])
+    manifest = {
+        "format": SNAPSHOT_FORMAT,
+        "created_at": datetime.now(timezone.utc).isoformat(),
+        "tables": tables,
+        "files": {
+            os.path.basename(path): {"bytes": os.path.getsize(path), "sha256": _sha256(path)} for path in files
+        },
+    }
+
+    def write_manifest(path: str) -> None:
+        with open(path, "w", encoding="utf-8") as handle:
+            json.dump(manifest, handle, indent=2)
+
+    atomic_write(os.path.join(out_dir, MANIFEST_NAME), write_manifest)
+    return manifest
+
+
+def verify_snapshot(snapshot_dir: str) -> Dict:
+    """
+    Check a snapshot's manifest, file sizes and checksums.
+
+    Returns:
+        The manifest
+
+    Raises:
+        ValueError: If the manifest is missing or of an unknown format, or a file
+            is missing or does not match its checksum
+    """
+    manifest_path = os.path.join(snapshot_dir, MANIFEST_NAME)
+    if not os.path.exists(manifest_path):
+        raise ValueError(f"{snapshot_dir} has no {MANIFEST_NAME}; the snapshot is incomplete")
+    with open(manifest_path, "r", encoding="utf-8") as handle:
+        manifest = json.load(handle)
+    if manifest.get("format") != SNAPSHOT_FORMAT:
+        raise ValueError(f"Unsupported snapshot format {manifest.get('format')!r}")
+
+    for name, expected in manifest["files"].items():
+        path = os.path.join(snapshot_dir, name)
+        if not os.path.exists(path) or os.path.getsize(path) != expected["bytes"] or _sha256(path) != expected["sha256"]:
+            raise ValueError(f"Snapshot file {name} is missing or corrupt")
+    return manifest
+
+
+def _has_data(index_path: str, db_path: str) -> bool:
+    if os.path.exists(shard_index_path(index_path, 0, read_shard_count(index_path))):
+        return True
+    if not os.path.exists(db_path):
+        return False
+    store = SQLiteMetadataStore(db_path)
+    try:
+        return store.count_rows("documents") > 0
+    finally:
+        store.close()
+
+
+def restore_snapshot(
+    snapshot_dir: str,
+    index_path: str,
+    db_path: str,
+    num_shards: int = 1,
+    batch_size: int = BATCH_SIZE,
+    verify: bool = True,
+    **store_options,
+) -> Dict[str, int]:
+    """
+    Load a snapshot into empty stores without re-embedding anything.
+
+    The service must be stopped, as for `rebalance_shards`. Vectors and columns
+    are streamed from memory-mapped files `batch_size` rows at a time, so memory
+    beyond the index being built does not grow with the snapshot. Vectors are
+    loaded first (as ingestion does), then the tables in one transaction each,
+    then the lexical index is rebuilt in bulk. `store_options` (index_type,
+    train_size, ...) configure the new vector store.
+
+    Returns:
+        Rows restored per table
+
+    Raises:
+        FileExistsError: If the target stores already hold data
+        ValueError: If the snapshot fails verification
+    """
+    manifest = verify_snapshot(snapshot_dir) if verify else None
+    if manifest is None:
+        with open(os.path.join(snapshot_dir, MANIFEST_NAME), "r", encoding="utf-8") as handle:
+            manifest = json.load(handle)
+    if _has_data(index_path, db_path):
+        raise FileExistsError(f"Refusing to restore over existing data at {index_path} / {db_path}")
+
+    tables = manifest["tables"]
+    counts: Dict[str, int] = {}
+
+    vector_rows = tables["vectors"]["rows"]
+    vector_store = open_vector_store(index_path, num_shards=num_shards, **store_options)
+    try:
+        vectors = np.load(os.path.join(snapshot_dir, "vectors.npy"), mmap_mode="r")
+        items = _ColumnReader(snapshot_dir, "vectors", VECTOR_COLUMNS, vector_rows).batches(batch_size)
+        for start, rows in zip(range(0, vector_rows, batch_size), items):
+            vector_store.add_embeddings(
+                np.asarray(vectors[start : start + len(rows)]),
+                [{"document_id": document_id, "chunk_id": chunk_id} for document_id, chunk_id in rows],
+                persist=False,
+            )
+        vector_store.persist()
+    finally:
+        vector_store.close()
+    counts["vectors"] = vector_rows
+
+    metadata_store = SQLiteMetadataStore(db_path)
+    try:
+        for table, columns in SNAPSHOT_TABLES.items():
+            reader = _ColumnReader(snapshot_dir, table, columns, tables[table]["rows"])
+            batches = reader.batches(TEXT_BATCH_SIZE if table == "document_texts" else batch_size)
+            if table == "document_texts":
+                # Uncompressed texts were stored as TEXT; keep them that way.
+                batches = ([(d, c, t.decode("utf-8") if c == "none" else t) for d, c, t in rows] for rows in batches)
+            counts[table] = metadata_store.import_rows(table, batches)
+        metadata_store.rebuild_lexical_index()
+    finally:
+        metadata_store.close()
+    return counts
+
+
+def main() -> None:
+    settings = get_settings()
+    parser = argparse.ArgumentParser(description="Snapshot or restore the vector and metadata stores.")
+    parser.add_argument("--index-path", default=os.environ.get("FAISS_INDEX_PATH", "./data/faiss.index"))
+    parser.add_argument("--db-path", default=os.environ.get("SQLITE_DB_PATH", settings.SQLITE_DB_PATH))
+    commands = parser.add_subparsers(dest="command", required=True)
+    create = commands.add_parser("create", help="Write a snapshot (safe while the service runs)")
+    create.add_argument("out_dir")
+    verify = commands.add_parser("verify", help="Check a snapshot's checksums")
+    verify.add_argument("snapshot_dir")
+    restore = commands.add_parser("restore", help="Load a snapshot into empty stores (service stopped)")
+    restore.add_argument("snapshot_dir")
+    restore.add_argument("--shards", type=int, default=settings.VECTOR_STORE_SHARDS)
+    args = parser.parse_args()
+
+    if args.command == "create":
+        manifest = create_snapshot(args.index_path, args.db_path, args.out_dir)
+        rows = {table: info["rows"] for table, info in manifest["tables"].items()}
+        print(f"Snapshot written to {args.out_dir}: {rows}")
+    elif args.command == "verify":
+        verify_snapshot(args.snapshot_dir)
+        print(f"Snapshot {args.snapshot_dir} is intact")
+    else:
+        counts = restore_snapshot(
+            args.snapshot_dir,
+            args.index_path,
+            args.db_path,
+            num_shards=args.shards,
+            index_type=settings.FAISS_INDEX_TYPE,
+            rerank_factor=settings.FAISS_RERANK_FACTOR,
+            train_size=settings.FAISS_TRAIN_SIZE,
+        )
+        print(f"Restored {counts} into {args.index_path} / {args.db_path}")
+
+
+if __name__ == "__main__":
+    main()
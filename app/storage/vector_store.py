@@ -1,37 +1,285 @@
 import json
+import logging
 import os
-from typing import Dict, List
+import time
+from contextlib import contextmanager, nullcontext
+from threading import RLock
+from typing import Dict, Iterable, Iterator, List, Optional
 
 import numpy as np
 
+from app.storage.locking import FileLock, atomic_write
+
 try:
     import faiss
 except Exception:
     faiss = None
 
+logger = logging.getLogger(__name__)
+
+
+def _mmap_io_flags() -> int:
+    # IO_FLAG_MMAP_IFC maps flat code arrays straight from the file (faiss >= 1.10);
+    # older releases only honour IO_FLAG_MMAP for on-disk inverted lists.
+    return getattr(faiss, "IO_FLAG_MMAP_IFC", faiss.IO_FLAG_MMAP) | faiss.IO_FLAG_READ_ONLY
+
+
+# Filtered searches over at most this many vectors skip FAISS and scan the subset exactly.
+BRUTE_FORCE_MAX_IDS = 2048
+
+# Approximate bytes per loaded id_mapping entry (key, dict and UUID document_id).
+MAPPING_ENTRY_BYTES = 360
+
+# Vectors copied per batch when converting or backfilling from a flat index.
+EXACT_BACKFILL_BATCH = 65536
+
+# Supported storage modes and the faiss index_factory spec each one builds.
+INDEX_TYPES = ("flat", "sqfp16", "sq8", "pq")
+
+
+class StaleIndexError(RuntimeError):
+    """Raised when unsaved changes sit on a generation another writer has since replaced."""
+
+
+def _factory_spec(index_type: str, dim: int) -> str:
+    if index_type == "sqfp16":
+        return "SQfp16"
+    if index_type == "sq8":
+        return "SQ8"
+    if index_type == "pq":
+        # 8-bit codes over sub-vectors of ~8 dims: 384-d embeddings become 48 bytes.
+        subquantizers = max(m for m in range(1, max(dim // 8, 1) + 1) if dim % m == 0)
+        return f"PQ{subquantizers}x8"
+    return "Flat"
+
 
 class FaissVectorStore:
-    """FAISS IndexFlatL2 store with persisted id->metadata mapping."""
+    """
+    FAISS IndexFlatL2 store with persisted id->metadata mapping.
 
-    def __init__(self, index_path: str) -> None:
+    Safe to share between worker processes: writes hold an advisory file lock,
+    files are replaced atomically, and a generation record next to the index lets
+    other workers notice and pick up changes on their next search or write.
+
+    With `mmap=True` the index is memory-mapped read-only instead of read into
+    private memory, so startup does not depend on index size and workers share
+    pages through the OS page cache. The mapping is then loaded on first use. The
+    first write in a process switches to a private, writable copy until the next
+    persist re-maps the file.
+
+    `index_type` selects compressed storage ("sqfp16", "sq8" or "pq"). Vectors are
+    kept in a flat index until `train_size` have arrived (immediately for modes
+    that need no training), then the index is trained and converted in place, ids
+    unchanged. Compressed stores also append the original float32 vectors to a
+    side file on disk; with `rerank_factor` > 0 searches fetch `k * rerank_factor`
+    candidates and re-rank them by exact distance from that file.
+
+    Vectors superseded by new document versions stay in the index, skipped by
+    searches, until `compact` drops them; `replace_document_chunks` compacts once
+    they exceed `compact_ratio` of the index (0 disables).
+    """
+
+    def __init__(
+        self,
+        index_path: str,
+        mmap: bool = False,
+        index_type: str = "flat",
+        rerank_factor: int = 0,
+        train_size: int = 10000,
+        compact_ratio: float = 0.25,
+    ) -> None:
         if faiss is None:
             raise RuntimeError("faiss is not installed. Install faiss-cpu to enable vector storage.")
+        if index_type not in INDEX_TYPES:
+            raise ValueError(f"index_type must be one of {', '.join(INDEX_TYPES)}")
 
         self.index_path = index_path
         self.mapping_path = f"{index_path}.mapping.json"
+        self.generation_path = f"{index_path}.generation"
+        self.vectors_path = f"{index_path}.vectors.f32"
+        self.mmap = mmap
+        self.index_type = index_type
+        self.rerank_factor = rerank_factor
+        self.train_size = train_size
+        self.compact_ratio = compact_ratio
         self.index = None
-        self.id_mapping: Dict[str, Dict[str, int | str]] = {}
+        self._id_mapping: Optional[Dict[str, Dict[str, int | str]]] = {}
+        self._ids_by_document: Optional[Dict[str, List[int]]] = None
+        self._mapped = False
+        self.generation = 0
+        self._epoch = 0
+        # Retired vectors as of the loaded generation, for when the mapping is not loaded.
+        self._published_retired = 0
+        # Bumped by every change that can alter search results, persisted or not.
+        self._changes = 0
+        self._generation_stat: Optional[tuple] = None
+        self._dirty = False
+        self._rebuilt = False
+        self._lock = RLock()
 
         os.makedirs(os.path.dirname(index_path), exist_ok=True)
-        self._load_existing()
+        self._write_lock = FileLock(f"{index_path}.lock")
+        self._read_lock = FileLock(f"{index_path}.lock", shared=True, within=self._write_lock)
+        with self._read_lock:
+            self._load_existing()
+
+    @property
+    def ntotal(self) -> int:
+        return self.index.ntotal if self.index is not None else 0
+
+    @property
+    def id_mapping(self) -> Dict[str, Dict[str, int | str]]:
+        if self._id_mapping is None:
+            self._id_mapping = self._read_mapping()
+        return self._id_mapping
+
+    @id_mapping.setter
+    def id_mapping(self, value: Optional[Dict[str, Dict[str, int | str]]]) -> None:
+        # None defers loading until first access.
+        self._id_mapping = value
+        self._ids_by_document = None
+
+    def ids_for_documents(self, document_ids: Iterable[str]) -> np.ndarray:
+        """Return the faiss ids of every stored chunk belonging to `document_ids`."""
+        with self._lock:
+            if self._ids_by_document is None:
+                by_document: Dict[str, List[int]] = {}
+                for faiss_id, item in self.id_mapping.items():
+                    by_document.setdefault(str(item["document_id"]), []).append(int(faiss_id))
+                self._ids_by_document = by_document
+
+            ids: List[int] = []
+            for document_id in document_ids:
+                ids.extend(self._ids_by_document.get(document_id, ()))
+        return np.asarray(sorted(ids), dtype="int64")
+
+    def _read_index(self):
+        self._mapped = self.mmap
+        if self.mmap:
+            return faiss.read_index(self.index_path, _mmap_io_flags())
+        return faiss.read_index(self.index_path)
+
+    def _read_mapping(self) -> Dict[str, Dict[str, int | str]]:
+        if not os.path.exists(self.mapping_path):
+            return {}
+        with open(self.mapping_path, "r", encoding="utf-8") as handle:
+            return json.load(handle)
 
     def _load_existing(self) -> None:
+        started = time.perf_counter()
+        record = self._read_generation()
+
+        index_bytes = 0
         if os.path.exists(self.index_path):
-            self.index = faiss.read_index(self.index_path)
+            index_bytes = os.path.getsize(self.index_path)
+            self.index = self._read_index()
 
-        if os.path.exists(self.mapping_path):
-            with open(self.mapping_path, "r", encoding="utf-8") as handle:
-                self.id_mapping = json.load(handle)
+        self.id_mapping = None if self.mmap else self._read_mapping()
+
+        if record is not None:
+            self.generation = int(record["generation"])
+            self._epoch = int(record["epoch"])
+            self._published_retired = int(record.get("retired", 0))
+
+        logger.info(
+            f"Loaded vector index {self.index_path} in {(time.perf_counter() - started) * 1000:.1f} ms",
+            extra={
+                "index_path": self.index_path,
+                "index_bytes": index_bytes,
+                "ntotal": self.index.ntotal if self.index is not None else 0,
+                "mmap": self.mmap,
+            },
+        )
+
+    def _read_generation(self) -> Optional[Dict[str, int]]:
+        try:
+            stat = os.stat(self.generation_path)
+            with open(self.generation_path, "r", encoding="utf-8") as handle:
+                record = json.load(handle)
+        except FileNotFoundError:
+            return None
+        self._generation_stat = (stat.st_ino, stat.st_mtime_ns, stat.st_size)
+        return record
+
+    def _generation_changed(self) -> bool:
+        try:
+            stat = os.stat(self.generation_path)
+        except FileNotFoundError:
+            return False
+        return (stat.st_ino, stat.st_mtime_ns, stat.st_size) != self._generation_stat
+
+    def refresh(self) -> bool:
+        """
+        Pick up changes persisted by other processes.
+
+        The common case (nothing changed) costs a single stat call. Returns True
+        when the in-memory index was updated.
+        """
+        if not self._generation_changed():
+            return False
+
+        with self._lock, self._read_lock:
+            return self._sync_locked()
+
+    def _sync_locked(self) -> bool:
+        # Unsaved local changes win; only bulk loaders use persist=False.
+        if self._dirty:
+            return False
+
+        record = self._read_generation()
+        if record is None or int(record["generation"]) == self.generation:
+            return False
+
+        appended = None
+        if int(record["epoch"]) == self._epoch and not self._mapped:
+            appended = self._read_appended_vectors(int(record["ntotal"]))
+
+        if appended is not None:
+            if len(appended):
+                self.index.add(appended)
+        elif os.path.exists(self.index_path):
+            # Re-mapping a mmap'd index is as cheap as the incremental path.
+            self.index = self._read_index()
+        else:
+            self.index = None
+
+        self.id_mapping = None if self.mmap else self._read_mapping()
+
+        self.generation = int(record["generation"])
+        self._epoch = int(record["epoch"])
+        self._published_retired = int(record.get("retired", 0))
+        self._changes += 1
+        return True
+
+    def _read_appended_vectors(self, ntotal: int) -> Optional[np.ndarray]:
+        """
+        Read only the vectors another worker appended since our last sync.
+
+        IndexFlat serializes its float32 codes as the trailing block of the file,
+        preceded by their element count, so an append-only change can be applied by
+        reading the tail. Returns None when a full reload is required instead.
+        """
+        if self.index is None or type(self.index) is not faiss.IndexFlatL2:
+            return None
+
+        start = self.index.ntotal
+        if ntotal < start:
+            return None
+
+        dim = self.index.d
+        codes_bytes = ntotal * dim * 4
+        try:
+            with open(self.index_path, "rb") as handle:
+                codes_offset = os.fstat(handle.fileno()).st_size - codes_bytes
+                handle.seek(codes_offset - 8)
+                if int.from_bytes(handle.read(8), "little") != ntotal * dim:
+                    return None
+                handle.seek(codes_offset + start * dim * 4)
+                data = handle.read((ntotal - start) * dim * 4)
+        except (OSError, ValueError):
+            return None
+
+        return np.frombuffer(data, dtype="float32").reshape(-1, dim)
 
     def _ensure_index(self, dim: int) -> None:
         if self.index is None:
@@ -43,13 +291,62 @@ class FaissVectorStore:
             # This prevents runtime failures with stale persisted indexes.
             self.index = faiss.IndexFlatL2(dim)
             self.id_mapping = {}
+            self._rebuilt = True
+
+    def _exact_rows(self, dim: int) -> int:
+        """Rows of the exact-vector side file; it only ever holds a prefix of the ids."""
+        if not os.path.exists(self.vectors_path):
+            return 0
+        return os.path.getsize(self.vectors_path) // (dim * 4)
+
+    def _append_exact_vectors(self, start_id: int, array: np.ndarray) -> None:
+        dim = array.shape[1]
+        covered = self._exact_rows(dim)
+        if covered < start_id and type(self.index) is not faiss.IndexFlatL2:
+            # Earlier rows exist only compressed. Leave the side file a shorter
+            # prefix, which exact reads and re-ranking do not trust, rather than
+            # filling the gap with approximations.
+            return
+
+        mode = "r+b" if os.path.exists(self.vectors_path) else "wb"
+        with open(self.vectors_path, mode) as handle:
+            # Truncate first: a crash between append and persist can leave rows for ids
+            # that were never published.
+            handle.truncate(min(covered, start_id) * dim * 4)
+            handle.seek(0, os.SEEK_END)
+            # A flat index reopened with a compressed index_type: backfill its
+            # vectors while they are still exact.
+            for start in range(covered, start_id, EXACT_BACKFILL_BATCH):
+                count = min(EXACT_BACKFILL_BATCH, start_id - start)
+                handle.write(np.ascontiguousarray(self.index.reconstruct_n(start, count), dtype="float32").tobytes())
+            handle.write(np.ascontiguousarray(array, dtype="float32").tobytes())
+
+    def _maybe_compress(self) -> None:
+        """Convert the flat staging index to the configured compressed type once trainable."""
+        if self.index_type == "flat" or type(self.index) is not faiss.IndexFlatL2:
+            return
+
+        target = faiss.index_factory(self.index.d, _factory_spec(self.index_type, self.index.d), faiss.METRIC_L2)
+        ntotal = self.index.ntotal
+        if not target.is_trained and ntotal < self.train_size:
+            return
+
+        if not target.is_trained:
+            # Train on a fixed-size sample so memory does not grow with the index.
+            sample = np.sort(np.random.default_rng(0).choice(ntotal, min(self.train_size, ntotal), replace=False))
+            target.train(self.index.reconstruct_batch(sample.astype("int64")))
+        for start in range(0, ntotal, EXACT_BACKFILL_BATCH):
+            target.add(self.index.reconstruct_n(start, min(EXACT_BACKFILL_BATCH, ntotal - start)))
+        self.index = target
+        self._rebuilt = True
 
     def add_embeddings(
         self,
         embeddings: List[List[float]],
         metadata_items: List[Dict[str, int | str]],
+        persist: bool = True,
     ) -> List[int]:
-        if not embeddings:
+        if len(embeddings) == 0:
             return []
 
         if len(embeddings) != len(metadata_items):
@@ -59,29 +356,389 @@ class FaissVectorStore:
         if array.ndim != 2:
             raise ValueError("embeddings must be 2-dimensional")
 
-        self._ensure_index(array.shape[1])
+        with self._lock, self._write_lock:
+            # Catch up with other workers first so their vectors are not overwritten.
+            self._sync_locked()
+            if self._mapped:
+                # Mapped code arrays cannot grow; take a private copy to write to.
+                self.index = faiss.read_index(self.index_path)
+                self._mapped = False
+            self._ensure_index(array.shape[1])
 
-        start_id = self.index.ntotal
-        self.index.add(array)
+            start_id = self.index.ntotal
+            if self.index_type != "flat":
+                self._append_exact_vectors(start_id, array)
+            self.index.add(array)
+            self._maybe_compress()
 
-        stored_ids: List[int] = []
-        for offset, item in enumerate(metadata_items):
-            faiss_id = int(start_id + offset)
-            self.id_mapping[str(faiss_id)] = {
-                "document_id": str(item["document_id"]),
-                "chunk_id": int(item["chunk_id"]),
-            }
-            stored_ids.append(faiss_id)
+            stored_ids: List[int] = []
+            for offset, item in enumerate(metadata_items):
+                faiss_id = int(start_id + offset)
+                self.id_mapping[str(faiss_id)] = {
+                    "document_id": str(item["document_id"]),
+                    "chunk_id": int(item["chunk_id"]),
+                }
+                if self._ids_by_document is not None:
+                    self._ids_by_document.setdefault(str(item["document_id"]), []).append(faiss_id)
+                stored_ids.append(faiss_id)
 
-        self.persist()
+            self._changes += 1
+            self._dirty = True
+            if persist:
+                self.persist()
         return stored_ids
 
+    def remap_document_chunks(self, document_id: str, chunk_ids: Dict[int, int], persist: bool = True) -> int:
+        """
+        Renumber a document's chunks for a new version and retire the rest.
+
+        Vectors whose chunk_id is a key of `chunk_ids` are kept under the new id;
+        every other vector of the document is retired: it leaves the mapping, so
+        searches no longer return it, but stays in the index file until the store
+        is rebuilt (e.g. by `rebalance_shards`).
+
+        Returns:
+            Number of vectors retired
+        """
+        with self._lock, self._write_lock:
+            self._sync_locked()
+            retired = 0
+            kept: List[int] = []
+            for faiss_id in self.ids_for_documents([document_id]).tolist():
+                item = self.id_mapping[str(faiss_id)]
+                new_chunk_id = chunk_ids.get(int(item["chunk_id"]))
+                if new_chunk_id is None:
+                    del self.id_mapping[str(faiss_id)]
+                    retired += 1
+                else:
+                    item["chunk_id"] = int(new_chunk_id)
+                    kept.append(faiss_id)
+            if self._ids_by_document is not None:
+                self._ids_by_document[document_id] = kept
+
+            self._changes += 1
+            self._dirty = True
+            if persist:
+                self.persist()
+        return retired
+
+    def replace_document_chunks(
+        self,
+        document_id: str,
+        chunk_ids: Dict[int, int],
+        embeddings: List[List[float]],
+        metadata_items: List[Dict[str, int | str]],
+    ) -> int:
+        """
+        Remap a document's chunks for a new version (see `remap_document_chunks`)
+        and add the vectors of its changed chunks, published as one generation.
+
+        Both steps run under a single hold of the write lock, so no other writer
+        can publish in between and have its vectors overwritten. Compacts the
+        index instead of only persisting once retired vectors exceed
+        `compact_ratio` of it.
+
+        Returns:
+            Number of vectors retired
+        """
+        with self._lock, self._write_lock:
+            retired = self.remap_document_chunks(document_id, chunk_ids, persist=False)
+            self.add_embeddings(embeddings, metadata_items, persist=False)
+            if self.compact_ratio > 0 and self.retired_count > self.compact_ratio * self.ntotal:
+                self.compact()
+            else:
+                self.persist()
+        return retired
+
+    def compact(self) -> int:
+        """
+        Rebuild the index without retired vectors and publish it.
+
+        Live vectors keep their order but are renumbered densely, so faiss ids
+        change; callers key results on document and chunk ids. Compressed indexes
+        keep their trained parameters and re-encode from the exact side file where
+        it has the rows, which is rewritten to match. Other workers see a new epoch
+        and reload in full.
+
+        Returns:
+            Number of vectors dropped
+        """
+        with self._lock, self._write_lock:
+            self._sync_locked()
+            dropped = self.retired_count
+            if self.index is None or dropped == 0:
+                self.persist()
+                return 0
+
+            started = time.perf_counter()
+            live = np.asarray(sorted(int(faiss_id) for faiss_id in self.id_mapping), dtype="int64")
+            dim = self.index.d
+            if type(self.index) is faiss.IndexFlatL2:
+                compacted = faiss.IndexFlatL2(dim)
+            else:
+                compacted = faiss.clone_index(self.index)
+                compacted.reset()
+
+            # Rows of the side file are a prefix of the ids, so the live ones among
+            # them are a prefix of the new ids.
+            has_side_file = os.path.exists(self.vectors_path)
+            covered = self._exact_rows(dim)
+            exact_live = int(np.searchsorted(live, covered))
+            exact = np.memmap(self.vectors_path, dtype="float32", mode="r", shape=(covered, dim)) if exact_live else None
+            staged_vectors = f"{self.vectors_path}.compact"
+            with open(staged_vectors, "wb") if has_side_file else nullcontext() as side:
+                for start in range(0, len(live), EXACT_BACKFILL_BATCH):
+                    ids = live[start:start + EXACT_BACKFILL_BATCH]
+                    from_side = ids[: max(0, min(len(ids), exact_live - start))]
+                    rows = self.index.reconstruct_batch(ids) if len(from_side) < len(ids) else None
+                    if len(from_side):
+                        exact_rows = np.asarray(exact[from_side], dtype="float32")
+                        rows = exact_rows if rows is None else np.concatenate([exact_rows, rows[len(from_side):]])
+                        side.write(exact_rows.tobytes())
+                    compacted.add(rows)
+            del exact
+
+            if has_side_file:
+                # Readers trust any prefix of the side file: drop the old one before
+                # the new ids are published, and add the rewritten one only after.
+                os.remove(self.vectors_path)
+            self.id_mapping = {str(new_id): self.id_mapping[str(old_id)] for new_id, old_id in enumerate(live.tolist())}
+            self.index = compacted
+            self._mapped = False
+            self._rebuilt = True
+            self._dirty = True
+            self._changes += 1
+            self.persist()
+            if has_side_file:
+                os.replace(staged_vectors, self.vectors_path)
+
+            logger.info(
+                f"Compacted vector index {self.index_path} in {(time.perf_counter() - started) * 1000:.1f} ms",
+                extra={"index_path": self.index_path, "dropped": dropped, "ntotal": self.index.ntotal},
+            )
+        return dropped
+
+    @contextmanager
+    def exclusive(self) -> Iterator["FaissVectorStore"]:
+        """
+        Hold the write lock, synced to the latest generation, for a consistent read.
+
+        Writers in every process wait until the block exits; use the store's own
+        methods (not `refresh`, which would wait on this lock) inside it.
+        """
+        with self._lock, self._write_lock:
+            self._sync_locked()
+            yield self
+
+    def search_generation(self) -> int:
+        """
+        Return a counter that changes whenever search results may have changed.
+
+        Covers local writes (persisted or not) and changes picked up from other
+        workers; it only ever increases, so caches can key results on it.
+        """
+        self.refresh()
+        return self._changes
+
+    @property
+    def retired_count(self) -> int:
+        """Vectors still in the index whose chunks were superseded."""
+        if self._id_mapping is None:
+            # Not loaded yet (mmap); a write would have loaded it, so the published count is current.
+            return self._published_retired
+        return self.ntotal - len(self.id_mapping)
+
+    def memory_bytes(self) -> int:
+        """
+        Estimate the private memory held: index codes (none while memory-mapped)
+        plus the id mapping once it is loaded.
+        """
+        with self._lock:
+            index_bytes = 0
+            if self.index is not None and not self._mapped:
+                index_bytes = self.index.ntotal * getattr(self.index, "code_size", self.index.d * 4)
+            mapping_entries = len(self._id_mapping) if self._id_mapping is not None else 0
+        return index_bytes + mapping_entries * MAPPING_ENTRY_BYTES
+
+    def search(
+        self,
+        query_embedding: List[float],
+        k: int = 5,
+        document_ids: Optional[Iterable[str]] = None,
+    ) -> List[Dict[str, int | str | float]]:
+        """
+        Return up to `k` nearest chunks ordered by ascending L2 distance.
+
+        When `document_ids` is given, only chunks of those documents are considered.
+        The restriction is applied inside FAISS through an id bitmap, so recall does
+        not suffer the way post-filtering a global top-k would. Small subsets (and
+        PQ indexes, which do not accept id selectors) are scanned exactly instead.
+        """
+        query = np.asarray(query_embedding, dtype="float32").reshape(1, -1)
+        self.refresh()
+
+        with self._lock:
+            if self.index is None or self.index.ntotal == 0 or k <= 0:
+                return []
+            if query.shape[1] != self.index.d:
+                raise ValueError("query dimension does not match index dimension")
+
+            candidates = None
+            if document_ids is not None:
+                candidates = self.ids_for_documents(document_ids)
+                if len(candidates) == 0:
+                    return []
+
+            fetch = k * self.rerank_factor if self.rerank_factor > 0 else k
+            if candidates is None:
+                # Retired vectors can still be nearest; fetch enough to drop them and keep k.
+                retired = self.retired_count
+                distances, ids = self.index.search(query, min(fetch + retired, self.index.ntotal))
+                if retired:
+                    live = np.array([str(int(i)) in self.id_mapping for i in ids[0]], dtype=bool)
+                    distances, ids = distances[:, live][:, :fetch], ids[:, live][:, :fetch]
+            elif len(candidates) <= BRUTE_FORCE_MAX_IDS or isinstance(self.index, faiss.IndexPQ):
+                with self._exact_vectors() as exact:
+                    distances, ids = self._search_subset(query, candidates, k, exact)
+                fetch = k
+            else:
+                distances, ids = self._search_selected(query, candidates, min(fetch, len(candidates)))
+
+            if fetch > k:
+                distances, ids = self._rerank_exact(query, distances, ids, k)
+
+            results: List[Dict[str, int | str | float]] = []
+            for distance, faiss_id in zip(distances[0], ids[0]):
+                item = self.id_mapping.get(str(int(faiss_id)))
+                if faiss_id < 0 or item is None:
+                    continue
+                results.append(
+                    {
+                        "faiss_id": int(faiss_id),
+                        "document_id": item["document_id"],
+                        "chunk_id": item["chunk_id"],
+                        "distance": float(distance),
+                    }
+                )
+        return results
+
+    def reconstruct_vectors(self, start: int, count: int) -> np.ndarray:
+        """Return vectors for ids [start, start + count), at original precision when available."""
+        with self._lock, self._exact_vectors() as exact:
+            if exact is not None and len(exact) >= start + count:
+                return np.array(exact[start:start + count])
+            return self.index.reconstruct_n(start, count)
+
+    @contextmanager
+    def _exact_vectors(self) -> Iterator[Optional[np.ndarray]]:
+        """
+        Yield the side file's rows (a prefix of the ids), or None when there are none to trust.
+
+        Held under the shared lock, since compaction renumbers the file under the
+        exclusive one. Rows from an epoch other than the one this index was loaded
+        at belong to other ids, so they are ignored until the next refresh.
+        """
+        if not os.path.exists(self.vectors_path):
+            yield None
+            return
+        with self._read_lock:
+            dim = self.index.d
+            rows = self._exact_rows(dim)
+            if rows == 0 or self._disk_epoch() != self._epoch:
+                yield None
+            else:
+                yield np.memmap(self.vectors_path, dtype="float32", mode="r", shape=(rows, dim))
+
+    def _disk_epoch(self) -> int:
+        # Unlike _read_generation this leaves the stat alone, so refresh still sees the change.
+        try:
+            with open(self.generation_path, "r", encoding="utf-8") as handle:
+                return int(json.load(handle)["epoch"])
+        except FileNotFoundError:
+            return 0
+
+    def _search_selected(self, query: np.ndarray, candidates: np.ndarray, k: int):
+        bitmap = np.zeros(self.index.ntotal, dtype=bool)
+        bitmap[candidates] = True
+        packed = np.packbits(bitmap, bitorder="little")
+        params = faiss.SearchParameters(sel=faiss.IDSelectorBitmap(len(packed), faiss.swig_ptr(packed)))
+        return self.index.search(query, k, params=params)
+
+    def _search_subset(
+        self, query: np.ndarray, candidates: np.ndarray, k: int, exact: Optional[np.ndarray], block: int = 65536
+    ):
+        """Exact scan over `candidates`, in blocks to bound memory."""
+        if exact is not None and len(exact) < self.index.ntotal:
+            exact = None
+        distances = np.empty(len(candidates), dtype="float32")
+        for start in range(0, len(candidates), block):
+            ids = candidates[start:start + block]
+            rows = np.asarray(exact[ids]) if exact is not None else self.index.reconstruct_batch(ids)
+            distances[start:start + block] = ((rows - query) ** 2).sum(axis=1)
+        best = np.argsort(distances, kind="stable")[:k]
+        return distances[best][None, :], candidates[best][None, :]
+
+    def _rerank_exact(self, query: np.ndarray, distances: np.ndarray, ids: np.ndarray, k: int):
+        """Re-score compressed-distance candidates with the original float32 vectors."""
+        with self._exact_vectors() as exact:
+            if exact is None or len(exact) < self.index.ntotal:
+                return distances[:, :k], ids[:, :k]
+            return self._search_subset(query, ids[0][ids[0] >= 0], k, exact)
+
     def persist(self) -> None:
-        if self.index is not None:
-            faiss.write_index(self.index, self.index_path)
+        """
+        Atomically write pending changes and publish a new generation.
+
+        Raises:
+            StaleIndexError: If another writer published since the changes were
+                made (persist=False calls outside one write-lock hold); writing
+                would drop its vectors
+        """
+        with self._lock, self._write_lock:
+            if not self._dirty:
+                return
+
+            disk = self._read_generation()
+            disk_generation = int(disk["generation"]) if disk else 0
+            if disk_generation > self.generation:
+                raise StaleIndexError(
+                    f"{self.index_path} is at generation {disk_generation}, newer than the "
+                    f"{self.generation} these unsaved changes were made on"
+                )
+
+            if self.index is not None:
+                atomic_write(self.index_path, lambda path: faiss.write_index(self.index, path))
+
+            def write_mapping(path: str) -> None:
+                with open(path, "w", encoding="utf-8") as handle:
+                    json.dump(self.id_mapping, handle)
+
+            atomic_write(self.mapping_path, write_mapping)
+
+            # The generation record is written last: readers that see it can rely on
+            # the index and mapping files it describes already being in place.
+            self.generation = max(self.generation, disk_generation) + 1
+            if self._rebuilt:
+                self._epoch += 1
+            record = {
+                "generation": self.generation,
+                "epoch": self._epoch,
+                "ntotal": self.index.ntotal if self.index is not None else 0,
+                "retired": self.retired_count,
+            }
+
+            def write_generation(path: str) -> None:
+                with open(path, "w", encoding="utf-8") as handle:
+                    json.dump(record, handle)
+
+            atomic_write(self.generation_path, write_generation)
+            self._read_generation()
+            self._dirty = False
+            self._rebuilt = False
 
-        with open(self.mapping_path, "w", encoding="utf-8") as handle:
-            json.dump(self.id_mapping, handle)
+            if self.mmap and self.index is not None:
+                # Drop the private copy in favour of the shared, page-cached mapping.
+                self.index = self._read_index()
 
     def close(self) -> None:
         self.persist()
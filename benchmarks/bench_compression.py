@@ -0,0 +1,99 @@
+"""
+Memory, recall and latency of each FaissVectorStore storage mode.
+
+Vectors are drawn from a seeded Gaussian mixture and L2-normalized, which is
+closer to sentence embeddings than uniform noise. Recall@k is measured against
+exact flat search; memory per vector is the serialized index size divided by
+the vector count (the exact-vector side file lives on disk and is excluded).
+
+    python -m benchmarks.bench_compression --vectors 50000 --dim 384 --k 10
+"""
+import argparse
+import json
+import os
+import tempfile
+import time
+
+import numpy as np
+
+from app.storage.vector_store import FaissVectorStore, faiss
+
+MODES = [
+    ("flat", 0),
+    ("sqfp16", 0),
+    ("sq8", 0),
+    ("sq8", 4),
+    ("pq", 0),
+    ("pq", 4),
+]
+
+
+def make_vectors(count: int, dim: int, seed: int = 0, clusters: int = 64) -> np.ndarray:
+    rng = np.random.default_rng(seed)
+    centers = rng.normal(size=(clusters, dim))
+    vectors = centers[rng.integers(0, clusters, size=count)] + 0.35 * rng.normal(size=(count, dim))
+    vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+    return vectors.astype("float32")
+
+
+def _build(index_path: str, index_type: str, rerank_factor: int, vectors: np.ndarray) -> FaissVectorStore:
+    store = FaissVectorStore(
+        index_path,
+        index_type=index_type,
+        rerank_factor=rerank_factor,
+        train_size=min(len(vectors), 20000),
+    )
+    items = [{"document_id": f"doc-{i}", "chunk_id": 1} for i in range(len(vectors))]
+    for start in range(0, len(vectors), 10000):
+        store.add_embeddings(vectors[start:start + 10000], items[start:start + 10000], persist=False)
+    store.persist()
+    return store
+
+
+def run(count: int, dim: int, queries: int, k: int) -> list:
+    vectors = make_vectors(count, dim)
+    query_vectors = make_vectors(queries, dim, seed=1)
+
+    exact = faiss.IndexFlatL2(dim)
+    exact.add(vectors)
+    _, truth = exact.search(query_vectors, k)
+
+    results = []
+    for index_type, rerank_factor in MODES:
+        with tempfile.TemporaryDirectory() as tmp:
+            store = _build(os.path.join(tmp, "faiss.index"), index_type, rerank_factor, vectors)
+
+            latencies = []
+            hits = 0
+            for row, query in enumerate(query_vectors):
+                started = time.perf_counter()
+                found = store.search(query, k=k)
+                latencies.append((time.perf_counter() - started) * 1000)
+                hits += len({r["faiss_id"] for r in found} & set(truth[row].tolist()))
+
+            results.append(
+                {
+                    "mode": index_type,
+                    "rerank_factor": rerank_factor,
+                    "bytes_per_vector": round(len(faiss.serialize_index(store.index)) / count, 1),
+                    f"recall@{k}": round(hits / (queries * k), 4),
+                    "query_ms_p50": round(float(np.percentile(latencies, 50)), 3),
+                    "query_ms_p95": round(float(np.percentile(latencies, 95)), 3),
+                }
+            )
+    return results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--vectors", type=int, default=50000)
+    parser.add_argument("--dim", type=int, default=384)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--k", type=int, default=10)
+    args = parser.parse_args()
+
+    print(json.dumps(run(args.vectors, args.dim, args.queries, args.k), indent=2))
+
+
+if __name__ == "__main__":
+    main()
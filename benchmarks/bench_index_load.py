@@ -0,0 +1,107 @@
+"""
+Startup cost of FaissVectorStore: eager read vs. memory-mapped load, by index size.
+
+Each load runs in a fresh interpreter. Memory is reported from /proc/self/status
+after the first query as private (RssAnon) and file-backed, page-cache shared
+(RssFile) deltas, so the two modes can be compared per worker (Linux only).
+
+    python -m benchmarks.bench_index_load --sizes 10000,100000,500000 --dim 384
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+
+import numpy as np
+
+_LOAD_PROBE = """
+import json, sys, time
+import numpy as np
+from app.storage.vector_store import FaissVectorStore
+
+def rss():
+    fields = {}
+    with open("/proc/self/status") as handle:
+        for line in handle:
+            key, _, value = line.partition(":")
+            if key in ("RssAnon", "RssFile"):
+                fields[key] = int(value.split()[0]) / 1024
+    return fields
+
+before = rss()
+started = time.perf_counter()
+store = FaissVectorStore(sys.argv[1], mmap=sys.argv[2] == "1")
+load_ms = (time.perf_counter() - started) * 1000
+
+query = np.random.default_rng(0).random(store.index.d, dtype="float32")
+started = time.perf_counter()
+store.search(query, k=10)
+first_query_ms = (time.perf_counter() - started) * 1000
+
+after = rss()
+print(json.dumps({
+    "load_ms": load_ms,
+    "first_query_ms": first_query_ms,
+    "private_mb": after["RssAnon"] - before["RssAnon"],
+    "shared_mb": after["RssFile"] - before["RssFile"],
+}))
+"""
+
+
+def _build_index(index_path: str, size: int, dim: int, batch: int = 50000) -> None:
+    from app.storage.vector_store import FaissVectorStore
+
+    rng = np.random.default_rng(size)
+    store = FaissVectorStore(index_path)
+    for start in range(0, size, batch):
+        count = min(batch, size - start)
+        vectors = rng.random((count, dim), dtype="float32")
+        items = [{"document_id": f"doc-{(start + i) // 100}", "chunk_id": (start + i) % 100 + 1} for i in range(count)]
+        store.add_embeddings(vectors, items, persist=False)
+    store.persist()
+
+
+def _probe(index_path: str, mmap: bool) -> dict:
+    output = subprocess.run(
+        [sys.executable, "-c", _LOAD_PROBE, index_path, "1" if mmap else "0"],
+        check=True,
+        capture_output=True,
+        text=True,
+        env={**os.environ, "PYTHONPATH": os.getcwd()},
+    ).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def run(sizes, dim: int) -> list:
+    results = []
+    for size in sizes:
+        with tempfile.TemporaryDirectory() as tmp:
+            index_path = os.path.join(tmp, "faiss.index")
+            _build_index(index_path, size, dim)
+            row = {
+                "vectors": size,
+                "dim": dim,
+                "index_mb": round(os.path.getsize(index_path) / 2**20, 2),
+                "mapping_mb": round(os.path.getsize(f"{index_path}.mapping.json") / 2**20, 2),
+            }
+            for mode, mmap in (("eager", False), ("mmap", True)):
+                for key, value in _probe(index_path, mmap).items():
+                    row[f"{mode}_{key}"] = round(value, 2)
+            results.append(row)
+    return results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--sizes", default="10000,100000", help="Comma-separated vector counts")
+    parser.add_argument("--dim", type=int, default=384)
+    args = parser.parse_args()
+
+    sizes = [int(s) for s in args.sizes.split(",") if s]
+    print(json.dumps(run(sizes, args.dim), indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,215 @@
+"""
+Ingest throughput, latency percentiles, peak RSS and error rates under rising concurrency.
+
+Starts benchmarks.load_server (the real app with a calibrated fake embedding
+model and real FAISS/SQLite stores in a temporary DATA_DIR) and drives /ingest
+with a seeded mix of PDF and TXT uploads, for --duration seconds at each level
+of --concurrency. Each level reports:
+
+- throughput, in requests/s and uploaded MB/s;
+- p50/p95/p99 latency of successful requests;
+- error rates: requests shed by admission control (429/503) and other failures;
+- the server's peak RSS so far (VmHWM, Linux only).
+
+The saturation point is the first level whose throughput is less than --knee
+above the previous level's.
+
+    python -m benchmarks.bench_load --concurrency 1,2,4,8,16 --duration 20 --pdf-ratio 0.3
+"""
+import argparse
+import asyncio
+import json
+import math
+import os
+import random
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import httpx
+
+from benchmarks.corpus import generate_pdf, generate_text
+
+# (filename, body, content type)
+Upload = Tuple[str, bytes, str]
+
+# Shed by admission control: expected under overload, reported apart from errors.
+SHED_STATUSES = (429, 503)
+
+
+def upload_mix(
+    count: int, pdf_ratio: float, pdf_pages: Sequence[int], txt_chars: Sequence[int], seed: int = 0
+) -> List[Upload]:
+    """Return `count` seeded uploads, a `pdf_ratio` share of them PDFs, sizes drawn uniformly."""
+    rng = random.Random(seed)
+    uploads = []
+    for n in range(count):
+        if rng.random() < pdf_ratio:
+            pages = rng.choice(pdf_pages)
+            uploads.append((f"load-{n}.pdf", generate_pdf(pages, chars_per_page=2000, seed=n), "application/pdf"))
+        else:
+            chars = rng.choice(txt_chars)
+            uploads.append((f"load-{n}.txt", generate_text(chars, seed=n).encode("utf-8"), "text/plain"))
+    return uploads
+
+
+def percentile(samples: Sequence[float], q: float) -> Optional[float]:
+    """Nearest-rank percentile (q in 0..100) of `samples`; None when empty."""
+    if not samples:
+        return None
+    ordered = sorted(samples)
+    return ordered[max(0, math.ceil(q / 100 * len(ordered)) - 1)]
+
+
+def summarize(concurrency: int, outcomes: List[Tuple[int, float, int]], elapsed: float, peak_rss_mb) -> Dict:
+    """Reduce one level's (status, latency seconds, bytes) outcomes to its report row."""
+    ok = [(latency, size) for status, latency, size in outcomes if 200 <= status < 300]
+    shed = sum(1 for status, _, _ in outcomes if status in SHED_STATUSES)
+    failed = len(outcomes) - len(ok) - shed
+    latencies_ms = [latency * 1000 for latency, _ in ok]
+    total = len(outcomes) or 1
+
+    def ms(q: float) -> Optional[float]:
+        value = percentile(latencies_ms, q)
+        return round(value, 1) if value is not None else None
+
+    return {
+        "concurrency": concurrency,
+        "requests": len(outcomes),
+        "throughput_rps": round(len(ok) / elapsed, 2),
+        "throughput_mb_s": round(sum(size for _, size in ok) / 2**20 / elapsed, 3),
+        "p50_ms": ms(50),
+        "p95_ms": ms(95),
+        "p99_ms": ms(99),
+        "shed_rate": round(shed / total, 4),
+        "error_rate": round(failed / total, 4),
+        "peak_rss_mb": peak_rss_mb,
+    }
+
+
+def saturation_point(levels: List[Dict], knee: float) -> Optional[int]:
+    """Concurrency of the first level gaining less than `knee` (a fraction) throughput over the previous."""
+    for previous, level in zip(levels, levels[1:]):
+        if level["throughput_rps"] < previous["throughput_rps"] * (1 + knee):
+            return level["concurrency"]
+    return None
+
+
+def read_peak_rss_mb(pid: int) -> Optional[float]:
+    try:
+        with open(f"/proc/{pid}/status", "r", encoding="utf-8") as handle:
+            for line in handle:
+                if line.startswith("VmHWM:"):
+                    return round(int(line.split()[1]) / 1024, 1)
+    except OSError:
+        pass
+    return None
+
+
+async def drive_level(
+    client: httpx.AsyncClient, uploads: List[Upload], concurrency: int, duration: float
+) -> Tuple[List[Tuple[int, float, int]], float]:
+    """Keep `concurrency` uploads in flight for `duration` seconds, cycling through `uploads`."""
+    outcomes: List[Tuple[int, float, int]] = []
+    next_upload = iter(range(sys.maxsize))
+    deadline = time.perf_counter() + duration
+
+    async def worker() -> None:
+        while time.perf_counter() < deadline:
+            filename, body, content_type = uploads[next(next_upload) % len(uploads)]
+            started = time.perf_counter()
+            try:
+                response = await client.post("/ingest", files={"file": (filename, body, content_type)})
+                status = response.status_code
+            except httpx.HTTPError:
+                status = 0
+            outcomes.append((status, time.perf_counter() - started, len(body)))
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return outcomes, time.perf_counter() - started
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def start_server(data_dir: str, port: int, embed_ms: float, cost_rounds: Optional[int], timeout: float = 60.0):
+    command = [sys.executable, "-m", "benchmarks.load_server", "--data-dir", data_dir, "--port", str(port)]
+    command += ["--cost-rounds", str(cost_rounds)] if cost_rounds is not None else ["--embed-ms", str(embed_ms)]
+    server = subprocess.Popen(command, env={**os.environ, "PYTHONPATH": os.getcwd()})
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if server.poll() is not None:
+            raise RuntimeError(f"load server exited with status {server.returncode}")
+        try:
+            if httpx.get(f"http://127.0.0.1:{port}/health", timeout=1.0).status_code == 200:
+                return server
+        except httpx.HTTPError:
+            pass
+        time.sleep(0.2)
+    server.kill()
+    raise RuntimeError(f"load server did not answer /health within {timeout:.0f}s")
+
+
+async def run(
+    levels: Sequence[int],
+    duration: float,
+    uploads: List[Upload],
+    embed_ms: float,
+    cost_rounds: Optional[int],
+    knee: float,
+) -> Dict:
+    with tempfile.TemporaryDirectory() as data_dir:
+        port = _free_port()
+        server = start_server(data_dir, port, embed_ms, cost_rounds)
+        try:
+            limits = httpx.Limits(max_connections=max(levels), max_keepalive_connections=max(levels))
+            async with httpx.AsyncClient(
+                base_url=f"http://127.0.0.1:{port}", timeout=httpx.Timeout(300.0), limits=limits
+            ) as client:
+                results = []
+                for concurrency in levels:
+                    outcomes, elapsed = await drive_level(client, uploads, concurrency, duration)
+                    results.append(summarize(concurrency, outcomes, elapsed, read_peak_rss_mb(server.pid)))
+                    print(json.dumps(results[-1]), file=sys.stderr)
+        finally:
+            server.terminate()
+            server.wait(timeout=30)
+
+    return {"levels": results, "saturated_at": saturation_point(results, knee)}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--concurrency", default="1,2,4,8,16", help="Comma-separated concurrency levels")
+    parser.add_argument("--duration", type=float, default=20.0, help="Seconds per level")
+    parser.add_argument("--pdf-ratio", type=float, default=0.3, help="Share of uploads that are PDFs")
+    parser.add_argument("--pdf-pages", default="1,5,20", help="PDF sizes to draw from, in pages")
+    parser.add_argument("--txt-chars", default="2000,20000,100000", help="TXT sizes to draw from, in characters")
+    parser.add_argument("--documents", type=int, default=50, help="Distinct uploads to cycle through")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--embed-ms", type=float, default=3.0, help="Calibrated CPU per embedded chunk")
+    parser.add_argument("--cost-rounds", type=int, help="Fixed encoder cost instead of calibrating")
+    parser.add_argument("--knee", type=float, default=0.1, help="Throughput gain below which a level is saturated")
+    args = parser.parse_args()
+
+    uploads = upload_mix(
+        args.documents,
+        args.pdf_ratio,
+        [int(p) for p in args.pdf_pages.split(",") if p],
+        [int(c) for c in args.txt_chars.split(",") if c],
+        seed=args.seed,
+    )
+    levels = [int(c) for c in args.concurrency.split(",") if c]
+    report = asyncio.run(run(levels, args.duration, uploads, args.embed_ms, args.cost_rounds, args.knee))
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
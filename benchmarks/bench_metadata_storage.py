@@ -0,0 +1,87 @@
+"""
+Database size and chunk-read latency of each SQLiteMetadataStore storage mode.
+
+Documents are seeded synthetic text chunked with the service defaults. Size is
+the SQLite file after a WAL checkpoint; read latency fetches `k` random chunks
+per call, as search does when attaching text to its hits.
+
+    python -m benchmarks.bench_metadata_storage --docs 200 --chars 20000 --k 10
+"""
+import argparse
+import json
+import os
+import random
+import tempfile
+import time
+
+import numpy as np
+
+from app.core.chunker import chunk_spans
+from app.storage.metadata_store import SQLiteMetadataStore
+from benchmarks.corpus import generate_text
+
+MODES = [
+    ("inline", "none"),
+    ("offsets", "none"),
+    ("offsets", "zlib"),
+    ("offsets", "zstd"),
+]
+
+
+def run(docs: int, chars: int, reads: int, k: int) -> list:
+    documents = [chunk_spans(generate_text(chars, seed=n)) for n in range(docs)]
+    rng = random.Random(0)
+    lookups = [
+        [(f"doc-{d}", rng.randint(1, len(documents[d]))) for d in (rng.randrange(docs) for _ in range(k))]
+        for _ in range(reads)
+    ]
+
+    results = []
+    for storage_mode, compression in MODES:
+        with tempfile.TemporaryDirectory() as tmp:
+            db_path = os.path.join(tmp, "metadata.db")
+            try:
+                store = SQLiteMetadataStore(db_path, storage_mode=storage_mode, text_compression=compression)
+            except RuntimeError as exc:
+                results.append({"mode": storage_mode, "compression": compression, "skipped": str(exc)})
+                continue
+
+            started = time.perf_counter()
+            for number, spans in enumerate(documents):
+                store.save_chunks(f"doc-{number}", spans)
+            save_s = time.perf_counter() - started
+            store.conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+
+            latencies = []
+            for keys in lookups:
+                started = time.perf_counter()
+                store.get_chunk_texts(keys)
+                latencies.append((time.perf_counter() - started) * 1000)
+            store.close()
+
+            results.append(
+                {
+                    "mode": storage_mode,
+                    "compression": compression,
+                    "db_bytes": os.path.getsize(db_path),
+                    "save_s": round(save_s, 3),
+                    f"read{k}_ms_p50": round(float(np.percentile(latencies, 50)), 3),
+                    f"read{k}_ms_p95": round(float(np.percentile(latencies, 95)), 3),
+                }
+            )
+    return results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--docs", type=int, default=200)
+    parser.add_argument("--chars", type=int, default=20000)
+    parser.add_argument("--reads", type=int, default=500)
+    parser.add_argument("--k", type=int, default=10)
+    args = parser.parse_args()
+
+    print(json.dumps(run(args.docs, args.chars, args.reads, args.k), indent=2))
+
+
+if __name__ == "__main__":
+    main()
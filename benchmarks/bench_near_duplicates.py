@@ -0,0 +1,119 @@
+"""
+Skip rate, embedding time and vector fidelity of near-duplicate detection.
+
+Each synthetic page is unique body text framed by a boilerplate header and
+footer whose date and page number change; every fifth page is a legal notice
+that differs between documents only in its dates. Pages are chunked with the
+service defaults and embedded with a HashingEncoder whose `--cost-rounds`
+stand in for model time. Fidelity is the cosine similarity, under a plain
+bag-of-words HashingEncoder, between each chunk's vector and the one it reused;
+the minimum shows the worst substitution each threshold allows.
+
+    python -m benchmarks.bench_near_duplicates --docs 20 --pages 20
+"""
+import argparse
+import json
+import random
+import time
+
+import numpy as np
+
+from app.core.chunker import chunk_spans
+from app.core.near_duplicates import NearDuplicateIndex, embed_skipping_near_duplicates
+from benchmarks.corpus import generate_text
+from benchmarks.fakes import hashing_embedding_model
+
+THRESHOLDS = [None, 0.95, 0.9, 0.85, 0.8, 0.75]
+
+HEADER = "ACME PUMPS LTD - TECHNICAL MANUAL - REVISION {rev} - ISSUED {date}\n\n"
+FOOTER = (
+    "\n\nConfidential and proprietary. This document is the property of Acme Pumps Ltd and may not be "
+    "copied, distributed, reproduced or disclosed to any third party without the prior written consent "
+    "of the company. All specifications are subject to change without notice. Page {page} of {pages}.\n\n"
+)
+NOTICE = " ".join(
+    [
+        "IMPORTANT NOTICE. The information in this manual was correct at the time of issue on {date}.",
+        "Installation, commissioning and maintenance must be carried out by qualified personnel in accordance",
+        "with local regulations and the safety instructions supplied with the equipment. Failure to observe",
+        "these instructions may result in personal injury, damage to property and loss of warranty. The",
+        "warranty period is twelve months from the date of commissioning or eighteen months from the date of",
+        "delivery, whichever is sooner. Claims must be notified in writing within fourteen days of the defect",
+        "becoming apparent. Wearing parts, consumables and damage caused by misuse, incorrect installation or",
+        "operation outside the rated conditions are excluded. Spare parts remain available for ten years",
+        "after the product is discontinued. Contact your regional service centre quoting the serial number.",
+    ]
+)
+
+
+def make_documents(docs: int, pages: int, body_chars: int, seed: int = 0) -> list:
+    rng = random.Random(seed)
+    documents = []
+    for _ in range(docs):
+        date = f"2024-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d}"
+        rev = rng.randint(1, 9)
+        documents.append(
+            "".join(
+                HEADER.format(rev=rev, date=date)
+                + (NOTICE.format(date=date) if page % 5 == 0 else generate_text(body_chars, seed=rng.randrange(2**31)))
+                + FOOTER.format(page=page, pages=pages)
+                for page in range(1, pages + 1)
+            )
+        )
+    return documents
+
+
+def run(docs: int, pages: int, body_chars: int, cost_rounds: int) -> list:
+    model = hashing_embedding_model(cost_rounds=cost_rounds)
+    # The extra rounds scramble vectors, so fidelity is judged on the bag-of-words encoding.
+    reference = hashing_embedding_model()
+    chunked = [chunk_spans(text).texts() for text in make_documents(docs, pages, body_chars)]
+    total = sum(len(texts) for texts in chunked)
+
+    results = []
+    for threshold in THRESHOLDS:
+        index = NearDuplicateIndex(threshold) if threshold else None
+        skipped = 0
+        pairs = []
+        started = time.perf_counter()
+        for texts in chunked:
+            if index is None:
+                model.embed_texts(texts)
+                continue
+            # Carry each vector's source text along so reuse can be scored afterwards.
+            embeddings, document_skipped = embed_skipping_near_duplicates(
+                texts, lambda batch: list(zip(model.embed_texts(batch), batch)), index
+            )
+            skipped += document_skipped
+            pairs.extend((text, source) for text, (_, source) in zip(texts, embeddings) if source != text)
+        elapsed = time.perf_counter() - started
+
+        fidelity = [
+            float(np.dot(*reference.embed_texts([text, source]))) for text, source in pairs
+        ]
+        results.append(
+            {
+                "threshold": threshold,
+                "chunks": total,
+                "skip_rate": round(skipped / total, 4),
+                "embed_s": round(elapsed, 3),
+                "cosine_mean": round(float(np.mean(fidelity)), 4) if fidelity else 1.0,
+                "cosine_min": round(float(np.min(fidelity)), 4) if fidelity else 1.0,
+            }
+        )
+    return results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--docs", type=int, default=20)
+    parser.add_argument("--pages", type=int, default=20)
+    parser.add_argument("--body-chars", type=int, default=1200)
+    parser.add_argument("--cost-rounds", type=int, default=40, help="Extra encoder work per text")
+    args = parser.parse_args()
+
+    print(json.dumps(run(args.docs, args.pages, args.body_chars, args.cost_rounds), indent=2))
+
+
+if __name__ == "__main__":
+    main()
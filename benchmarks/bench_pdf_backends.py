@@ -0,0 +1,81 @@
+"""
+Extraction speed and parity of every installed PDF backend on a fixture corpus.
+
+The corpus is seeded synthetic PDFs of several sizes plus any PDFs passed with
+--pdf. Each backend's normalized output is compared with pypdf's, word by word;
+`min_similarity` is the worst document. The recommended backend is the fastest
+whose similarity stays at or above --min-similarity on every document.
+
+    python -m benchmarks.bench_pdf_backends --repeat 5
+    python -m benchmarks.bench_pdf_backends --pdf manual.pdf --pdf scan.pdf --min-similarity 0.98
+"""
+import argparse
+import difflib
+import json
+import os
+import statistics
+import time
+from typing import Dict, List, Tuple
+
+from app.core.document_loader import PDF_BACKENDS, available_pdf_backends, load_pdf
+from benchmarks.corpus import generate_pdf
+
+REFERENCE_BACKEND = "pypdf"
+
+
+def fixture_corpus(extra_paths: List[str]) -> List[Tuple[str, bytes]]:
+    corpus = [
+        (f"synthetic-{pages}p", generate_pdf(pages, chars_per_page=2000, seed=pages)) for pages in (1, 10, 50)
+    ]
+    for path in extra_paths:
+        with open(path, "rb") as handle:
+            corpus.append((os.path.basename(path), handle.read()))
+    return corpus
+
+
+def similarity(reference: str, candidate: str) -> float:
+    """Word-level similarity in [0, 1]; layout whitespace differences do not count."""
+    return difflib.SequenceMatcher(None, reference.split(), candidate.split(), autojunk=False).ratio()
+
+
+def run(corpus: List[Tuple[str, bytes]], repeat: int, min_similarity: float) -> Dict:
+    backends = available_pdf_backends()
+    reference = {name: load_pdf(data, backend=REFERENCE_BACKEND) for name, data in corpus}
+    pages = sum(len(PDF_BACKENDS[REFERENCE_BACKEND][1](data)) for _, data in corpus)
+
+    results = []
+    for backend in backends:
+        timings = []
+        for _ in range(repeat):
+            started = time.perf_counter()
+            texts = {name: load_pdf(data, backend=backend) for name, data in corpus}
+            timings.append(time.perf_counter() - started)
+        scores = {name: round(similarity(reference[name], texts[name]), 4) for name in texts}
+        median = statistics.median(timings)
+        results.append(
+            {
+                "backend": backend,
+                "median_s": round(median, 4),
+                "pages_per_s": round(pages / median, 1) if median else None,
+                "min_similarity": min(scores.values()),
+                "similarity": scores,
+            }
+        )
+
+    eligible = [row for row in results if row["min_similarity"] >= min_similarity]
+    recommended = min(eligible, key=lambda row: row["median_s"])["backend"] if eligible else REFERENCE_BACKEND
+    return {"documents": len(corpus), "backends": results, "recommended": recommended}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--pdf", action="append", default=[], help="Extra fixture PDF (repeatable)")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--min-similarity", type=float, default=0.98)
+    args = parser.parse_args()
+
+    print(json.dumps(run(fixture_corpus(args.pdf), args.repeat, args.min_similarity), indent=2))
+
+
+if __name__ == "__main__":
+    main()
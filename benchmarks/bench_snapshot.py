@@ -0,0 +1,129 @@
+"""
+Snapshot and restore throughput, and restore peak memory, by corpus size.
+
+Each corpus is `size` random vectors in documents of 100 chunks, with inline
+chunk texts. Create runs in-process; restore runs in a fresh interpreter so its
+peak RSS (ru_maxrss) covers only the restore. Throughput is in vectors/s and
+in snapshot MB/s.
+
+    python -m benchmarks.bench_snapshot --sizes 10000,100000 --dim 384
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+from benchmarks.corpus import generate_text
+
+CHUNKS_PER_DOCUMENT = 100
+
+_RESTORE_PROBE = """
+import json, resource, sys, time
+from app.storage.snapshot import restore_snapshot
+
+started = time.perf_counter()
+counts = restore_snapshot(sys.argv[1], sys.argv[2], sys.argv[3], batch_size=int(sys.argv[4]))
+print(json.dumps({
+    "restore_s": time.perf_counter() - started,
+    "restore_peak_rss_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+    "counts": counts,
+}))
+"""
+
+
+def _build_stores(index_path: str, db_path: str, size: int, dim: int, batch: int = 50000) -> None:
+    from app.storage.metadata_store import SQLiteMetadataStore
+    from app.storage.vector_store import FaissVectorStore
+
+    rng = np.random.default_rng(size)
+    vectors = FaissVectorStore(index_path)
+    for start in range(0, size, batch):
+        count = min(batch, size - start)
+        items = [
+            {"document_id": f"doc-{(start + i) // CHUNKS_PER_DOCUMENT}", "chunk_id": (start + i) % CHUNKS_PER_DOCUMENT + 1}
+            for i in range(count)
+        ]
+        vectors.add_embeddings(rng.random((count, dim), dtype="float32"), items, persist=False)
+    vectors.persist()
+    vectors.close()
+
+    metadata = SQLiteMetadataStore(db_path)
+    text = generate_text(400, seed=size)
+    for document in range((size + CHUNKS_PER_DOCUMENT - 1) // CHUNKS_PER_DOCUMENT):
+        chunks = min(CHUNKS_PER_DOCUMENT, size - document * CHUNKS_PER_DOCUMENT)
+        metadata.save_document(f"doc-{document}", f"doc-{document}.txt", "2025-01-01T00:00:00+00:00", chunks, "m")
+        metadata.save_chunks(f"doc-{document}", [{"chunk_id": i + 1, "text": text} for i in range(chunks)])
+    metadata.close()
+
+
+def _directory_mb(path: str) -> float:
+    return sum(entry.stat().st_size for entry in os.scandir(path)) / 2**20
+
+
+def run(sizes, dim: int, batch_size: int) -> list:
+    from app.storage.snapshot import create_snapshot
+
+    results = []
+    for size in sizes:
+        with tempfile.TemporaryDirectory() as tmp:
+            index_path, db_path = os.path.join(tmp, "faiss.index"), os.path.join(tmp, "metadata.db")
+            _build_stores(index_path, db_path, size, dim)
+            snapshot_dir = os.path.join(tmp, "snapshot")
+
+            started = time.perf_counter()
+            create_snapshot(index_path, db_path, snapshot_dir, batch_size=batch_size)
+            create_s = time.perf_counter() - started
+            snapshot_mb = _directory_mb(snapshot_dir)
+
+            os.makedirs(os.path.join(tmp, "restored"))
+            output = subprocess.run(
+                [
+                    sys.executable,
+                    "-c",
+                    _RESTORE_PROBE,
+                    snapshot_dir,
+                    os.path.join(tmp, "restored", "faiss.index"),
+                    os.path.join(tmp, "restored", "metadata.db"),
+                    str(batch_size),
+                ],
+                check=True,
+                capture_output=True,
+                text=True,
+                env={**os.environ, "PYTHONPATH": os.getcwd()},
+            ).stdout
+            restore = json.loads(output.strip().splitlines()[-1])
+            results.append(
+                {
+                    "vectors": size,
+                    "dim": dim,
+                    "snapshot_mb": round(snapshot_mb, 2),
+                    "create_s": round(create_s, 3),
+                    "create_vectors_per_s": round(size / create_s),
+                    "create_mb_per_s": round(snapshot_mb / create_s, 1),
+                    "restore_s": round(restore["restore_s"], 3),
+                    "restore_vectors_per_s": round(size / restore["restore_s"]),
+                    "restore_mb_per_s": round(snapshot_mb / restore["restore_s"], 1),
+                    "restore_peak_rss_mb": round(restore["restore_peak_rss_mb"], 1),
+                }
+            )
+    return results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--sizes", default="10000,100000", help="Comma-separated vector counts")
+    parser.add_argument("--dim", type=int, default=384)
+    parser.add_argument("--batch-size", type=int, default=65536)
+    args = parser.parse_args()
+
+    sizes = [int(s) for s in args.sizes.split(",") if s]
+    print(json.dumps(run(sizes, args.dim, args.batch_size), indent=2))
+
+
+if __name__ == "__main__":
+    main()
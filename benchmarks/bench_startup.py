@@ -0,0 +1,176 @@
+"""
+Startup cost of the service: `import app.main` and time to the first /health response.
+
+Each run is a fresh interpreter. Import time comes from `-X importtime` (the
+cumulative time of `app.main`); the slowest imports of the last run are listed
+so a regression can be traced to a module. Time to first /health covers the
+whole process: interpreter start, imports, the lifespan startup (storage
+opened on a temporary data directory) and one request through a TestClient.
+With --budget-ms the run exits non-zero if the median import time exceeds it.
+
+Absolute times depend on the machine, so CI gates on a ratio instead: each run
+also imports the storage and parsing dependencies eagerly before `app.main`,
+as startup did before they were deferred, and --max-ratio fails the run when
+the lazy import takes more than that fraction of the eager one, or when any
+heavy module loads at import.
+
+    python -m benchmarks.bench_startup --runs 5 --budget-ms 800
+    python -m benchmarks.bench_startup --runs 3 --max-ratio 0.85
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+# Dependencies that should only load once a request needs them.
+HEAVY_MODULES = ("faiss", "numpy", "pypdf", "sentence_transformers")
+
+# Imported up front by the eager reference run (the embedding model is left
+# out: it would dwarf everything else and hide a regression in the rest).
+EAGER_MODULES = ("numpy", "faiss", "pypdf")
+
+_HEALTH_PROBE = """
+import sys
+from fastapi.testclient import TestClient
+import app.main as main
+
+with TestClient(main.app) as client:
+    assert client.get("/health").status_code == 200
+    print(" ".join(m for m in sys.argv[1:] if m in sys.modules))
+"""
+
+_IMPORT_PROBE = """
+import sys
+import app.main
+print(" ".join(m for m in sys.argv[1:] if m in sys.modules))
+"""
+
+_EAGER_PROBE = """
+import sys
+for name in sys.argv[1:]:
+    try:
+        __import__(name)  # unlike importlib.import_module, reported by -X importtime
+    except ImportError:
+        pass
+import app.main
+"""
+
+
+def _env(data_dir: str) -> dict:
+    return {
+        **os.environ,
+        "PYTHONPATH": os.getcwd(),
+        "DISABLE_EMBEDDINGS": "1",
+        "DISABLE_STORAGE": "0",
+        "DATA_DIR": data_dir,
+        "FAISS_INDEX_PATH": os.path.join(data_dir, "faiss.index"),
+        "SQLITE_DB_PATH": os.path.join(data_dir, "metadata.db"),
+    }
+
+
+def parse_importtime(stderr: str) -> dict:
+    """Map module name -> cumulative import time in ms from `-X importtime` output."""
+    cumulative = {}
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, _, total_us, name = (part.strip() for part in line.replace("import time:", "|").split("|"))
+        cumulative[name] = int(total_us) / 1000
+    return cumulative
+
+
+def measure_import(data_dir: str) -> tuple:
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", _IMPORT_PROBE, *HEAVY_MODULES],
+        check=True,
+        capture_output=True,
+        text=True,
+        env=_env(data_dir),
+    )
+    return parse_importtime(result.stderr), result.stdout.split()
+
+
+def measure_eager_import(data_dir: str) -> float:
+    """Milliseconds to import EAGER_MODULES (those installed) and then `app.main`."""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", _EAGER_PROBE, *EAGER_MODULES],
+        check=True,
+        capture_output=True,
+        text=True,
+        env=_env(data_dir),
+    )
+    cumulative = parse_importtime(result.stderr)
+    return cumulative["app.main"] + sum(cumulative.get(name, 0.0) for name in EAGER_MODULES)
+
+
+def measure_first_health(data_dir: str) -> tuple:
+    started = time.perf_counter()
+    result = subprocess.run(
+        [sys.executable, "-c", _HEALTH_PROBE, *HEAVY_MODULES],
+        check=True,
+        capture_output=True,
+        text=True,
+        env=_env(data_dir),
+    )
+    return (time.perf_counter() - started) * 1000, result.stdout.split()
+
+
+def run(runs: int, top: int) -> dict:
+    import_ms, eager_ms, health_ms = [], [], []
+    with tempfile.TemporaryDirectory() as tmp:
+        for _ in range(runs):
+            cumulative, loaded_at_import = measure_import(tmp)
+            import_ms.append(cumulative["app.main"])
+            eager_ms.append(measure_eager_import(tmp))
+            elapsed, loaded_at_health = measure_first_health(tmp)
+            health_ms.append(elapsed)
+
+    cumulative.pop("app.main")
+    slowest = sorted(cumulative.items(), key=lambda item: item[1], reverse=True)[:top]
+    return {
+        "runs": runs,
+        "import_ms_median": round(statistics.median(import_ms), 1),
+        "import_ms_min": round(min(import_ms), 1),
+        "eager_import_ms_median": round(statistics.median(eager_ms), 1),
+        "import_ratio": round(statistics.median(import_ms) / statistics.median(eager_ms), 3),
+        "first_health_ms_median": round(statistics.median(health_ms), 1),
+        "heavy_modules_after_import": loaded_at_import,
+        "heavy_modules_after_startup": loaded_at_health,
+        "slowest_imports_ms": {name: round(ms, 1) for name, ms in slowest},
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--top", type=int, default=10, help="Slowest imports to list")
+    parser.add_argument("--budget-ms", type=float, default=None, help="Fail if median import time exceeds this")
+    parser.add_argument(
+        "--max-ratio", type=float, default=None, help="Fail if import time exceeds this fraction of the eager import"
+    )
+    args = parser.parse_args()
+
+    result = run(args.runs, args.top)
+    print(json.dumps(result, indent=2))
+    failures = []
+    if args.budget_ms is not None and result["import_ms_median"] > args.budget_ms:
+        failures.append(f"import app.main took {result['import_ms_median']} ms, over the {args.budget_ms} ms budget")
+    if args.max_ratio is not None:
+        if result["import_ratio"] > args.max_ratio:
+            failures.append(
+                f"import app.main took {result['import_ratio']:.0%} of the eager import, over {args.max_ratio:.0%}"
+            )
+        if result["heavy_modules_after_import"]:
+            failures.append(f"import app.main loaded {', '.join(result['heavy_modules_after_import'])}")
+    for failure in failures:
+        print(failure, file=sys.stderr)
+    if failures:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
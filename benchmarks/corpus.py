@@ -0,0 +1,120 @@
+"""
+Seeded synthetic corpora for benchmarks: plain text and multi-page PDFs.
+
+The same seed always yields byte-identical output, so timings are comparable
+across runs and machines. PDFs are written directly (Helvetica text, one content
+stream per page) and parse with any conforming reader, including pypdf.
+
+    python -m benchmarks.corpus --out /tmp/corpus --docs 20 --pages 10 --seed 7
+"""
+import argparse
+import os
+import random
+import textwrap
+from typing import List
+
+_VOCABULARY = (
+    "the of and to in is for that with on as by at from this be are or an it was which "
+    "ingestion document vector index chunk embedding retrieval query latency throughput "
+    "storage service request response model pipeline metadata shard page section table "
+    "figure customer invoice contract clause warranty pump valve sensor controller fault"
+).split()
+
+
+def generate_text(num_chars: int, seed: int = 0) -> str:
+    """Return roughly `num_chars` of prose-like text with sentences and paragraphs."""
+    rng = random.Random(seed)
+    parts: List[str] = []
+    length = 0
+    while length < num_chars:
+        sentence = " ".join(rng.choice(_VOCABULARY) for _ in range(rng.randint(6, 18)))
+        sentence = sentence[0].upper() + sentence[1:] + "."
+        if rng.random() < 0.05:
+            sentence += f" Code ERR-{rng.randint(1000, 9999)}."
+        parts.append(sentence)
+        parts.append("\n\n" if rng.random() < 0.15 else " ")
+        length += len(sentence) + 1
+    return "".join(parts)[:num_chars]
+
+
+def _pdf_escape(line: str) -> str:
+    return line.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)")
+
+
+def generate_pdf(pages: int, chars_per_page: int = 2000, seed: int = 0) -> bytes:
+    """Return a PDF with `pages` pages of seeded text."""
+    rng = random.Random(seed)
+    objects: List[bytes] = []
+
+    def add(body: bytes) -> int:
+        objects.append(body)
+        return len(objects)
+
+    catalog = add(b"")
+    pages_obj = add(b"")
+    font = add(b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>")
+
+    page_ids = []
+    for _ in range(pages):
+        text = generate_text(chars_per_page, seed=rng.randrange(2**31))
+        lines = textwrap.wrap(text, 90)
+        stream = "BT /F1 10 Tf 12 TL 40 800 Td " + " ".join(f"({_pdf_escape(line)}) '" for line in lines) + " ET"
+        data = stream.encode("latin-1")
+        content = add(b"<< /Length %d >>\nstream\n" % len(data) + data + b"\nendstream")
+        page_ids.append(
+            add(
+                b"<< /Type /Page /Parent %d 0 R /MediaBox [0 0 595 842] "
+                b"/Resources << /Font << /F1 %d 0 R >> >> /Contents %d 0 R >>" % (pages_obj, font, content)
+            )
+        )
+
+    objects[catalog - 1] = b"<< /Type /Catalog /Pages %d 0 R >>" % pages_obj
+    kids = b" ".join(b"%d 0 R" % page for page in page_ids)
+    objects[pages_obj - 1] = b"<< /Type /Pages /Kids [%s] /Count %d >>" % (kids, len(page_ids))
+
+    out = bytearray(b"%PDF-1.4\n")
+    offsets = []
+    for number, body in enumerate(objects, start=1):
+        offsets.append(len(out))
+        out += b"%d 0 obj\n" % number + body + b"\nendobj\n"
+
+    xref = len(out)
+    out += b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1)
+    for offset in offsets:
+        out += b"%010d 00000 n \n" % offset
+    out += b"trailer\n<< /Size %d /Root %d 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (len(objects) + 1, catalog, xref)
+    return bytes(out)
+
+
+def write_corpus(out_dir: str, docs: int, pages: int, chars_per_page: int = 2000, seed: int = 0) -> List[str]:
+    """Write `docs` TXT and `docs` PDF files to `out_dir`; returns their paths."""
+    os.makedirs(out_dir, exist_ok=True)
+    rng = random.Random(seed)
+    paths = []
+    for n in range(docs):
+        doc_seed = rng.randrange(2**31)
+        txt_path = os.path.join(out_dir, f"doc-{n:04d}.txt")
+        with open(txt_path, "w", encoding="utf-8") as handle:
+            handle.write(generate_text(pages * chars_per_page, seed=doc_seed))
+        pdf_path = os.path.join(out_dir, f"doc-{n:04d}.pdf")
+        with open(pdf_path, "wb") as handle:
+            handle.write(generate_pdf(pages, chars_per_page, seed=doc_seed))
+        paths.extend([txt_path, pdf_path])
+    return paths
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--out", required=True)
+    parser.add_argument("--docs", type=int, default=10)
+    parser.add_argument("--pages", type=int, default=5)
+    parser.add_argument("--chars-per-page", type=int, default=2000)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    paths = write_corpus(args.out, args.docs, args.pages, args.chars_per_page, args.seed)
+    print(f"Wrote {len(paths)} files to {args.out}")
+
+
+if __name__ == "__main__":
+    main()
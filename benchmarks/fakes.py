@@ -0,0 +1,65 @@
+"""Deterministic stand-ins for heavy dependencies used by the benchmarks."""
+import hashlib
+import re
+import time
+from typing import List
+
+import numpy as np
+
+from app.core.embedding_model import EmbeddingModel
+
+_TOKEN = re.compile(r"\w+")
+
+
+class HashingEncoder:
+    """
+    SentenceTransformer-compatible encoder built on feature hashing.
+
+    Texts sharing tokens get similar vectors, output is identical across runs and
+    machines, and no model download is needed. `cost_rounds` adds a calibrated
+    amount of matrix work per text so that benchmarks can approximate the CPU
+    profile of a real model without its variance.
+    """
+
+    def __init__(self, dim: int = 384, cost_rounds: int = 0) -> None:
+        self.dim = dim
+        self.cost_rounds = cost_rounds
+        self._mix = np.random.default_rng(0).standard_normal((dim, dim)).astype("float32") / np.sqrt(dim)
+
+    def _bucket(self, token: str) -> int:
+        return int.from_bytes(hashlib.blake2b(token.encode("utf-8"), digest_size=8).digest(), "little") % self.dim
+
+    def encode(self, texts: List[str], convert_to_numpy: bool = True, **_: object) -> np.ndarray:
+        out = np.zeros((len(texts), self.dim), dtype="float32")
+        for row, text in enumerate(texts):
+            for token in _TOKEN.findall(text.lower()):
+                out[row, self._bucket(token)] += 1.0
+        for _ in range(self.cost_rounds):
+            out = np.tanh(out @ self._mix)
+        return out
+
+
+def hashing_embedding_model(dim: int = 384, cost_rounds: int = 0) -> EmbeddingModel:
+    """Return a real EmbeddingModel wrapper whose underlying model is a HashingEncoder."""
+    model = EmbeddingModel(model_name=f"hashing-{dim}")
+    model._model = HashingEncoder(dim=dim, cost_rounds=cost_rounds)
+    return model
+
+
+def calibrate_cost_rounds(ms_per_text: float, dim: int = 384, sample: int = 64) -> int:
+    """
+    Return the `cost_rounds` at which a HashingEncoder spends about `ms_per_text`
+    of CPU per text on this machine (e.g. ~3 ms for all-MiniLM-L6-v2 on one core).
+    """
+    texts = [f"calibration text {n} " * 40 for n in range(sample)]
+
+    def per_text_ms(rounds: int) -> float:
+        encoder = HashingEncoder(dim=dim, cost_rounds=rounds)
+        encoder.encode(texts)  # warm-up
+        started = time.perf_counter()
+        encoder.encode(texts)
+        return (time.perf_counter() - started) * 1000 / sample
+
+    base, probe_rounds = per_text_ms(0), 64
+    per_round = max((per_text_ms(probe_rounds) - base) / probe_rounds, 1e-6)
+    return max(0, round((ms_per_text - base) / per_round))
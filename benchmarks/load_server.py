@@ -0,0 +1,45 @@
+"""
+Run the real service under uvicorn with a deterministic embedding model, for load tests.
+
+The app, admission control and FAISS/SQLite stores are the production code; only
+the embedding model is replaced by a HashingEncoder whose CPU cost per text is
+calibrated to --embed-ms (or fixed with --cost-rounds). Storage goes to
+--data-dir, which should be a fresh directory. Started by bench_load, or by hand:
+
+    python -m benchmarks.load_server --data-dir /tmp/load --port 8765 --embed-ms 3
+"""
+import argparse
+import os
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--data-dir", required=True)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--embed-ms", type=float, default=3.0, help="Target CPU per embedded chunk")
+    parser.add_argument("--cost-rounds", type=int, help="Skip calibration and use this many rounds")
+    args = parser.parse_args()
+
+    # Settings are read from the environment when the app starts: point every
+    # store at the data directory and keep storage and embeddings enabled.
+    os.environ["DATA_DIR"] = args.data_dir
+    os.environ["FAISS_INDEX_PATH"] = os.path.join(args.data_dir, "faiss.index")
+    os.environ["SQLITE_DB_PATH"] = os.path.join(args.data_dir, "metadata.db")
+    os.environ["DISABLE_STORAGE"] = "0"
+    os.environ["DISABLE_EMBEDDINGS"] = "0"
+
+    import uvicorn
+
+    import app.main as main_module
+    from benchmarks.fakes import calibrate_cost_rounds, hashing_embedding_model
+
+    cost_rounds = args.cost_rounds if args.cost_rounds is not None else calibrate_cost_rounds(args.embed_ms)
+    main_module.load_embedding_model = lambda *_, **__: hashing_embedding_model(cost_rounds=cost_rounds)
+    print(f"hashing embedding model: cost_rounds={cost_rounds}", flush=True)
+
+    uvicorn.run(main_module.app, host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,220 @@
+"""
+Micro-benchmark suite for the ingestion pipeline components.
+
+Every component runs at several input scales on seeded synthetic data. Results
+are written as JSON. With --compare, the run is checked against an earlier
+run's output and exits non-zero if any case's median time regressed by more
+than --threshold. Timings only compare on the same machine, so no baseline is
+kept in the repo: record one from a checkout of the base revision first.
+
+    git worktree add ../base <base-rev>
+    (cd ../base && python -m benchmarks.run --output ../base.json)
+    git worktree remove ../base
+    python -m benchmarks.run --output bench.json --compare ../base.json --threshold 0.2
+    python -m benchmarks.run --quick --only chunk_text,normalize_text
+"""
+import argparse
+import json
+import os
+import platform
+import statistics
+import sys
+import tempfile
+import time
+from typing import Callable, Dict, List, Optional
+
+import numpy as np
+
+from benchmarks.corpus import generate_pdf, generate_text
+from benchmarks.fakes import hashing_embedding_model
+
+# name -> (factory(scale) -> run callable, scales, unit)
+BENCHMARKS: Dict[str, tuple] = {}
+
+
+def benchmark(name: str, scales: List[int], unit: str):
+    """
+    Register a benchmark. The factory does untimed setup for one scale and returns
+    a callable to time; the callable may return its own elapsed seconds when only
+    part of it should be measured.
+    """
+
+    def register(factory: Callable[[int], Callable[[], Optional[float]]]):
+        BENCHMARKS[name] = (factory, scales, unit)
+        return factory
+
+    return register
+
+
+@benchmark("normalize_text", scales=[10_000, 100_000, 1_000_000], unit="chars")
+def _normalize_text(scale: int):
+    from app.core.document_loader import _normalize_text
+
+    raw = generate_text(scale, seed=scale).replace(". ", ".  \r\n").replace("\n\n", "\r\n\r\n\r\n")
+    return lambda: _normalize_text(raw)
+
+
+@benchmark("chunk_text", scales=[10_000, 100_000, 1_000_000], unit="chars")
+def _chunk_text(scale: int):
+    from app.core.chunker import chunk_text
+
+    text = generate_text(scale, seed=scale)
+    return lambda: chunk_text(text)
+
+
+@benchmark("chunk_spans", scales=[10_000, 100_000, 1_000_000], unit="chars")
+def _chunk_spans(scale: int):
+    from app.core.chunker import chunk_spans
+
+    text = generate_text(scale, seed=scale)
+    return lambda: chunk_spans(text)
+
+
+@benchmark("load_pdf", scales=[1, 10, 50], unit="pages")
+def _load_pdf(scale: int):
+    from app.core.document_loader import load_pdf
+
+    data = generate_pdf(scale, chars_per_page=2000, seed=scale)
+    return lambda: load_pdf(data)
+
+
+@benchmark("embed_texts", scales=[16, 128, 512], unit="texts")
+def _embed_texts(scale: int):
+    model = hashing_embedding_model()
+    texts = [generate_text(500, seed=n) for n in range(scale)]
+    return lambda: model.embed_texts(texts)
+
+
+@benchmark("add_embeddings", scales=[1_000, 10_000, 50_000], unit="vectors")
+def _add_embeddings(scale: int):
+    from app.storage.vector_store import FaissVectorStore
+
+    vectors = np.random.default_rng(scale).random((scale, 384), dtype="float32")
+    items = [{"document_id": f"doc-{n // 50}", "chunk_id": n % 50 + 1} for n in range(scale)]
+
+    def run() -> float:
+        with tempfile.TemporaryDirectory() as tmp:
+            store = FaissVectorStore(os.path.join(tmp, "faiss.index"))
+            started = time.perf_counter()
+            store.add_embeddings(vectors, items)
+            return time.perf_counter() - started
+
+    return run
+
+
+@benchmark("save_chunks", scales=[100, 1_000, 10_000], unit="chunks")
+def _save_chunks(scale: int):
+    from app.storage.metadata_store import SQLiteMetadataStore
+
+    chunks = [{"chunk_id": n + 1, "text": generate_text(500, seed=n)} for n in range(scale)]
+
+    def run() -> float:
+        with tempfile.TemporaryDirectory() as tmp:
+            store = SQLiteMetadataStore(os.path.join(tmp, "metadata.db"))
+            started = time.perf_counter()
+            store.save_chunks("doc", chunks)
+            elapsed = time.perf_counter() - started
+            store.close()
+            return elapsed
+
+    return run
+
+
+def _time_case(run: Callable[[], Optional[float]], repeats: int) -> List[float]:
+    run()  # warm-up: imports, caches, allocator
+    samples = []
+    for _ in range(repeats):
+        started = time.perf_counter()
+        measured = run()
+        samples.append(measured if isinstance(measured, float) else time.perf_counter() - started)
+    return samples
+
+
+def run_suite(only: Optional[List[str]] = None, quick: bool = False, repeats: int = 5) -> dict:
+    results = {}
+    for name, (factory, scales, unit) in BENCHMARKS.items():
+        if only and name not in only:
+            continue
+        for scale in scales[:1] if quick else scales:
+            samples = _time_case(factory(scale), repeats)
+            median = statistics.median(samples)
+            results[f"{name}[{scale}]"] = {
+                "component": name,
+                "scale": scale,
+                "unit": unit,
+                "median_s": median,
+                "min_s": min(samples),
+                "stdev_s": statistics.stdev(samples) if len(samples) > 1 else 0.0,
+                f"{unit}_per_s": scale / median if median > 0 else None,
+            }
+            print(f"{name:>16} {scale:>9} {unit:<8} median {median * 1000:10.3f} ms", file=sys.stderr)
+
+    return {
+        "meta": {
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "machine": platform.machine(),
+            "cpu_count": os.cpu_count(),
+            "repeats": repeats,
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+        },
+        "results": results,
+    }
+
+
+def compare(current: dict, baseline: dict, threshold: float) -> List[dict]:
+    """Return one row per case present in both runs; `regressed` marks slowdowns beyond `threshold`."""
+    rows = []
+    for key, result in current["results"].items():
+        base = baseline["results"].get(key)
+        if base is None or base["median_s"] <= 0:
+            continue
+        ratio = result["median_s"] / base["median_s"]
+        rows.append(
+            {
+                "case": key,
+                "baseline_s": base["median_s"],
+                "current_s": result["median_s"],
+                "ratio": ratio,
+                "regressed": ratio > 1.0 + threshold,
+            }
+        )
+    return rows
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--output", help="Write results JSON here")
+    parser.add_argument("--compare", help="Baseline results JSON to compare against")
+    parser.add_argument("--threshold", type=float, default=0.2, help="Allowed slowdown ratio, e.g. 0.2 = 20%%")
+    parser.add_argument("--only", help="Comma-separated component names")
+    parser.add_argument("--quick", action="store_true", help="Smallest scale of each component only")
+    parser.add_argument("--repeats", type=int, default=5)
+    args = parser.parse_args()
+
+    only = [name for name in args.only.split(",") if name] if args.only else None
+    current = run_suite(only=only, quick=args.quick, repeats=args.repeats)
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as handle:
+            json.dump(current, handle, indent=2)
+    else:
+        print(json.dumps(current, indent=2))
+
+    if args.compare:
+        with open(args.compare, "r", encoding="utf-8") as handle:
+            baseline = json.load(handle)
+        rows = compare(current, baseline, args.threshold)
+        for row in rows:
+            flag = "REGRESSED" if row["regressed"] else "ok"
+            print(
+                f"{row['case']:>28} {row['baseline_s'] * 1000:10.3f} ms -> {row['current_s'] * 1000:10.3f} ms"
+                f"  x{row['ratio']:.2f}  {flag}",
+                file=sys.stderr,
+            )
+        if any(row["regressed"] for row in rows):
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,4 +1,8 @@
 import os
+from contextlib import contextmanager
+from pathlib import Path
+from types import SimpleNamespace
+
 from fastapi.testclient import TestClient
 import pytest
 
@@ -52,3 +56,70 @@ def client():
         app.state.vector_store = DummyVectorStore()
         app.state.metadata_store = DummyMetadataStore()
         yield test_client
+
+
+def letter_embed(texts):
+    # Deterministic stand-in: one dimension per letter, so "AAAA" is nearest to "A" queries.
+    return [[float(text.count(letter)) for letter in "ABCDEFGH"] for text in texts]
+
+
+def vector(i: int, dim: int = 4) -> list:
+    # A point on the first axis: neighbours of vector(i) are ordered by |i - j|.
+    return [float(i)] + [0.0] * (dim - 1)
+
+
+def clustered(count: int, dim: int = 16, seed: int = 0):
+    """Seeded float32 vectors around 8 centres, with enough structure to train quantizers on."""
+    import numpy as np
+
+    rng = np.random.default_rng(seed)
+    centers = rng.normal(size=(8, dim))
+    vectors = centers[rng.integers(0, 8, size=count)] + 0.1 * rng.normal(size=(count, dim))
+    return vectors.astype("float32")
+
+
+def items(count: int, document_id: str | None = None) -> list:
+    """Metadata for `count` chunks 1..count of `document_id`, or for single-chunk documents doc-0, doc-1, ..."""
+    if document_id is None:
+        return [{"document_id": f"doc-{i}", "chunk_id": 1} for i in range(count)]
+    return [{"document_id": document_id, "chunk_id": n} for n in range(1, count + 1)]
+
+
+@pytest.fixture
+def storage_settings():
+    """
+    Extra environment for `storage_env`. Override it per module with a fixture of
+    the same name, or per test with `@pytest.mark.parametrize("storage_settings", [...])`.
+    """
+    return {}
+
+
+@pytest.fixture
+def storage_env(tmp_path: Path, monkeypatch: pytest.MonkeyPatch, storage_settings):
+    """Point the app at real FAISS/SQLite stores under tmp_path; returns the data directory."""
+    pytest.importorskip("faiss")
+    data_dir = tmp_path / "data"
+    monkeypatch.setenv("SERVICE_NAME", "test-service")
+    monkeypatch.setenv("DISABLE_EMBEDDINGS", "1")
+    monkeypatch.setenv("DISABLE_STORAGE", "0")
+    monkeypatch.setenv("DATA_DIR", str(data_dir))
+    monkeypatch.setenv("FAISS_INDEX_PATH", str(data_dir / "faiss.index"))
+    monkeypatch.setenv("SQLITE_DB_PATH", str(data_dir / "metadata.db"))
+    for name, value in storage_settings.items():
+        monkeypatch.setenv(name, value)
+    return data_dir
+
+
+@pytest.fixture
+def running_client(storage_env):
+    """`with running_client(embed_texts) as client:` runs the app on `storage_env` with that embedding function."""
+
+    @contextmanager
+    def start(embed_texts=letter_embed, model_name: str = "letter-test-model"):
+        import app.main as main
+
+        with TestClient(main.app) as client:
+            main.app.state.embedding_model = SimpleNamespace(embed_texts=embed_texts, model_name=model_name)
+            yield client
+
+    return start
@@ -0,0 +1,105 @@
+import asyncio
+import io
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from app.core.admission import AdmissionController, AdmissionRejected
+
+
+def test_requests_beyond_concurrency_wait_and_run_in_arrival_order():
+    controller = AdmissionController(max_concurrent=1, memory_budget=1000)
+    order = []
+
+    async def request(name: str, hold: float):
+        async with controller.admit(10):
+            order.append(name)
+            await asyncio.sleep(hold)
+
+    async def scenario():
+        first = asyncio.create_task(request("first", 0.05))
+        await asyncio.sleep(0)
+        rest = [asyncio.create_task(request(name, 0)) for name in ("second", "third")]
+        await asyncio.sleep(0)
+        assert controller.queued == 2
+        await asyncio.gather(first, *rest)
+
+    asyncio.run(scenario())
+    assert order == ["first", "second", "third"]
+    assert controller.in_flight == 0 and controller.in_flight_cost == 0
+
+
+def test_memory_budget_limits_in_flight_cost_but_admits_oversized_request_alone():
+    controller = AdmissionController(max_concurrent=4, memory_budget=100, queue_timeout=0.01)
+
+    async def scenario():
+        async with controller.admit(60):
+            with pytest.raises(AdmissionRejected) as rejected:
+                async with controller.admit(60):
+                    pass
+            assert rejected.value.status_code == 503 and rejected.value.retry_after >= 1
+            async with controller.admit(40):
+                assert controller.in_flight_cost == 100
+        async with controller.admit(500):
+            assert controller.in_flight == 1
+
+    asyncio.run(scenario())
+
+
+def test_full_queue_rejects_immediately_with_429():
+    controller = AdmissionController(max_concurrent=1, memory_budget=100, max_queued=0)
+
+    async def scenario():
+        async with controller.admit(1):
+            with pytest.raises(AdmissionRejected) as rejected:
+                async with controller.admit(1):
+                    pass
+        return rejected.value
+
+    assert asyncio.run(scenario()).status_code == 429
+
+
+def test_estimate_cost_scales_with_size_and_type():
+    controller = AdmissionController(
+        max_concurrent=1, memory_budget=100, cost_factors={"text/plain": 2.0, "application/pdf": 5.0}, base_cost=10
+    )
+
+    assert controller.estimate_cost(100, "text/plain") == 210
+    assert controller.estimate_cost(100, "application/pdf") == 510
+    assert controller.estimate_cost(100, "application/zip") == 510
+    assert controller.estimate_cost(None, "text/plain") == 10
+
+
+def test_ingest_sheds_load_with_retry_after(client):
+    controller = AdmissionController(max_concurrent=1, memory_budget=2**30, max_queued=0)
+    client.app.state.admission_controller = controller
+    controller.in_flight, controller.in_flight_cost = 1, 5000  # an upload already running
+    try:
+        response = client.post("/ingest", files={"file": ("f.txt", io.BytesIO(b"hello"), "text/plain")})
+        metrics = client.get("/metrics").text
+    finally:
+        client.app.state.admission_controller = None
+
+    assert response.status_code == 429
+    assert int(response.headers["Retry-After"]) >= 1
+    assert "ingest_in_flight_cost_bytes 5000" in metrics
+
+
+def test_queued_ingest_is_not_counted_as_in_progress(client):
+    controller = AdmissionController(max_concurrent=1, memory_budget=2**30, queue_timeout=0.5)
+    client.app.state.admission_controller = controller
+    controller.in_flight = 1  # an upload already running
+    try:
+        with ThreadPoolExecutor(max_workers=1) as pool:
+            queued = pool.submit(client.post, "/ingest", files={"file": ("f.txt", io.BytesIO(b"hello"), "text/plain")})
+            deadline = time.monotonic() + 2
+            while controller.queued == 0 and time.monotonic() < deadline:
+                time.sleep(0.01)
+            metrics = client.get("/metrics").text
+            assert queued.result(timeout=5).status_code == 503
+    finally:
+        client.app.state.admission_controller = None
+
+    assert "ingest_queued 1" in metrics
+    assert "ingest_in_progress 1" not in metrics
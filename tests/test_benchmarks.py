@@ -0,0 +1,102 @@
+import asyncio
+
+import httpx
+import pytest
+
+from app.core.document_loader import load_pdf
+from benchmarks.corpus import generate_pdf, generate_text
+from benchmarks.fakes import hashing_embedding_model
+from benchmarks.run import compare
+
+
+def test_corpus_generator_is_seeded_and_pdf_parses():
+    assert generate_text(2000, seed=3) == generate_text(2000, seed=3)
+    assert generate_text(2000, seed=3) != generate_text(2000, seed=4)
+
+    pdf = generate_pdf(pages=3, chars_per_page=400, seed=1)
+    assert pdf == generate_pdf(pages=3, chars_per_page=400, seed=1)
+    text = load_pdf(pdf)
+    assert len(text) > 3 * 300
+    assert text.count("\n\n") >= 2
+
+
+def test_hashing_model_is_deterministic_and_normalized():
+    model = hashing_embedding_model(dim=32)
+    first = model.embed_texts(["pump fault", "valve sensor"])
+    again = hashing_embedding_model(dim=32).embed_texts(["pump fault", "valve sensor"])
+
+    assert first == again
+    assert abs(sum(x * x for x in first[0]) - 1.0) < 1e-6
+
+
+def test_compare_flags_only_slowdowns_beyond_threshold():
+    baseline = {"results": {"a[1]": {"median_s": 1.0}, "b[1]": {"median_s": 1.0}, "gone[1]": {"median_s": 1.0}}}
+    current = {"results": {"a[1]": {"median_s": 1.1}, "b[1]": {"median_s": 1.5}, "new[1]": {"median_s": 1.0}}}
+
+    rows = {row["case"]: row for row in compare(current, baseline, threshold=0.2)}
+
+    assert set(rows) == {"a[1]", "b[1]"}
+    assert not rows["a[1]"]["regressed"]
+    assert rows["b[1]"]["regressed"]
+
+
+def test_pdf_backend_parity_against_reference():
+    from benchmarks.bench_pdf_backends import run, similarity
+
+    assert similarity("pump valve sensor", "pump\n\nvalve  sensor") == 1.0
+    assert similarity("pump valve sensor", "pump sensor") < 1.0
+
+    report = run([("one-page", generate_pdf(pages=1, chars_per_page=400, seed=2))], repeat=1, min_similarity=0.98)
+    pypdf = next(row for row in report["backends"] if row["backend"] == "pypdf")
+    assert pypdf["min_similarity"] == 1.0
+    assert report["recommended"] in [row["backend"] for row in report["backends"]]
+
+
+def test_load_harness_summarizes_levels_against_the_app(tmp_path, monkeypatch):
+    pytest.importorskip("faiss")
+    from benchmarks.bench_load import drive_level, percentile, saturation_point, summarize, upload_mix
+
+    assert percentile([5, 1, 4, 2, 3], 50) == 3
+    assert percentile([5, 1, 4, 2, 3], 99) == 5
+    assert saturation_point([{"concurrency": c, "throughput_rps": r} for c, r in [(1, 10), (2, 19), (4, 20)]], 0.1) == 4
+
+    uploads = upload_mix(4, pdf_ratio=0.5, pdf_pages=[1], txt_chars=[1500], seed=1)
+    assert uploads == upload_mix(4, pdf_ratio=0.5, pdf_pages=[1], txt_chars=[1500], seed=1)
+    assert {content_type for _, _, content_type in uploads} == {"application/pdf", "text/plain"}
+
+    monkeypatch.setenv("SERVICE_NAME", "test-service")
+    monkeypatch.setenv("DISABLE_EMBEDDINGS", "1")
+    monkeypatch.setenv("DISABLE_STORAGE", "0")
+    monkeypatch.setenv("DATA_DIR", str(tmp_path))
+    monkeypatch.setenv("FAISS_INDEX_PATH", str(tmp_path / "faiss.index"))
+    monkeypatch.setenv("SQLITE_DB_PATH", str(tmp_path / "metadata.db"))
+    import app.main as main
+
+    async def scenario():
+        async with main.app.router.lifespan_context(main.app):
+            main.app.state.embedding_model = hashing_embedding_model(dim=32)
+            transport = httpx.ASGITransport(app=main.app)
+            async with httpx.AsyncClient(transport=transport, base_url="http://load") as client:
+                return await drive_level(client, uploads, concurrency=2, duration=0.2)
+
+    outcomes, elapsed = asyncio.run(scenario())
+    row = summarize(2, outcomes, elapsed, peak_rss_mb=None)
+
+    assert row["requests"] >= 2
+    assert row["error_rate"] == 0.0 and row["shed_rate"] == 0.0
+    assert row["p50_ms"] <= row["p95_ms"] <= row["p99_ms"]
+    assert row["throughput_rps"] > 0
+
+
+def test_load_server_serves_a_short_sweep():
+    pytest.importorskip("uvicorn")
+    pytest.importorskip("faiss")
+    from benchmarks.bench_load import run, upload_mix
+
+    uploads = upload_mix(4, pdf_ratio=0.0, pdf_pages=[1], txt_chars=[2000])
+    report = asyncio.run(run([1], duration=1.0, uploads=uploads, embed_ms=0.0, cost_rounds=1, knee=0.1))
+
+    (level,) = report["levels"]
+    assert level["requests"] > 0
+    assert level["error_rate"] == 0 and level["shed_rate"] == 0
+    assert level["p50_ms"] is not None
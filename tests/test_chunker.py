@@ -1,6 +1,6 @@
 import pytest
 
-from app.core.chunker import chunk_text
+from app.core.chunker import chunk_spans, chunk_text, content_defined_spans, match_unchanged_chunks
 
 
 def test_short_text_less_than_chunk_size():
@@ -55,3 +55,51 @@ def test_step_always_progresses_when_overlap_ge_chunk_size():
     assert len(chunks) > 1
     # ensure no infinite loops and deterministic ids
     assert [c["chunk_id"] for c in chunks] == list(range(1, len(chunks) + 1))
+
+
+def test_chunk_spans_match_legacy_chunks():
+    text = ("lorem ipsum dolor   \n\n" * 40) + " " * 30 + "tail"
+    spans = chunk_spans(text, chunk_size=37, overlap=11)
+
+    assert spans.to_dicts() == chunk_text(text, chunk_size=37, overlap=11)
+    assert spans.texts() == [c["text"] for c in chunk_text(text, chunk_size=37, overlap=11)]
+    for index, (chunk_id, start, end) in enumerate(spans):
+        assert chunk_id == index + 1
+        assert spans.text_at(index) == text[start:end]
+
+
+def test_chunk_spans_skip_whitespace_windows_and_share_text():
+    text = "abc" + " " * 20 + "def"
+    spans = chunk_spans(text, chunk_size=5, overlap=0)
+
+    assert spans.texts() == ["abc  ", "   de", "f"]
+    assert spans.text is text
+    assert spans.starts.itemsize == 8
+
+
+def test_chunk_spans_empty_text():
+    spans = chunk_spans("")
+    assert len(spans) == 0
+    assert spans.to_dicts() == []
+
+
+def test_content_defined_spans_bound_size_and_survive_edits():
+    from benchmarks.corpus import generate_text
+
+    text = generate_text(20_000, seed=4)
+    spans = content_defined_spans(text, chunk_size=500, overlap=100)
+
+    assert all(0 < end - start <= 500 for _, start, end in spans)
+    assert spans.starts[0] == 0 and spans.ends[-1] == len(text)
+    # Consecutive chunks overlap, so every character is covered.
+    assert all(next_start <= end for next_start, end in zip(spans.starts[1:], spans.ends))
+
+    edited = text[:10_000] + "A freshly inserted sentence. " + text[10_000:]
+    new_texts = content_defined_spans(edited).texts()
+    kept = match_unchanged_chunks({n + 1: t for n, t in enumerate(spans.texts())}, new_texts)
+    assert len(new_texts) - len(kept) <= 4
+
+
+def test_match_unchanged_chunks_pairs_repeats_in_order():
+    previous = {1: "same", 2: "gone", 3: "same", 4: "kept"}
+    assert match_unchanged_chunks(previous, ["kept", "same", "new", "same", "same"]) == {4: 1, 1: 2, 3: 4}
@@ -0,0 +1,140 @@
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.storage.collections import METADATA_STORE_BYTES, CollectionNotFound, CollectionRegistry
+
+
+class _FakeStore:
+    def __init__(self, memory_bytes: int = 0) -> None:
+        self.closed = False
+        self._memory_bytes = memory_bytes
+
+    def memory_bytes(self) -> int:
+        return self._memory_bytes
+
+    def close(self) -> None:
+        self.closed = True
+
+
+def _registry(tmp_path: Path, vector_bytes: int, budget_collections: int, **options) -> CollectionRegistry:
+    return CollectionRegistry(
+        str(tmp_path / "collections"),
+        open_stores=lambda directory: (_FakeStore(vector_bytes), _FakeStore()),
+        memory_budget=budget_collections * (vector_bytes + METADATA_STORE_BYTES),
+        **options,
+    )
+
+
+def test_registry_loads_lazily_and_evicts_least_recently_used(tmp_path: Path):
+    registry = _registry(tmp_path, vector_bytes=2**20, budget_collections=2)
+
+    with pytest.raises(CollectionNotFound):
+        registry.acquire("tenant-a")
+    with pytest.raises(ValueError):
+        registry.acquire("../escape", create=True)
+
+    collections = {}
+    for name in ("tenant-a", "tenant-b"):
+        collections[name] = registry.acquire(name, create=True)
+        registry.release(collections[name])
+    registry.release(registry.acquire("tenant-a"))  # tenant-b is now least recently used
+
+    pinned = registry.acquire("tenant-c", create=True)
+    assert list(registry.loaded) == ["tenant-a", "tenant-c"]
+    assert collections["tenant-b"].vector_store.closed
+    assert not collections["tenant-a"].vector_store.closed
+
+    # Pinned collections stay loaded over budget; the excess goes once released.
+    registry.release(registry.acquire("tenant-b"))
+    assert "tenant-c" in registry.loaded
+    registry.release(pinned)
+    assert len(registry.loaded) == 2
+    assert registry.names() == ["tenant-a", "tenant-b", "tenant-c"]
+    assert registry.loads == 4 and registry.evictions == 2
+
+
+def test_registry_limits_loaded_count(tmp_path: Path):
+    registry = _registry(tmp_path, vector_bytes=0, budget_collections=100, max_loaded=2)
+    for name in ("a", "b", "c"):
+        registry.release(registry.acquire(name, create=True))
+    assert list(registry.loaded) == ["b", "c"]
+    registry.close()
+    assert registry.loaded == {}
+
+
+def test_slow_load_blocks_only_users_of_that_collection(tmp_path: Path):
+    loading, release_load = threading.Event(), threading.Event()
+    opened = []
+
+    def open_stores(directory):
+        opened.append(os.path.basename(directory))
+        if directory.endswith("slow"):
+            loading.set()
+            assert release_load.wait(5)
+        return _FakeStore(), _FakeStore()
+
+    registry = CollectionRegistry(str(tmp_path / "collections"), open_stores, memory_budget=2**30)
+    registry.release(registry.acquire("fast", create=True))
+
+    with ThreadPoolExecutor(max_workers=2) as pool:
+        slow = [pool.submit(registry.acquire, "slow", True) for _ in range(2)]
+        assert loading.wait(5)
+        registry.release(registry.acquire("fast"))  # not held up by the load in progress
+        assert not any(future.done() for future in slow)
+        release_load.set()
+        loaded = [future.result(timeout=5) for future in slow]
+
+    assert loaded[0] is loaded[1] and loaded[0].users == 2
+    assert opened == ["fast", "slow"]
+
+
+def test_failed_create_leaves_no_collection_behind(tmp_path: Path):
+    def open_stores(directory):
+        with open(os.path.join(directory, "metadata.db"), "w"):
+            pass
+        raise OSError("disk full")
+
+    registry = CollectionRegistry(str(tmp_path / "collections"), open_stores, memory_budget=2**30)
+    with pytest.raises(OSError):
+        registry.acquire("broken", create=True)
+
+    assert registry.names() == []
+    with pytest.raises(CollectionNotFound):
+        registry.acquire("broken")
+
+
+def _ingest(client: TestClient, path: str, text: str) -> str:
+    response = client.post(path, files={"file": ("doc.txt", text.encode("utf-8"), "text/plain")})
+    assert response.status_code == 200, response.text
+    return response.json()["document_id"]
+
+
+# Smaller than one collection's SQLite cache: every collection is evicted once idle.
+@pytest.mark.parametrize("storage_settings", [{"COLLECTIONS_MEMORY_BUDGET_MB": "1"}])
+def test_collections_are_isolated_and_reloaded_after_eviction(storage_env, running_client):
+    with running_client() as client:
+        a_doc = _ingest(client, "/collections/tenant-a/ingest", "A" * 300)
+        b_doc = _ingest(client, "/collections/tenant-b/ingest", "A" * 200 + "B" * 100)
+        default_doc = _ingest(client, "/ingest", "A" * 300)
+
+        for name, query, expected in (("tenant-a", "AAAA", a_doc), ("tenant-b", "AAB", b_doc)):
+            response = client.post(f"/collections/{name}/search", json={"query": query, "k": 5})
+            assert response.status_code == 200
+            assert {hit["document_id"] for hit in response.json()["results"]} == {expected}
+        default_hits = client.post("/search", json={"query": "AAAAA", "k": 5}).json()["results"]
+        assert {hit["document_id"] for hit in default_hits} == {default_doc}
+
+        assert (storage_env / "collections" / "tenant-a" / "faiss.index").exists()
+        assert client.app.state.collections.loaded == {}
+        assert client.app.state.collections.loads == 4
+
+        listing = client.get("/collections").json()
+        assert [c["name"] for c in listing["collections"]] == ["tenant-a", "tenant-b"]
+        assert client.post("/collections/missing/search", json={"query": "A"}).status_code == 404
+        assert client.post("/collections/.hidden/search", json={"query": "A"}).status_code == 400
+        assert "collection_evictions_total" in client.get("/metrics").text
@@ -25,7 +25,7 @@ def test_load_pdf_skips_empty_pages_and_preserves_paragraphs(monkeypatch):
     monkeypatch.setattr(dl, "PdfReader", fake_pdf_reader)
 
     pdf_bytes = b"%PDF-FAKE-BYTES"
-    text = dl.load_pdf(pdf_bytes)
+    text = dl.load_pdf(pdf_bytes, backend="pypdf")
 
     # Paragraph separation preserved with double newline between pages
     assert "First page text." in text
@@ -57,3 +57,30 @@ def test_load_txt_fallback_encoding():
     assert "Test" in text
     # Ensure the non-ascii character survived via fallback decode
     assert "\u00A3" in text or "\xa3" in text
+
+
+def test_auto_backend_prefers_first_installed(monkeypatch):
+    monkeypatch.setattr(
+        dl.importlib.util, "find_spec", lambda module: None if module in ("pypdfium2", "pymupdf", "fitz") else object()
+    )
+    assert dl.resolve_pdf_backend("auto") == "pypdf"
+
+    monkeypatch.setattr(dl.importlib.util, "find_spec", lambda module: object())
+    assert dl.resolve_pdf_backend("auto") == "pypdfium2"
+
+
+def test_resolve_pdf_backend_rejects_unknown_and_missing(monkeypatch):
+    with pytest.raises(ValueError):
+        dl.resolve_pdf_backend("ghostscript")
+
+    monkeypatch.setattr(dl.importlib.util, "find_spec", lambda module: None)
+    with pytest.raises(ValueError):
+        dl.resolve_pdf_backend("pypdf")
+
+
+def test_every_backend_output_is_normalized_the_same_way(monkeypatch):
+    monkeypatch.setitem(dl.PDF_BACKENDS, "fake", (("io",), lambda _: ["First  page.\r\nLine", "  ", "Second page."]))
+
+    text = dl.load_pdf(b"%PDF-FAKE-BYTES", backend="fake")
+
+    assert text == "First page.\nLine\n\nSecond page."
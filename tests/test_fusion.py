@@ -0,0 +1,22 @@
+import pytest
+
+from app.core.fusion import reciprocal_rank_fusion
+
+
+def test_items_in_both_rankings_outrank_single_leg_items():
+    fused = reciprocal_rank_fusion([["a", "b", "c"], ["c", "d", "a"]], k=60)
+    order = [item for item, _ in fused]
+
+    assert order[:2] == ["a", "c"]
+    assert set(order) == {"a", "b", "c", "d"}
+
+
+def test_scores_follow_rrf_formula():
+    fused = dict(reciprocal_rank_fusion([["x"], ["y", "x"]], k=10))
+
+    assert fused["x"] == pytest.approx(1 / 11 + 1 / 12)
+    assert fused["y"] == pytest.approx(1 / 11)
+
+
+def test_empty_rankings():
+    assert reciprocal_rank_fusion([[], []]) == []
@@ -0,0 +1,160 @@
+from pathlib import Path
+
+from app.storage.metadata_store import SQLiteMetadataStore
+
+
+def _store_with_documents(tmp_path: Path) -> SQLiteMetadataStore:
+    store = SQLiteMetadataStore(str(tmp_path / "metadata.db"))
+    for document_id, filename, uploaded in [
+        ("d1", "report-2024.pdf", "2024-01-10T00:00:00+00:00"),
+        ("d2", "report-2025.pdf", "2025-03-01T00:00:00+00:00"),
+        ("d3", "notes.txt", "2025-06-01T00:00:00+00:00"),
+    ]:
+        store.save_document(document_id, filename, uploaded, num_chunks=1, embedding_model="m")
+        store.save_chunks(document_id, [{"chunk_id": 1, "text": f"text of {document_id}"}])
+    return store
+
+
+def test_find_document_ids_combines_filters(tmp_path: Path):
+    store = _store_with_documents(tmp_path)
+
+    assert sorted(store.find_document_ids(filename="report-*")) == ["d1", "d2"]
+    assert sorted(store.find_document_ids(uploaded_after="2025-01-01")) == ["d2", "d3"]
+    assert store.find_document_ids(filename="report-*", uploaded_after="2025-01-01") == ["d2"]
+    assert store.find_document_ids(document_ids=["d3", "nope"]) == ["d3"]
+    assert store.find_document_ids(document_ids=[]) == []
+    store.close()
+
+
+def test_filter_columns_are_indexed(tmp_path: Path):
+    store = _store_with_documents(tmp_path)
+    plan = store.conn.execute(
+        "EXPLAIN QUERY PLAN SELECT document_id FROM documents WHERE upload_timestamp >= ?",
+        ("2025",),
+    ).fetchall()
+    assert any("idx_documents_upload_timestamp" in str(row) for row in plan)
+    store.close()
+
+
+def test_get_chunk_texts(tmp_path: Path):
+    store = _store_with_documents(tmp_path)
+    texts = store.get_chunk_texts([("d1", 1), ("d2", 1), ("d2", 9)])
+    assert texts == {("d1", 1): "text of d1", ("d2", 1): "text of d2"}
+    store.close()
+
+
+def test_lexical_index_kept_in_sync_with_saved_chunks(tmp_path: Path):
+    store = _store_with_documents(tmp_path)
+    store.save_document("d4", "codes.txt", "2025-07-01T00:00:00+00:00", num_chunks=2, embedding_model="m")
+    store.save_chunks(
+        "d4",
+        [
+            {"chunk_id": 1, "text": "pump raised ERR-4021 twice"},
+            {"chunk_id": 2, "text": "nothing to see here"},
+        ],
+    )
+
+    hits = store.search_lexical("ERR-4021", k=5)
+    assert [(h["document_id"], h["chunk_id"]) for h in hits] == [("d4", 1)]
+    assert store.search_lexical("text", k=5, document_ids=["d2"])[0]["document_id"] == "d2"
+    # FTS5 operators in user input are treated as plain terms
+    assert store.search_lexical('"unbalanced AND (', k=5) == []
+    store.close()
+
+
+def test_existing_database_is_backfilled_into_lexical_index(tmp_path: Path):
+    import sqlite3
+
+    db_path = tmp_path / "metadata.db"
+    store = _store_with_documents(tmp_path)
+    store.close()
+
+    conn = sqlite3.connect(str(db_path))
+    conn.execute("DROP TABLE chunks_fts")
+    conn.commit()
+    conn.close()
+
+    reopened = SQLiteMetadataStore(str(db_path))
+    hits = reopened.search_lexical("d3", k=5)
+    assert [h["document_id"] for h in hits] == ["d3"]
+    assert reopened.rebuild_lexical_index() == 3
+    reopened.close()
+
+
+def test_save_chunks_accepts_chunk_spans(tmp_path: Path):
+    from app.core.chunker import chunk_spans
+
+    store = SQLiteMetadataStore(str(tmp_path / "metadata.db"))
+    spans = chunk_spans("alpha beta gamma delta epsilon", chunk_size=12, overlap=4)
+    store.save_document("d1", "greek.txt", "2025-01-01T00:00:00+00:00", num_chunks=len(spans), embedding_model="m")
+    store.save_chunks("d1", spans)
+
+    texts = store.get_chunk_texts(("d1", chunk_id) for chunk_id, _, _ in spans)
+    assert [texts[("d1", n + 1)] for n in range(len(spans))] == spans.texts()
+    assert store.search_lexical("gamma", k=1)[0]["chunk_id"] == 2
+    store.close()
+
+
+def _document_text(seed: int = 0) -> str:
+    from benchmarks.corpus import generate_text
+
+    return generate_text(3000, seed=seed)
+
+
+def test_offsets_mode_stores_text_once_and_reads_chunks(tmp_path: Path):
+    import sqlite3
+
+    from app.core.chunker import chunk_spans
+
+    store = SQLiteMetadataStore(str(tmp_path / "metadata.db"), storage_mode="offsets", text_compression="zlib")
+    spans = chunk_spans(_document_text())
+    store.save_document("d1", "a.txt", "2025-01-01T00:00:00+00:00", num_chunks=len(spans), embedding_model="m")
+    store.save_chunks("d1", spans)
+    store.save_chunks("d2", [{"chunk_id": 1, "text": "legacy inline chunk"}])
+
+    texts = store.get_chunk_texts([("d1", n + 1) for n in range(len(spans))] + [("d2", 1)])
+    assert [texts[("d1", n + 1)] for n in range(len(spans))] == spans.texts()
+    assert texts[("d2", 1)] == "legacy inline chunk"
+
+    expected_hit = next(n + 1 for n, chunk in enumerate(spans.texts()) if "ERR-" in chunk)
+    code = next(word for word in spans.texts()[expected_hit - 1].split() if word.startswith("ERR-")).rstrip(".")
+    assert store.search_lexical(code, k=1)[0]["chunk_id"] == expected_hit
+    assert store.rebuild_lexical_index() == len(spans) + 1
+    assert store.search_lexical(code, k=1)[0]["chunk_id"] == expected_hit
+    store.close()
+
+    conn = sqlite3.connect(str(tmp_path / "metadata.db"))
+    assert conn.execute("SELECT count(*) FROM chunks WHERE document_id = 'd1' AND chunk_text != ''").fetchone() == (0,)
+    assert conn.execute("SELECT codec FROM document_texts").fetchall() == [("zlib",)]
+    conn.close()
+
+
+def test_migrate_to_offsets_converts_verifiable_documents(tmp_path: Path):
+    from app.core.chunker import chunk_text
+
+    db_path = str(tmp_path / "metadata.db")
+    store = SQLiteMetadataStore(db_path)
+    original = chunk_text(_document_text(1))
+    store.save_chunks("d1", original)
+    # Chunks that do not tile a text at the default step cannot be reassembled.
+    store.save_chunks("d2", [{"chunk_id": 1, "text": "first"}, {"chunk_id": 2, "text": "unrelated"}])
+    store.close()
+
+    store = SQLiteMetadataStore(db_path, storage_mode="offsets")
+    assert store.migrate_to_offsets() == {"migrated": 1, "skipped": 1}
+    assert store.migrate_to_offsets() == {"migrated": 0, "skipped": 1}
+
+    texts = store.get_chunk_texts([("d1", c["chunk_id"]) for c in original] + [("d2", 2)])
+    assert [texts[("d1", c["chunk_id"])] for c in original] == [c["text"] for c in original]
+    assert texts[("d2", 2)] == "unrelated"
+    assert store.search_lexical("unrelated", k=1)[0]["document_id"] == "d2"
+    store.close()
+
+
+def test_unknown_storage_options_are_rejected(tmp_path: Path):
+    import pytest
+
+    with pytest.raises(ValueError):
+        SQLiteMetadataStore(str(tmp_path / "a.db"), storage_mode="compressed")
+    with pytest.raises(ValueError):
+        SQLiteMetadataStore(str(tmp_path / "b.db"), text_compression="lz4")
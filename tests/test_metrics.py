@@ -0,0 +1,76 @@
+import io
+
+from fastapi.testclient import TestClient
+
+from app.core.metrics import Counter, Gauge, Histogram, MetricsRegistry, StageTimer
+
+
+def test_histogram_renders_cumulative_buckets():
+    registry = MetricsRegistry()
+    histogram = registry.register(Histogram("stage_seconds", "Stage time.", ["stage"], buckets=(0.1, 1.0)))
+    histogram.observe(0.05, stage="parse")
+    histogram.observe(0.5, stage="parse")
+    histogram.observe(5.0, stage="parse")
+
+    text = registry.render()
+
+    assert "# TYPE stage_seconds histogram" in text
+    assert 'stage_seconds_bucket{stage="parse",le="0.1"} 1' in text
+    assert 'stage_seconds_bucket{stage="parse",le="1"} 2' in text
+    assert 'stage_seconds_bucket{stage="parse",le="+Inf"} 3' in text
+    assert 'stage_seconds_count{stage="parse"} 3' in text
+    assert 'stage_seconds_sum{stage="parse"} 5.55' in text
+
+
+def test_counter_and_gauge_render_with_escaped_labels():
+    registry = MetricsRegistry()
+    counter = registry.register(Counter("requests_total", "Requests.", ["status"]))
+    gauge = registry.register(Gauge("queue_depth", "Depth."))
+    counter.inc(status='bad "quote"')
+    gauge.inc(3)
+    gauge.dec()
+
+    text = registry.render()
+
+    assert 'requests_total{status="bad \\"quote\\""} 1' in text
+    assert "queue_depth 2" in text
+
+
+def test_stage_timer_accumulates_and_formats_server_timing():
+    histogram = Histogram("t_seconds", "t")
+    timer = StageTimer(histogram)
+    with timer.stage("chunk"):
+        pass
+    with timer.stage("chunk"):
+        pass
+
+    assert histogram.count(stage="chunk") == 2
+    assert timer.server_timing().startswith("chunk;dur=")
+
+
+def test_ingest_reports_stage_timings_and_metrics_endpoint(client: TestClient, monkeypatch):
+    monkeypatch.setattr("app.api.ingest.load_txt", lambda b: "text " * 300)
+
+    response = client.post(
+        "/ingest",
+        files={"file": ("t.txt", io.BytesIO(b"payload"), "text/plain")},
+        headers={"X-Debug-Timings": "1"},
+    )
+    assert response.status_code == 200
+    server_timing = response.headers["Server-Timing"]
+    for stage in ("read", "parse", "chunk", "embed", "vector_store", "metadata_store"):
+        assert f"{stage};dur=" in server_timing
+
+    plain = client.post("/ingest", files={"file": ("t.txt", io.BytesIO(b"payload"), "text/plain")})
+    assert "Server-Timing" not in plain.headers
+
+    metrics = client.get("/metrics")
+    assert metrics.status_code == 200
+    assert metrics.headers["content-type"].startswith("text/plain")
+    body = metrics.text
+    assert 'ingest_stage_seconds_count{stage="embed"}' in body
+    assert 'ingest_requests_total{status="ok"}' in body
+    assert "ingest_in_progress 0" in body
+    assert "vector_index_size" in body
+    assert "vector_index_retired 0" in body
+    assert "embedding_model_loaded 0" in body
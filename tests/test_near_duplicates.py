@@ -0,0 +1,87 @@
+import io
+
+import pytest
+
+from app.core.near_duplicates import NearDuplicateIndex, embed_skipping_near_duplicates, simhash_signatures
+from benchmarks.corpus import generate_text
+
+# 400 characters for a single-digit page, so it tiles the default 400-char chunk step.
+FOOTER = (
+    "Confidential and proprietary. This document is the property of Acme Pumps Ltd and may not be copied, "
+    "distributed, reproduced or disclosed to any third party without the prior written consent of the company. "
+    "All specifications are subject to change without notice and are provided for information only. "
+    "Acme Pumps Ltd accepts no liability for errors or omissions. Printed on {date}, page {page} of 40."
+)
+
+
+def _distance(a: int, b: int) -> int:
+    return (a ^ b).bit_count()
+
+
+def test_simhash_is_close_for_small_edits_and_far_for_different_text():
+    first, edited, other = simhash_signatures(
+        [
+            FOOTER.format(date="2024-03-01", page=3),
+            FOOTER.format(date="2024-03-02", page=17),
+            generate_text(len(FOOTER), seed=5),
+        ]
+    )
+
+    assert _distance(first, edited) <= 9
+    assert _distance(first, other) > 20
+    assert simhash_signatures([FOOTER]) == simhash_signatures([FOOTER])
+
+
+def test_index_finds_matches_within_threshold_and_evicts_oldest():
+    index = NearDuplicateIndex(threshold=0.9, capacity=2)
+    base = 0x0123456789ABCDEF
+    index.add(base, "a")
+
+    assert index.lookup(base ^ 0b1011) == "a"  # 3 bits apart
+    assert index.lookup(base ^ 0xFF) is None  # 8 bits apart, beyond 6
+
+    index.add(base ^ (0xFFFF << 20), "b")
+    index.add(base ^ (0xFFFF << 40), "c")
+    assert len(index) == 2
+    assert index.lookup(base) is None  # "b" was evicted after "a" was matched, then "a"
+
+
+def test_index_rejects_invalid_threshold():
+    with pytest.raises(ValueError):
+        NearDuplicateIndex(threshold=0.0)
+
+
+def test_embed_skipping_near_duplicates_reuses_vectors():
+    calls = []
+
+    def embed(texts):
+        calls.append(list(texts))
+        return [[float(len(text))] for text in texts]
+
+    index = NearDuplicateIndex(threshold=0.85)
+    body = generate_text(400, seed=1)
+    texts = [FOOTER.format(date="2024-03-01", page=1), body, FOOTER.format(date="2024-03-01", page=2)]
+
+    embeddings, skipped = embed_skipping_near_duplicates(texts, embed, index)
+    assert skipped == 1
+    assert calls == [texts[:2]]
+    assert embeddings[2] == embeddings[0]
+
+    embeddings, skipped = embed_skipping_near_duplicates([FOOTER.format(date="2025-01-09", page=9)], embed, index)
+    assert skipped == 1
+    assert len(calls) == 1
+
+
+def test_ingest_reports_near_duplicate_chunks(client):
+    from app.core.metrics import INGEST_NEAR_DUPLICATES
+
+    client.app.state.near_duplicate_index = NearDuplicateIndex(threshold=0.85)
+    before = INGEST_NEAR_DUPLICATES.value()
+    text = "".join(FOOTER.format(date="2024-03-01", page=page) for page in range(1, 6))
+    try:
+        response = client.post("/ingest", files={"file": ("f.txt", io.BytesIO(text.encode()), "text/plain")})
+    finally:
+        client.app.state.near_duplicate_index = None
+
+    assert response.status_code == 200
+    assert INGEST_NEAR_DUPLICATES.value() - before >= 3
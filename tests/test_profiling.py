@@ -0,0 +1,122 @@
+import asyncio
+import io
+import os
+import pstats
+
+from app.core.profiling import RequestProfiler
+
+TOKEN = "s3cret"
+
+
+def _use_profiler(client, tmp_path, **options) -> RequestProfiler:
+    profiler = RequestProfiler(str(tmp_path / "profiles"), admin_token=TOKEN, **options)
+    client.app.state.profiler = profiler
+    return profiler
+
+
+def _upload(client, headers=None):
+    files = {"file": ("sample.txt", io.BytesIO(b"hello profiling " * 200), "text/plain")}
+    return client.post("/ingest", files=files, headers=headers or {})
+
+
+def test_admin_requested_profile_is_stored_and_served(client, tmp_path):
+    _use_profiler(client, tmp_path)
+    admin = {"X-Admin-Token": TOKEN}
+
+    response = _upload(client, {"X-Profile": "1", **admin})
+    assert response.status_code == 200
+    profile_id = response.headers["X-Profile-Id"]
+
+    listing = client.get("/admin/profiles", headers=admin).json()["profiles"]
+    assert [entry["profile_id"] for entry in listing] == [profile_id]
+
+    report = client.get(f"/admin/profiles/{profile_id}", headers=admin).json()
+    assert report["label"] == "ingest"
+    assert report["metadata"]["filename"] == "sample.txt"
+    assert report["peak_memory_bytes"] > 0
+    assert "_ingest" in report["top_functions"]
+    assert report["top_allocations"]
+
+    pstats_file = client.get(f"/admin/profiles/{profile_id}/pstats", headers=admin)
+    assert pstats_file.status_code == 200
+    assert pstats_file.content
+
+
+def test_profile_header_without_valid_token_is_ignored(client, tmp_path):
+    _use_profiler(client, tmp_path)
+
+    response = _upload(client, {"X-Profile": "1", "X-Admin-Token": "wrong"})
+
+    assert response.status_code == 200
+    assert "X-Profile-Id" not in response.headers
+    assert not os.path.exists(tmp_path / "profiles")
+
+
+def test_admin_endpoints_require_token(client, tmp_path):
+    _use_profiler(client, tmp_path)
+
+    assert client.get("/admin/profiles").status_code == 403
+    assert client.get("/admin/profiles", headers={"X-Admin-Token": "wrong"}).status_code == 403
+    assert client.get("/admin/profiles/../../etc", headers={"X-Admin-Token": TOKEN}).status_code == 404
+    assert client.get("/admin/profiles/" + "0" * 32, headers={"X-Admin-Token": TOKEN}).status_code == 404
+
+
+def test_admin_access_disabled_without_configured_token(client, tmp_path):
+    client.app.state.profiler = RequestProfiler(str(tmp_path / "profiles"))
+
+    assert client.get("/admin/profiles", headers={"X-Admin-Token": ""}).status_code == 403
+
+
+def test_sampling_profiles_requests_and_prunes_old_profiles(client, tmp_path):
+    profiler = _use_profiler(client, tmp_path, sample_rate=1.0, max_profiles=2)
+
+    ids = [_upload(client).headers["X-Profile-Id"] for _ in range(3)]
+
+    stored = sorted(name for name in os.listdir(profiler.profile_dir))
+    assert ids[0] not in "".join(stored)
+    assert len(stored) == 4  # .json + .prof for the two newest
+
+
+def test_only_one_profile_is_captured_at_a_time(tmp_path):
+    profiler = RequestProfiler(str(tmp_path))
+
+    with profiler.profile("outer") as outer:
+        with profiler.profile("inner") as inner:
+            pass
+
+    assert outer is not None
+    assert inner is None
+    assert {name.split(".")[0] for name in os.listdir(tmp_path)} == {outer}
+
+
+def _profiled_step():
+    return sum(range(1000))
+
+
+def _concurrent_step():
+    return sum(range(1000))
+
+
+def test_async_profile_excludes_work_interleaved_on_the_event_loop(tmp_path):
+    profiler = RequestProfiler(str(tmp_path))
+
+    async def profiled():
+        for _ in range(20):
+            _profiled_step()
+            await asyncio.sleep(0.001)
+        return "done"
+
+    async def concurrent():
+        for _ in range(20):
+            _concurrent_step()
+            await asyncio.sleep(0.001)
+
+    async def main():
+        return (await asyncio.gather(profiler.profile_async("request", None, profiled), concurrent()))[0]
+
+    result, profile_id = asyncio.run(main())
+
+    assert result == "done"
+    functions = {name for _, _, name in pstats.Stats(str(tmp_path / f"{profile_id}.prof")).stats}
+    assert "_profiled_step" in functions
+    assert "_concurrent_step" not in functions
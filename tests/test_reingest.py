@@ -0,0 +1,126 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import pytest
+from fastapi.testclient import TestClient
+
+from benchmarks.corpus import generate_text
+from benchmarks.fakes import HashingEncoder
+
+faiss = pytest.importorskip("faiss")
+
+
+@pytest.fixture
+def storage_settings():
+    return {"CHUNKING_STRATEGY": "content_defined"}
+
+
+@pytest.fixture
+def recording_client(running_client):
+    """`with recording_client(embedded) as client:` also appends every embedded text to `embedded`."""
+    encoder = HashingEncoder(dim=32)
+
+    def start(embedded: list):
+        def embed_texts(texts):
+            embedded.extend(texts)
+            return encoder.encode(texts).tolist()
+
+        return running_client(embed_texts, model_name="hashing-32")
+
+    return start
+
+
+def _upload(client: TestClient, method: str, url: str, text: str):
+    return client.request(method, url, files={"file": ("manual.txt", text.encode("utf-8"), "text/plain")})
+
+
+def test_put_document_embeds_only_changed_chunks(recording_client):
+    original = generate_text(30_000, seed=11)
+    edited = original[:15_000] + "Replacement valve ERR-7777 must be torqued twice. " + original[15_100:]
+    embedded: list = []
+
+    with recording_client(embedded) as client:
+        created = _upload(client, "POST", "/ingest", original).json()
+        document_id = created["document_id"]
+        embedded.clear()
+
+        response = _upload(client, "PUT", f"/documents/{document_id}", edited)
+        assert response.status_code == 200
+        body = response.json()
+
+        assert body["version"] == 2
+        assert body["embedded_chunks"] == len(embedded) <= 4
+        assert body["reused_chunks"] + body["embedded_chunks"] == body["num_chunks"]
+        assert body["retired_chunks"] == created["num_chunks"] - body["reused_chunks"]
+
+        hits = client.post("/search", json={"query": "ERR-7777 torqued", "k": 1, "mode": "lexical"}).json()["results"]
+        assert "ERR-7777" in hits[0]["text"]
+        dense = client.post("/search", json={"query": edited[:400], "k": 3}).json()["results"]
+        assert dense[0]["chunk_id"] == 1 and dense[0]["text"] == edited[: len(dense[0]["text"])]
+
+        vector_store = client.app.state.vector_store
+        assert len(vector_store.ids_for_documents([document_id])) == body["num_chunks"]
+        chunks = client.app.state.metadata_store.get_document_chunks(document_id)
+        assert sorted(chunks) == list(range(1, body["num_chunks"] + 1))
+        assert "".join(chunks[n][: 1] for n in sorted(chunks))  # every chunk has text
+
+
+def test_put_document_rechunks_with_the_strategy_it_was_stored_with(recording_client):
+    original = generate_text(30_000, seed=12)
+    # Same length, so fixed-size boundaries stay where they were.
+    edited = original[:15_000] + "X" * 100 + original[15_100:]
+    embedded: list = []
+
+    with recording_client(embedded) as client:
+        client.app.state.chunking_strategy = "fixed"
+        created = _upload(client, "POST", "/ingest", original).json()
+        client.app.state.chunking_strategy = "content_defined"
+        embedded.clear()
+
+        body = _upload(client, "PUT", f"/documents/{created['document_id']}", edited).json()
+        assert body["num_chunks"] == created["num_chunks"]
+        assert body["embedded_chunks"] == len(embedded) <= 2
+        assert client.app.state.metadata_store.get_document(created["document_id"])["chunking"] == "fixed"
+
+
+def test_put_unknown_document_returns_404(recording_client):
+    with recording_client([]) as client:
+        response = _upload(client, "PUT", "/documents/does-not-exist", "text")
+    assert response.status_code == 404
+
+
+def test_snapshot_waits_for_a_document_update_in_progress(recording_client, storage_env, monkeypatch, tmp_path: Path):
+    import numpy as np
+
+    from app.storage.metadata_store import SQLiteMetadataStore
+    from app.storage.snapshot import create_snapshot
+
+    updating, finish = threading.Event(), threading.Event()
+    update_document = SQLiteMetadataStore.update_document
+
+    def slow_update(self, **kwargs):
+        updating.set()
+        assert finish.wait(5)
+        return update_document(self, **kwargs)
+
+    monkeypatch.setattr(SQLiteMetadataStore, "update_document", slow_update)
+    snapshot_dir = tmp_path / "snapshot"
+
+    with recording_client([]) as client, ThreadPoolExecutor(max_workers=2) as pool:
+        document_id = _upload(client, "POST", "/ingest", generate_text(3000, seed=1)).json()["document_id"]
+        put = pool.submit(_upload, client, "PUT", f"/documents/{document_id}", generate_text(3000, seed=2))
+        assert updating.wait(5)  # new vectors published, metadata not yet
+
+        snapshot = pool.submit(
+            create_snapshot, str(storage_env / "faiss.index"), str(storage_env / "metadata.db"), str(snapshot_dir)
+        )
+        time.sleep(0.2)
+        assert not snapshot.done()
+        finish.set()
+        assert put.result(timeout=5).status_code == 200
+        manifest = snapshot.result(timeout=10)
+
+    assert np.load(snapshot_dir / "documents.version.npy").tolist() == [2]
+    assert manifest["tables"]["vectors"]["rows"] == manifest["tables"]["chunks"]["rows"]
@@ -0,0 +1,97 @@
+import pytest
+from fastapi.testclient import TestClient
+
+faiss = pytest.importorskip("faiss")
+
+
+def _ingest(client: TestClient, text: str, filename: str) -> str:
+    response = client.post("/ingest", files={"file": (filename, text.encode("utf-8"), "text/plain")})
+    assert response.status_code == 200
+    return response.json()["document_id"]
+
+
+def test_search_returns_nearest_chunk_with_text(running_client):
+    with running_client() as client:
+        a_doc = _ingest(client, "A" * 300, "alpha.txt")
+        _ingest(client, "B" * 300, "beta.txt")
+
+        response = client.post("/search", json={"query": "AAA", "k": 1})
+
+    assert response.status_code == 200
+    results = response.json()["results"]
+    assert len(results) == 1
+    assert results[0]["document_id"] == a_doc
+    assert results[0]["text"] == "A" * 300
+
+
+def test_search_filename_filter_restricts_documents(running_client):
+    with running_client() as client:
+        _ingest(client, "A" * 300, "alpha.txt")
+        b_doc = _ingest(client, "B" * 300, "report-beta.txt")
+
+        response = client.post(
+            "/search",
+            json={"query": "AAA", "k": 5, "filters": {"filename": "report-*"}},
+        )
+
+    results = response.json()["results"]
+    assert [r["document_id"] for r in results] == [b_doc]
+
+
+def test_search_filter_without_matches_returns_empty(running_client):
+    with running_client() as client:
+        _ingest(client, "A" * 300, "alpha.txt")
+
+        response = client.post(
+            "/search",
+            json={"query": "AAA", "filters": {"uploaded_before": "2000-01-01T00:00:00"}},
+        )
+
+    assert response.status_code == 200
+    assert response.json()["results"] == []
+
+
+def test_hybrid_search_surfaces_keyword_match_and_reports_leg_latency(running_client):
+    with running_client() as client:
+        code_doc = _ingest(client, "Controller fault ERR-4021 reported by the pump.", "faults.txt")
+        _ingest(client, "A" * 300, "alpha.txt")
+
+        lexical = client.post("/search", json={"query": "ERR-4021", "mode": "lexical"}).json()
+        hybrid = client.post("/search", json={"query": "ERR-4021", "k": 2, "mode": "hybrid"}).json()
+
+    assert [r["document_id"] for r in lexical["results"]] == [code_doc]
+    assert set(lexical["timings_ms"]) == {"lexical"}
+
+    assert hybrid["results"][0]["document_id"] == code_doc
+    assert "bm25" in hybrid["results"][0] and "score" in hybrid["results"][0]
+    assert set(hybrid["timings_ms"]) == {"dense", "lexical"}
+
+
+def test_repeated_search_is_cached_until_the_index_changes(running_client):
+    calls = []
+
+    with running_client() as client:
+        model = client.app.state.embedding_model
+        letter_embed = model.embed_texts
+
+        def counting_embed(texts):
+            calls.extend(texts)
+            return letter_embed(texts)
+
+        model.embed_texts = counting_embed
+        _ingest(client, "B" * 300, "beta.txt")
+        calls.clear()
+
+        first = client.post("/search", json={"query": "AAA", "k": 1}).json()["results"]
+        again = client.post("/search", json={"query": "AAA", "k": 1}).json()["results"]
+        assert calls == ["AAA"]
+        assert again == first
+
+        a_doc = _ingest(client, "A" * 300, "alpha.txt")
+        after_ingest = client.post("/search", json={"query": "AAA", "k": 1}).json()["results"]
+        metrics = client.get("/metrics").text
+
+    assert calls.count("AAA") == 1
+    assert after_ingest[0]["document_id"] == a_doc
+    assert 'search_cache_requests_total{cache="query_embedding",result="hit"} 2' in metrics
+    assert 'search_cache_hit_ratio{cache="search_results"} 0.3333333333333333' in metrics
@@ -0,0 +1,31 @@
+from app.core.search_cache import LRUCache, query_vector, vector_key
+
+
+def test_lru_cache_evicts_oldest_and_tracks_hits_and_size():
+    cache = LRUCache(capacity=2)
+    cache.put("a", 1, size=10)
+    cache.put("b", 2, size=20)
+    assert cache.get("a") == 1
+    cache.put("c", 3, size=30)
+
+    assert cache.get("b") is None
+    assert (cache.hits, cache.misses, len(cache), cache.size_bytes) == (1, 1, 2, 40)
+    assert cache.hit_ratio() == 0.5
+
+
+def test_lru_cache_drops_entries_from_older_generations():
+    cache = LRUCache(capacity=10)
+    cache.put("q", ["old"], size=8, generation=1)
+    assert cache.get("q", generation=1) == ["old"]
+
+    assert cache.get("q", generation=2) is None
+    assert len(cache) == 0 and cache.size_bytes == 0
+
+    # A result computed against generation 1 must not land after generation 2 was seen.
+    cache.put("q", ["stale"], size=8, generation=1)
+    assert cache.get("q", generation=2) is None
+
+
+def test_vector_key_depends_on_float32_values():
+    assert vector_key(query_vector([0.5, 1.0])) == vector_key(query_vector([0.5, 1.0]))
+    assert vector_key(query_vector([0.5, 1.0])) != vector_key(query_vector([1.0, 0.5]))
@@ -0,0 +1,127 @@
+import os
+from pathlib import Path
+
+import pytest
+
+faiss = pytest.importorskip("faiss")
+
+from app.storage.sharded_vector_store import (
+    ShardedFaissVectorStore,
+    open_vector_store,
+    read_shard_count,
+    rebalance_shards,
+    shard_for_document,
+)
+from app.storage.vector_store import FaissVectorStore
+from tests.conftest import items, vector
+
+
+def _populate(store, documents: int = 6, chunks: int = 3) -> None:
+    value = 0
+    for d in range(documents):
+        embeddings = []
+        for _ in range(chunks):
+            embeddings.append(vector(value))
+            value += 1
+        store.add_embeddings(embeddings, items(chunks, f"doc-{d}"))
+
+
+def test_vectors_partitioned_by_document_hash(tmp_path: Path):
+    store = ShardedFaissVectorStore(str(tmp_path / "faiss.index"), num_shards=3)
+    _populate(store)
+
+    for shard, shard_store in enumerate(store.shards):
+        for item in shard_store.id_mapping.values():
+            assert shard_for_document(item["document_id"], 3) == shard
+
+    assert sum(s.index.ntotal for s in store.shards if s.index is not None) == 18
+    store.close()
+
+
+def test_fan_out_search_merges_top_k_across_shards(tmp_path: Path):
+    store = ShardedFaissVectorStore(str(tmp_path / "faiss.index"), num_shards=4)
+    _populate(store)
+
+    results = store.search(vector(7), k=3)
+
+    distances = [r["distance"] for r in results]
+    assert distances == sorted(distances)
+    assert results[0]["distance"] == 0.0
+    assert results[0]["document_id"] == "doc-2"
+    assert results[0]["chunk_id"] == 2
+
+    shard = results[0]["faiss_id"] % 4
+    local = results[0]["faiss_id"] // 4
+    assert store.shards[shard].id_mapping[str(local)]["document_id"] == "doc-2"
+    store.close()
+
+
+def test_mismatched_shard_count_requires_rebalance(tmp_path: Path):
+    index_path = str(tmp_path / "faiss.index")
+    store = ShardedFaissVectorStore(index_path, num_shards=2)
+    _populate(store)
+    store.close()
+
+    with pytest.raises(ValueError):
+        ShardedFaissVectorStore(index_path, num_shards=3)
+
+
+def test_rebalance_from_single_index_preserves_vectors(tmp_path: Path):
+    index_path = str(tmp_path / "faiss.index")
+    single = FaissVectorStore(index_path)
+    _populate(single)
+    expected = single.search(vector(10), k=5)
+    single.close()
+
+    assert rebalance_shards(index_path, 3) == 18
+    assert read_shard_count(index_path) == 3
+
+    sharded = open_vector_store(index_path, num_shards=3)
+    results = sharded.search(vector(10), k=5)
+    assert sorted((r["distance"], r["document_id"], r["chunk_id"]) for r in results) == sorted(
+        (r["distance"], r["document_id"], r["chunk_id"]) for r in expected
+    )
+    sharded.close()
+
+    assert rebalance_shards(index_path, 1) == 18
+    # Neither staged nor old-layout files (lock files included) are left behind.
+    assert sorted(os.listdir(tmp_path)) == ["faiss.index", "faiss.index.generation", "faiss.index.mapping.json"]
+    restored = open_vector_store(index_path)
+    assert isinstance(restored, FaissVectorStore)
+    assert restored.index.ntotal == 18
+    restored.close()
+
+
+def test_rebalance_failing_to_persist_leaves_old_layout(tmp_path: Path, monkeypatch: pytest.MonkeyPatch):
+    index_path = str(tmp_path / "faiss.index")
+    store = ShardedFaissVectorStore(index_path, num_shards=2)
+    _populate(store)
+    store.close()
+
+    persist = FaissVectorStore.persist
+
+    def failing_persist(self):
+        if ".rebalance" in self.index_path and self._dirty:
+            raise OSError("disk full")
+        persist(self)
+
+    monkeypatch.setattr(FaissVectorStore, "persist", failing_persist)
+    with pytest.raises(OSError):
+        rebalance_shards(index_path, 3)
+
+    assert read_shard_count(index_path) == 2
+    reopened = open_vector_store(index_path, num_shards=2)
+    assert reopened.ntotal == 18
+    reopened.close()
+
+
+def test_filtered_search_only_queries_owning_shards(tmp_path: Path):
+    store = ShardedFaissVectorStore(str(tmp_path / "faiss.index"), num_shards=4)
+    _populate(store)
+
+    results = store.search(vector(0), k=10, document_ids=["doc-4"])
+
+    assert {r["document_id"] for r in results} == {"doc-4"}
+    assert len(results) == 3
+    assert {r["faiss_id"] % 4 for r in results} == {shard_for_document("doc-4", 4)}
+    store.close()
@@ -0,0 +1,95 @@
+import os
+from pathlib import Path
+
+import pytest
+
+faiss = pytest.importorskip("faiss")
+
+from app.core.chunker import chunk_spans
+from app.storage.metadata_store import SQLiteMetadataStore
+from app.storage.snapshot import MANIFEST_NAME, create_snapshot, restore_snapshot, verify_snapshot
+from app.storage.vector_store import FaissVectorStore
+from tests.conftest import vector
+
+LONG_TEXT = " ".join(f"sensor{i} reported pressure {i * 7} bar" for i in range(60))
+
+
+def _seed(root: Path) -> tuple:
+    index_path, db_path = str(root / "faiss.index"), str(root / "metadata.db")
+    vectors = FaissVectorStore(index_path)
+    vectors.add_embeddings(
+        [vector(i) for i in range(3)],
+        [{"document_id": "inline", "chunk_id": i + 1} for i in range(3)],
+    )
+    # Chunk 3 is superseded by a re-ingest: its vector is retired, not exported.
+    vectors.remap_document_chunks("inline", {1: 1, 2: 2})
+    spans = chunk_spans(LONG_TEXT, chunk_size=200, overlap=40)
+    vectors.add_embeddings(
+        [vector(10 + i) for i in range(len(spans))],
+        [{"document_id": "offsets", "chunk_id": i + 1} for i in range(len(spans))],
+    )
+    # Vectors whose metadata was never committed are left out too.
+    vectors.add_embeddings([vector(99)], [{"document_id": "in-flight", "chunk_id": 1}])
+    vectors.close()
+
+    inline = SQLiteMetadataStore(db_path)
+    inline.save_document("inline", "notes.txt", "2025-01-01T00:00:00+00:00", num_chunks=2, embedding_model="m")
+    inline.save_chunks("inline", [{"chunk_id": 1, "text": "pump raised ERR-4021"}, {"chunk_id": 2, "text": "valve ok"}])
+    inline.close()
+    offsets = SQLiteMetadataStore(db_path, storage_mode="offsets", text_compression="zlib")
+    offsets.save_document("offsets", "log.txt", "2025-02-01T00:00:00+00:00", num_chunks=len(spans), embedding_model="m")
+    offsets.save_chunks("offsets", spans)
+    offsets.close()
+    return index_path, db_path, len(spans)
+
+
+def test_snapshot_round_trip_restores_search_and_chunks(tmp_path: Path):
+    index_path, db_path, offset_chunks = _seed(tmp_path / "src")
+    snapshot_dir = str(tmp_path / "snap")
+
+    manifest = create_snapshot(index_path, db_path, snapshot_dir, batch_size=2)
+    assert manifest["tables"]["vectors"]["rows"] == 2 + offset_chunks
+    assert manifest["tables"]["documents"]["rows"] == 2
+    assert verify_snapshot(snapshot_dir)["files"] == manifest["files"]
+
+    restored_index, restored_db = str(tmp_path / "dst" / "faiss.index"), str(tmp_path / "dst" / "metadata.db")
+    os.makedirs(tmp_path / "dst")
+    counts = restore_snapshot(snapshot_dir, restored_index, restored_db, batch_size=3)
+    assert counts["vectors"] == 2 + offset_chunks
+    assert counts["chunks"] == 2 + offset_chunks
+
+    source, restored = FaissVectorStore(index_path), FaissVectorStore(restored_index)
+    for i in (0, 2, 12):
+        expected = [(h["document_id"], h["chunk_id"]) for h in source.search(vector(i), k=3)]
+        assert [(h["document_id"], h["chunk_id"]) for h in restored.search(vector(i), k=3)] == expected
+    assert restored.retired_count == 0
+    assert not restored.ids_for_documents(["in-flight"]).size
+
+    source_meta, restored_meta = SQLiteMetadataStore(db_path), SQLiteMetadataStore(restored_db)
+    for document_id in ("inline", "offsets"):
+        assert restored_meta.get_document(document_id) == source_meta.get_document(document_id)
+        assert restored_meta.get_document_chunks(document_id) == source_meta.get_document_chunks(document_id)
+    assert [h["chunk_id"] for h in restored_meta.search_lexical("ERR-4021")] == [1]
+    assert restored_meta.search_lexical("sensor42")[0]["document_id"] == "offsets"
+    source_meta.close()
+    restored_meta.close()
+
+
+def test_verify_detects_corruption_and_restore_refuses_existing_data(tmp_path: Path):
+    index_path, db_path, _ = _seed(tmp_path / "src")
+    snapshot_dir = tmp_path / "snap"
+    create_snapshot(index_path, db_path, str(snapshot_dir))
+
+    with pytest.raises(FileExistsError):
+        create_snapshot(index_path, db_path, str(snapshot_dir))
+    with pytest.raises(FileExistsError):
+        restore_snapshot(str(snapshot_dir), index_path, db_path)
+
+    data = snapshot_dir / "chunks.chunk_text.data"
+    data.write_bytes(data.read_bytes().replace(b"pump", b"pimp"))
+    with pytest.raises(ValueError, match="chunks.chunk_text.data"):
+        verify_snapshot(str(snapshot_dir))
+
+    (snapshot_dir / MANIFEST_NAME).unlink()
+    with pytest.raises(ValueError, match="incomplete"):
+        restore_snapshot(str(snapshot_dir), str(tmp_path / "new.index"), str(tmp_path / "new.db"))
@@ -0,0 +1,30 @@
+import os
+import subprocess
+import sys
+
+from benchmarks.bench_startup import HEAVY_MODULES, parse_importtime
+
+
+def test_importing_app_does_not_load_heavy_dependencies():
+    probe = "import sys, app.main; print(' '.join(m for m in sys.argv[1:] if m in sys.modules))"
+    result = subprocess.run(
+        [sys.executable, "-c", probe, *HEAVY_MODULES],
+        check=True,
+        capture_output=True,
+        text=True,
+        env={**os.environ, "PYTHONPATH": os.getcwd(), "DISABLE_EMBEDDINGS": "1", "DISABLE_STORAGE": "1"},
+    )
+
+    assert result.stdout.split() == []
+
+
+def test_parse_importtime_reads_cumulative_milliseconds():
+    stderr = "\n".join(
+        [
+            "import time: self [us] | cumulative | imported package",
+            "import time:       120 |        120 |   json.decoder",
+            "import time:       800 |       2500 | app.main",
+        ]
+    )
+
+    assert parse_importtime(stderr) == {"json.decoder": 0.12, "app.main": 2.5}
@@ -0,0 +1,265 @@
+import os
+from pathlib import Path
+
+import pytest
+
+faiss = pytest.importorskip("faiss")
+
+from app.storage.vector_store import FaissVectorStore, StaleIndexError
+from tests.conftest import clustered, items, vector
+
+
+def _seed(index_path: str, count: int = 10) -> None:
+    store = FaissVectorStore(index_path)
+    store.add_embeddings(
+        [vector(i) for i in range(count)],
+        [{"document_id": "seed", "chunk_id": i + 1} for i in range(count)],
+    )
+    store.close()
+
+
+def test_mmap_load_defers_mapping_and_serves_search(tmp_path: Path):
+    index_path = str(tmp_path / "faiss.index")
+    _seed(index_path)
+
+    store = FaissVectorStore(index_path, mmap=True)
+    assert store._mapped
+    assert store._id_mapping is None
+
+    results = store.search(vector(3), k=2)
+    assert results[0]["chunk_id"] == 4
+    assert store._id_mapping is not None
+
+
+def test_mmap_store_accepts_writes_and_remaps(tmp_path: Path):
+    index_path = str(tmp_path / "faiss.index")
+    _seed(index_path)
+
+    store = FaissVectorStore(index_path, mmap=True)
+    ids = store.add_embeddings([vector(42)], [{"document_id": "new", "chunk_id": 1}])
+
+    assert ids == [10]
+    assert store._mapped
+    assert store.index.ntotal == 11
+    assert faiss.read_index(index_path).ntotal == 11
+    assert store.search(vector(42), k=1)[0]["document_id"] == "new"
+
+
+def test_mmap_reader_picks_up_other_writer(tmp_path: Path):
+    index_path = str(tmp_path / "faiss.index")
+    _seed(index_path)
+
+    reader = FaissVectorStore(index_path, mmap=True)
+    writer = FaissVectorStore(index_path)
+    writer.add_embeddings([vector(99)], [{"document_id": "late", "chunk_id": 1}])
+
+    assert reader.search(vector(99), k=1)[0]["document_id"] == "late"
+    assert reader.index.ntotal == 11
+
+
+def test_mmap_store_reports_published_retired_count_without_loading_mapping(tmp_path: Path):
+    index_path = str(tmp_path / "faiss.index")
+    _seed(index_path)
+    writer = FaissVectorStore(index_path, compact_ratio=0)
+    writer.remap_document_chunks("seed", {1: 1, 2: 2})
+
+    reader = FaissVectorStore(index_path, mmap=True)
+    assert reader.retired_count == 8
+    assert reader._id_mapping is None
+    assert len(reader.id_mapping) == 2 and reader.retired_count == 8
+
+
+def test_sqfp16_needs_no_training_and_keeps_exact_side_file(tmp_path: Path):
+    index_path = str(tmp_path / "faiss.index")
+    store = FaissVectorStore(index_path, index_type="sqfp16")
+    vectors = clustered(20)
+    store.add_embeddings(vectors, items(20))
+
+    assert isinstance(store.index, faiss.IndexScalarQuantizer)
+    assert Path(store.vectors_path).stat().st_size == vectors.nbytes
+    assert store.search(vectors[5], k=1)[0]["document_id"] == "doc-5"
+
+
+def test_pq_stays_flat_until_train_size_then_converts_in_place(tmp_path: Path):
+    index_path = str(tmp_path / "faiss.index")
+    store = FaissVectorStore(index_path, index_type="pq", train_size=300)
+    vectors = clustered(400)
+
+    store.add_embeddings(vectors[:200], items(200))
+    assert type(store.index) is faiss.IndexFlatL2
+
+    store.add_embeddings(vectors[200:], [{"document_id": f"doc-{i}", "chunk_id": 1} for i in range(200, 400)])
+    assert isinstance(store.index, faiss.IndexPQ)
+    assert store.index.ntotal == 400
+
+    reopened = FaissVectorStore(index_path, index_type="pq", train_size=300)
+    assert isinstance(reopened.index, faiss.IndexPQ)
+    assert len(reopened.id_mapping) == 400
+
+
+def test_rerank_restores_exact_distances(tmp_path: Path):
+    index_path = str(tmp_path / "faiss.index")
+    store = FaissVectorStore(index_path, index_type="sq8", train_size=50, rerank_factor=4)
+    vectors = clustered(100)
+    store.add_embeddings(vectors, items(100))
+
+    query = vectors[7] + 0.01
+    results = store.search(query, k=5)
+    exact = ((vectors - query) ** 2).sum(axis=1)
+
+    assert [r["document_id"] for r in results][0] == "doc-7"
+    for result in results:
+        assert result["distance"] == pytest.approx(exact[result["faiss_id"]], rel=1e-4)
+    assert store.reconstruct_vectors(7, 1)[0] == pytest.approx(vectors[7])
+
+
+def test_flat_index_reopened_compressed_backfills_exact_side_file(tmp_path: Path):
+    index_path = str(tmp_path / "faiss.index")
+    vectors = clustered(55)
+    FaissVectorStore(index_path).add_embeddings(vectors[:50], items(50))
+
+    store = FaissVectorStore(index_path, index_type="sqfp16", rerank_factor=4)
+    store.add_embeddings(vectors[50:], [{"document_id": f"doc-{i}", "chunk_id": 1} for i in range(50, 55)])
+
+    assert isinstance(store.index, faiss.IndexScalarQuantizer)
+    assert store.reconstruct_vectors(3, 1)[0] == pytest.approx(vectors[3])
+    query = vectors[3] + 0.01
+    exact = ((vectors - query) ** 2).sum(axis=1)
+    for result in store.search(query, k=5):
+        assert result["distance"] == pytest.approx(exact[result["faiss_id"]], rel=1e-4)
+
+
+def test_side_file_is_not_padded_when_earlier_rows_are_only_compressed(tmp_path: Path):
+    index_path = str(tmp_path / "faiss.index")
+    vectors = clustered(30)
+    store = FaissVectorStore(index_path, index_type="sqfp16", rerank_factor=4)
+    store.add_embeddings(vectors[:20], items(20))
+    os.remove(store.vectors_path)
+
+    store.add_embeddings(vectors[20:], [{"document_id": f"doc-{i}", "chunk_id": 1} for i in range(20, 30)])
+
+    assert not os.path.exists(store.vectors_path)
+    # Reads fall back to the (fp16-accurate) codes instead of trusting zeros.
+    assert store.reconstruct_vectors(3, 1)[0] == pytest.approx(vectors[3], abs=1e-2)
+    assert store.search(vectors[3], k=1)[0]["document_id"] == "doc-3"
+
+
+def test_filtered_search_selector_matches_exact_subset_scan(tmp_path: Path, monkeypatch: pytest.MonkeyPatch):
+    import app.storage.vector_store as vector_store_module
+
+    store = FaissVectorStore(str(tmp_path / "faiss.index"))
+    vectors = clustered(200)
+    store.add_embeddings(vectors, [{"document_id": f"doc-{i % 10}", "chunk_id": i} for i in range(200)])
+
+    wanted = ["doc-3", "doc-7"]
+    subset = store.search(vectors[0], k=5, document_ids=wanted)
+    monkeypatch.setattr(vector_store_module, "BRUTE_FORCE_MAX_IDS", 0)
+    selected = store.search(vectors[0], k=5, document_ids=wanted)
+
+    assert {r["document_id"] for r in subset} <= set(wanted)
+    assert [r["faiss_id"] for r in subset] == [r["faiss_id"] for r in selected]
+    assert store.search(vectors[0], k=5, document_ids=["missing"]) == []
+
+
+def test_remap_document_chunks_renumbers_and_retires(tmp_path: Path):
+    index_path = str(tmp_path / "faiss.index")
+    _seed(index_path, count=10)
+    store = FaissVectorStore(index_path)
+    store.add_embeddings([vector(100)], [{"document_id": "other", "chunk_id": 1}])
+
+    # Keep chunks 1 and 2 as 5 and 6; chunks 3..10 are superseded.
+    assert store.remap_document_chunks("seed", {1: 5, 2: 6}) == 8
+    assert store.retired_count == 8
+
+    hits = store.search(vector(0), k=3)
+    assert [(h["document_id"], h["chunk_id"]) for h in hits] == [("seed", 5), ("seed", 6), ("other", 1)]
+    assert len(store.ids_for_documents(["seed"])) == 2
+    store.close()
+
+    reader = FaissVectorStore(index_path)
+    assert reader.retired_count == 8
+    assert [h["chunk_id"] for h in reader.search(vector(2), k=2, document_ids=["seed"])] == [6, 5]
+
+
+def test_replace_document_chunks_publishes_one_generation(tmp_path: Path):
+    index_path = str(tmp_path / "faiss.index")
+    _seed(index_path, count=4)
+    store = FaissVectorStore(index_path)
+    other = FaissVectorStore(index_path)
+    other.add_embeddings([vector(50)], [{"document_id": "other", "chunk_id": 1}])
+
+    generation = store.generation
+    assert store.replace_document_chunks("seed", {1: 1}, [vector(7)], [{"document_id": "seed", "chunk_id": 2}]) == 3
+    assert store.generation == generation + 2  # other's write, then this one
+
+    reader = FaissVectorStore(index_path)
+    assert sorted((item["document_id"], item["chunk_id"]) for item in reader.id_mapping.values()) == [
+        ("other", 1),
+        ("seed", 1),
+        ("seed", 2),
+    ]
+
+
+def test_persist_refuses_to_overwrite_a_newer_generation(tmp_path: Path):
+    index_path = str(tmp_path / "faiss.index")
+    _seed(index_path, count=4)
+    store = FaissVectorStore(index_path)
+    other = FaissVectorStore(index_path)
+
+    store.remap_document_chunks("seed", {1: 1}, persist=False)
+    other.add_embeddings([vector(50)], [{"document_id": "other", "chunk_id": 1}])
+    with pytest.raises(StaleIndexError):
+        store.add_embeddings([vector(7)], [{"document_id": "seed", "chunk_id": 2}])
+
+    assert "other" in {item["document_id"] for item in FaissVectorStore(index_path).id_mapping.values()}
+
+
+def test_replace_compacts_once_retired_vectors_pass_the_ratio(tmp_path: Path):
+    index_path = str(tmp_path / "faiss.index")
+    _seed(index_path, count=10)
+    store = FaissVectorStore(index_path, compact_ratio=0.5)
+    reader = FaissVectorStore(index_path)
+
+    store.replace_document_chunks("seed", {n: n for n in range(1, 6)}, [], [])
+    assert store.retired_count == 5 and store.ntotal == 10  # not above half yet
+
+    store.replace_document_chunks("seed", {1: 1}, [vector(42)], [{"document_id": "seed", "chunk_id": 2}])
+    assert store.retired_count == 0 and store.ntotal == 2
+    assert [h["chunk_id"] for h in reader.search(vector(40), k=5)] == [2, 1]
+    assert reader.ntotal == 2
+
+
+def test_compact_rewrites_exact_side_file_for_compressed_index(tmp_path: Path):
+    index_path = str(tmp_path / "faiss.index")
+    store = FaissVectorStore(index_path, index_type="sq8", train_size=50, rerank_factor=4, compact_ratio=0)
+    vectors = clustered(100)
+    store.add_embeddings(vectors, [{"document_id": "doc", "chunk_id": i + 1} for i in range(100)])
+    store.remap_document_chunks("doc", {n: n for n in range(1, 101, 2)})
+
+    assert store.compact() == 50
+    assert isinstance(store.index, faiss.IndexScalarQuantizer)
+    assert store.compact() == 0
+
+    reopened = FaissVectorStore(index_path, index_type="sq8", rerank_factor=4)
+    assert reopened.ntotal == 50
+    assert Path(reopened.vectors_path).stat().st_size == vectors[::2].nbytes
+    assert reopened.reconstruct_vectors(0, 50) == pytest.approx(vectors[::2])
+    hit = reopened.search(vectors[20], k=1)[0]
+    assert hit["chunk_id"] == 21 and hit["distance"] == pytest.approx(0.0, abs=1e-6)
+
+
+def test_rerank_ignores_side_file_rewritten_by_a_newer_epoch(tmp_path: Path, monkeypatch: pytest.MonkeyPatch):
+    index_path = str(tmp_path / "faiss.index")
+    writer = FaissVectorStore(index_path, index_type="sq8", train_size=50, rerank_factor=4, compact_ratio=0)
+    vectors = clustered(100)
+    writer.add_embeddings(vectors, [{"document_id": "doc", "chunk_id": i + 1} for i in range(100)])
+    reader = FaissVectorStore(index_path, index_type="sq8", rerank_factor=4)
+
+    writer.remap_document_chunks("doc", {n: n for n in range(1, 101, 2)})
+    writer.compact()
+    writer.add_embeddings(clustered(60, seed=1), items(60))
+    # The reader searches as if it had refreshed just before the compaction.
+    monkeypatch.setattr(reader, "refresh", lambda: False)
+
+    hit = reader.search(vectors[60], k=1)[0]
+    assert hit["faiss_id"] == 60 and hit["chunk_id"] == 61
@@ -0,0 +1,89 @@
+import multiprocessing
+from pathlib import Path
+
+import pytest
+
+faiss = pytest.importorskip("faiss")
+
+from app.storage.vector_store import FaissVectorStore
+from tests.conftest import vector
+
+
+def _worker_ingest(index_path: str, worker: int, batches: int) -> None:
+    store = FaissVectorStore(index_path)
+    for batch in range(batches):
+        document_id = f"w{worker}-b{batch}"
+        store.add_embeddings(
+            [vector(worker * 100 + batch), vector(worker * 100 + batch)],
+            [{"document_id": document_id, "chunk_id": 1}, {"document_id": document_id, "chunk_id": 2}],
+        )
+    store.close()
+
+
+def test_second_store_sees_first_store_writes(tmp_path: Path):
+    index_path = str(tmp_path / "faiss.index")
+    first = FaissVectorStore(index_path)
+    second = FaissVectorStore(index_path)
+
+    first.add_embeddings([vector(1)], [{"document_id": "a", "chunk_id": 1}])
+    second.add_embeddings([vector(2)], [{"document_id": "b", "chunk_id": 1}])
+
+    # second caught up before writing, so neither write was lost
+    assert second.index.ntotal == 2
+    assert faiss.read_index(index_path).ntotal == 2
+
+    index_before = first.index
+    results = first.search(vector(2), k=1)
+    assert results[0]["document_id"] == "b"
+    # append-only change is applied in place rather than by re-reading the file
+    assert first.index is index_before
+    assert first.generation == second.generation
+
+
+def test_close_does_not_overwrite_newer_generation(tmp_path: Path):
+    index_path = str(tmp_path / "faiss.index")
+    stale = FaissVectorStore(index_path)
+    writer = FaissVectorStore(index_path)
+
+    writer.add_embeddings([vector(1)], [{"document_id": "a", "chunk_id": 1}])
+    stale.close()
+
+    assert faiss.read_index(index_path).ntotal == 1
+
+
+def test_concurrent_worker_processes_do_not_lose_updates(tmp_path: Path):
+    index_path = str(tmp_path / "faiss.index")
+    ctx = multiprocessing.get_context("spawn")
+    workers = [ctx.Process(target=_worker_ingest, args=(index_path, w, 5)) for w in range(4)]
+    for process in workers:
+        process.start()
+    for process in workers:
+        process.join(timeout=60)
+        assert process.exitcode == 0
+
+    store = FaissVectorStore(index_path)
+    assert store.index.ntotal == 4 * 5 * 2
+    assert len(store.id_mapping) == store.index.ntotal
+    assert {item["document_id"] for item in store.id_mapping.values()} == {
+        f"w{w}-b{b}" for w in range(4) for b in range(5)
+    }
+
+
+def test_refresh_inside_exclusive_does_not_wait_on_itself(tmp_path: Path):
+    import threading
+
+    index_path = str(tmp_path / "faiss.index")
+    store = FaissVectorStore(index_path)
+    store.add_embeddings([vector(1)], [{"document_id": "a", "chunk_id": 1}])
+    refreshed = []
+
+    def refresh_while_exclusive() -> None:
+        with store.exclusive():
+            store._generation_stat = None  # force refresh to take the shared lock
+            refreshed.append(store.refresh())
+
+    # A daemon thread, so a regression fails the test instead of hanging the run.
+    thread = threading.Thread(target=refresh_while_exclusive, daemon=True)
+    thread.start()
+    thread.join(timeout=5)
+    assert refreshed == [False]